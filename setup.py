@@ -1,4 +1,31 @@
 import setuptools
+from setuptools.command.build_ext import build_ext
+
+EXTENSIONS = "simulation/methods/comparison/extensions"
+
+
+class NumpyBuildExt(build_ext):
+    """
+    adds the numpy headers once numpy is installed as a build dependency
+    """
+    def finalize_options(self):
+        super().finalize_options()
+        import numpy
+        self.include_dirs.append(numpy.get_include())
+
+
+# the kernels are compiled for several instruction sets and selected at runtime,
+# so neither -march=native nor -ffast-math (which changes the FPU mode of the process) is used
+fusedboot = setuptools.Extension(
+    name="simulation.methods.comparison.extensions.fusedboot",
+    sources=[f"{EXTENSIONS}/fusedboot.c"],
+    depends=[f"{EXTENSIONS}/{header}" for header in ["common.h", "kernels.h", "splitmix64.h", "xoshiro256pv.h"]],
+    extra_compile_args=[
+        "-O2", "-ftree-vectorize", "-pthread", "-DNDEBUG",
+        "-fno-math-errno", "-fno-trapping-math", "-fno-signed-zeros", "-fassociative-math",
+    ],
+    extra_link_args=["-pthread"],
+)
 
 setuptools.setup(
     name="simulation",
@@ -9,5 +36,8 @@ setuptools.setup(
     keywords=[],
     packages=setuptools.find_packages(),
     python_requires='>=3.12',
-    install_requires=['requests', 'pandas'],
-)
\ No newline at end of file
+    install_requires=['requests', 'pandas', 'numpy'],
+    setup_requires=['numpy'],
+    ext_modules=[fusedboot],
+    cmdclass={"build_ext": NumpyBuildExt},
+)
@@ -0,0 +1,105 @@
+import multiprocessing
+import resource
+import time
+from contextlib import contextmanager
+
+from simulation.logger import Logger
+
+
+class AdmissionController(Logger):
+	"""
+		Limits the estimated bytes of the chunks of pairs compared at the same time to a global memory budget.
+		The state lives in shared memory, so one controller serves the threads and the forked worker processes
+		alike, as long as it is created before the workers are forked.
+		The chunks are admitted in the order they arrive, a chunk that does not fit holds back the later ones,
+		so that a large chunk is not starved by smaller ones admitted while it waits.
+		A single pair estimated above the whole budget cannot be bounded, it is logged as an error and admitted alone,
+		when nothing else is in flight.
+		Without a budget, nothing is estimated or limited.
+	"""
+	budget: int
+
+	def __init__(self, budget: int = 0):
+		super().__init__(method_name="Simulation/Admission")
+		self.budget = budget
+
+		context = multiprocessing.get_context("fork")
+		self.condition = context.Condition()
+		self.in_flight = context.Value("q", 0, lock=False)
+		self.in_flight_count = context.Value("q", 0, lock=False)
+		self.peak = context.Value("q", 0, lock=False)
+		self.waits = context.Value("q", 0, lock=False)
+		self.wait_time = context.Value("d", 0.0, lock=False)
+		# the tickets of the chunks in the order they arrived and of the next chunk to admit
+		self.next_ticket = context.Value("q", 0, lock=False)
+		self.serving = context.Value("q", 0, lock=False)
+
+	def fits(self, ticket: int, required: int) -> bool:
+		return ticket == self.serving.value and (
+			self.in_flight_count.value == 0 or self.in_flight.value + required <= self.budget)
+
+	@contextmanager
+	def admit(self, key: str, required: int):
+		"""
+		waits until the chunks that arrived before are admitted and the estimated bytes of the chunk fit in the budget
+		next to the ones in flight
+		:param key: the combination, for the log
+		:param required: the estimated peak bytes of comparing the chunk of pairs
+		"""
+		if self.budget <= 0:
+			yield
+			return
+
+		if self.budget < required:
+			self.log_error(
+				"admit", f"{key}  estimated {required / 2**20:.0f} MB exceeds the budget of "
+				f"{self.budget / 2**20:.0f} MB, admitted alone")
+
+		start = time.perf_counter()
+		with self.condition:
+			ticket = self.next_ticket.value
+			self.next_ticket.value += 1
+
+			if not self.fits(ticket, required):
+				self.waits.value += 1
+				while not self.fits(ticket, required):
+					self.condition.wait()
+				self.wait_time.value += time.perf_counter() - start
+
+			# the next chunk may fit next to this one
+			self.serving.value += 1
+			self.condition.notify_all()
+
+			self.in_flight.value += required
+			self.in_flight_count.value += 1
+			self.peak.value = max(self.peak.value, self.in_flight.value)
+
+		try:
+			yield
+		finally:
+			with self.condition:
+				self.in_flight.value -= required
+				self.in_flight_count.value -= 1
+				self.condition.notify_all()
+
+	def reset(self) -> None:
+		with self.condition:
+			self.peak.value = self.in_flight.value
+			self.waits.value = 0
+			self.wait_time.value = 0.0
+
+	def report(self, metric: str) -> None:
+		if self.budget > 0:
+			self.log_info(
+				f"{metric}: peak estimated in flight {self.peak.value / 2**20:.0f} MB "
+				f"({self.budget / 2**20:.0f} MB budget), {self.waits.value} chunks waited {self.wait_time.value:.1f}s")
+		else:
+			self.log_info(f"{metric}: no budget, the chunks were not estimated")
+
+		# ru_maxrss is in kB on Linux, the children are the worker processes that have been joined
+		own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+		message = f"{metric}: peak resident memory {own / 2**10:.0f} MB"
+		if workers > 0:
+			message += f", largest worker process {workers / 2**10:.0f} MB"
+		self.log_info(message)
@@ -0,0 +1,38 @@
+import argparse
+import time
+
+import numpy as np
+from simulation.benchmarks.screening import load_pairs
+from simulation.methods.comparison.comparer import Comparer
+from simulation.methods.dimension.max import Max
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Compares the pairs of the cached combinations one by one and in one batch")
+
+	parser.add_argument("-c", "--column", type=str, help="the column of the measurements", default="iteration_time_ns")
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas", default=3333)
+	parser.add_argument("-l", "--limit", type=int, help="the maximum number of pairs", default=500)
+
+	args = parser.parse_args()
+	pairs = load_pairs(args.limit)
+	run_sizes = [Max().calculate_dimension(old, new) for old, new in pairs]
+
+	start = time.perf_counter()
+	single = [
+		Comparer(run_size=run_size, boots=args.boots).compare(old, new, args.column)
+		for (old, new), run_size in zip(pairs, run_sizes)
+	]
+	single_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	batched = Comparer(boots=args.boots).compare_batch(
+		[(old, new, run_size) for (old, new), run_size in zip(pairs, run_sizes)], args.column)
+	batch_time = time.perf_counter() - start
+
+	differences = [abs(one["p_value"] - other["p_value"]) for one, other in zip(single, batched)]
+
+	print(f"pairs: {len(pairs)}")
+	print(f"one by one: {single_time:.2f} s, batch: {batch_time:.2f} s ({single_time / batch_time:.1f}x)")
+	print(f"p-value difference: mean {np.mean(differences):.2e}, max {np.max(differences):.2e}")
@@ -0,0 +1,99 @@
+import argparse
+import gc
+import json
+import os
+import resource
+import time
+from datetime import datetime
+from pathlib import Path
+from simulation.data import Data
+from simulation.logger import Logger
+from simulation.measurement import Measurement
+
+
+class BaselineMeasurement(Logger):
+	"""
+	the former measurement, with a logger per instance and the run files listed when it is created
+	"""
+	def __init__(self, data: dict):
+		super().__init__(method_name="Measurement")
+
+		self.id = data['id']
+		self.version_id = str(data['version_id'])
+		self.path_to_directory = Path() / data['path_to_directory']
+		self.commit_datetime = datetime.strptime(data['datetime'], "%Y-%m-%dT%H:%M:%S")
+		self.commit_hash = data['commit_hash']
+		self.count = data['count']
+		self.items = [x.name.replace("raw_", "") for x in self.path_to_directory.rglob('*raw*.csv')]
+
+	def __lt__(self, other):
+		return self.commit_datetime < other.commit_datetime
+
+
+def current_rss() -> int:
+	"""
+	:return: the resident set size of this process in bytes (peak size where /proc is not available)
+	"""
+	statm = Path("/proc/self/statm")
+	if statm.exists():
+		return int(statm.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_records(args: argparse.Namespace) -> list[dict]:
+	if args.synthetic > 0:
+		return [
+			{
+				"id": f"5-34-1-2-3-{i}",
+				"version_id": i,
+				"path_to_directory": f"{args.source}/5/34/1/2/3/{i}",
+				"datetime": "2022-01-01T10:00:00",
+				"commit_hash": "0" * 40,
+				"count": 30,
+			}
+			for i in range(args.synthetic)
+		]
+
+	if args.snapshot is not None:
+		return [
+			record
+			for records in Data.read_snapshot(Path(args.snapshot))['measurements'].values()
+			for record in records
+		]
+
+	records = []
+	for combination_path in (Path() / os.getenv("PHOENIX_HOME") / "_cache/data").glob("*-*-*-*-*.json"):
+		with open(combination_path, "r") as combination_json:
+			records.extend(json.load(combination_json))
+	return records
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Measures the time and memory of loading the measurement catalogue")
+
+	parser.add_argument("-s", "--snapshot", type=str, help="load the records from a snapshot file", default=None)
+	parser.add_argument(
+		"-n", "--synthetic", type=int, help="use the given number of synthetic records instead", default=0)
+	parser.add_argument(
+		"--source", type=str, help="the source directory of the synthetic records", default="/nonexistent")
+	parser.add_argument(
+		"-b", "--baseline", action="store_true", help="build the former measurements to compare with")
+
+	args = parser.parse_args()
+	records = load_records(args)
+
+	gc.collect()
+	rss_before = current_rss()
+	start = time.perf_counter()
+
+	measurement_class = BaselineMeasurement if args.baseline else Measurement
+	measurements = [measurement_class(record) for record in records]
+	measurements.sort()
+
+	duration = time.perf_counter() - start
+	gc.collect()
+	rss_after = current_rss()
+
+	print(f"measurements: {len(measurements)} ({'former' if args.baseline else 'current'})")
+	print(f"time: {duration:.3f} s ({1e6 * duration / max(1, len(measurements)):.1f} us per measurement)")
+	print(f"rss: +{(rss_after - rss_before) / 2**20:.1f} MiB ({(rss_after - rss_before) / max(1, len(measurements)):.0f} B per measurement)")
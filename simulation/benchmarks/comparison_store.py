@@ -0,0 +1,123 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from simulation.methods.analyze.store import ComparisonStore
+
+RESULT = {
+	"measurement_old_count": 30,
+	"measurement_new_count": 30,
+	"p_value": 0.25,
+	"relative_change": 0.001,
+}
+
+# threads share one store like the simulation does, forked processes open their own
+_shared: dict = {}
+
+
+def pairs_of(worker: int, count: int) -> list[tuple[str, str, str]]:
+	return [(f"5-34-1-{worker}-3", str(i), str(i + 1)) for i in range(count)]
+
+
+def store_worker(path: Path, worker: int, count: int) -> tuple[float, float]:
+	store = _shared['store'] if _shared['pid'] == os.getpid() else ComparisonStore(path)
+	pairs = pairs_of(worker, count)
+
+	start = time.perf_counter()
+	for key, old_version, new_version in pairs:
+		store.get(key, old_version, new_version, "iteration_time_ns")
+		store.put(key, old_version, new_version, "iteration_time_ns", "30-30-max", RESULT)
+	store.flush()
+	insert_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for key, old_version, new_version in pairs:
+		store.get(key, old_version, new_version, "iteration_time_ns")
+	lookup_time = time.perf_counter() - start
+
+	return insert_time, lookup_time
+
+
+def json_worker(path: Path, worker: int, count: int) -> tuple[float, float]:
+	"""
+	the former cache, one json file per pair that is read and rewritten for every new result
+	"""
+	pairs = pairs_of(worker, count)
+
+	start = time.perf_counter()
+	for key, old_version, new_version in pairs:
+		directory = path / key.replace("-", "/")
+		os.makedirs(directory, exist_ok=True)
+		file_path = directory / f"{old_version}-{new_version}-iteration_time_ns.json"
+		results = {}
+		if file_path.exists():
+			with open(file_path, "r") as json_file:
+				results = json.load(json_file)
+		with open(file_path, "w") as json_file:
+			json.dump({"30-30-max": RESULT, **results}, json_file, indent=4)
+	insert_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for key, old_version, new_version in pairs:
+		with open(path / key.replace("-", "/") / f"{old_version}-{new_version}-iteration_time_ns.json", "r") as json_file:
+			json.load(json_file)
+	lookup_time = time.perf_counter() - start
+
+	return insert_time, lookup_time
+
+
+def run(worker_fn, path: Path, workers: int, count: int, processes: bool) -> list[tuple[float, float]]:
+	if processes:
+		context = multiprocessing.get_context("fork")
+		with context.Pool(workers) as pool:
+			return pool.starmap(worker_fn, [(path, worker, count) for worker in range(workers)])
+
+	timings = [None] * workers
+
+	def thread_worker(worker: int) -> None:
+		timings[worker] = worker_fn(path, worker, count)
+
+	threads = [threading.Thread(target=thread_worker, args=(worker,)) for worker in range(workers)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	return timings
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Measures the throughput of the comparison store under concurrent workers")
+
+	parser.add_argument("-w", "--workers", type=int, help="number of concurrent workers", default=8)
+	parser.add_argument("-n", "--count", type=int, help="number of pairs per worker", default=2000)
+	parser.add_argument("-p", "--processes", action="store_true", help="use processes instead of threads")
+	parser.add_argument("--json", action="store_true", help="measure the former per-pair json files instead")
+
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as directory:
+		if args.json:
+			path = Path(directory) / "comparisons"
+			worker_fn = json_worker
+		else:
+			path = Path(directory) / "comparisons.sqlite"
+			worker_fn = store_worker
+			_shared['store'] = ComparisonStore(path)
+			_shared['pid'] = os.getpid()
+
+		start = time.perf_counter()
+		timings = run(worker_fn, path, args.workers, args.count, args.processes)
+		wall_time = time.perf_counter() - start
+
+	operations = args.workers * args.count
+	insert_time = max(timing[0] for timing in timings)
+	lookup_time = max(timing[1] for timing in timings)
+
+	print(f"{'json files' if args.json else 'store'}, {args.workers} {'processes' if args.processes else 'threads'}")
+	print(f"inserts: {operations / insert_time:.0f} per second")
+	print(f"lookups: {operations / lookup_time:.0f} per second")
+	print(f"wall time: {wall_time:.2f} s")
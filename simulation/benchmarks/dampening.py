@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from simulation.measurement import Measurement
+from simulation.methods.comparison.comparer import Comparer
+
+
+def dampen_sorted(comparer: Comparer, numbers: np.ndarray) -> None:
+	"""
+	the former dampening, sorts the whole run and walks the extremes one by one
+	"""
+	count = len(numbers)
+	replace = int(count * comparer.bootstrap_diff_trim_share)
+	if replace == 0:
+		return
+
+	numbers.sort()
+	median_lo = numbers[(count - 1) // 2]
+	median_hi = numbers[count // 2]
+	median = (median_lo + median_hi) / 2
+
+	survivor_index_lo = 0
+	survivor_index_hi = count - 1
+	for i in range(replace):
+		distance_lo = median - numbers[survivor_index_lo]
+		distance_hi = numbers[survivor_index_hi] - median
+		if distance_lo > distance_hi:
+			survivor_index_lo += 1
+		else:
+			survivor_index_hi -= 1
+
+	survivor_lo = numbers[survivor_index_lo]
+	survivor_hi = numbers[survivor_index_hi]
+	survivor_range = survivor_hi - survivor_lo
+	limit_lo = survivor_lo - survivor_range * comparer.bootstrap_diff_trim_limit
+	limit_hi = survivor_hi + survivor_range * comparer.bootstrap_diff_trim_limit
+
+	slice_lo = slice(0, survivor_index_lo + 1)
+	outside_lo = numbers[slice_lo] < limit_lo
+	replace_lo = numbers[slice_lo][np.logical_not(outside_lo)].min()
+	numbers[slice_lo][outside_lo] = replace_lo
+
+	slice_hi = slice(survivor_index_hi, None)
+	outside_hi = numbers[slice_hi] > limit_hi
+	replace_hi = numbers[slice_hi][np.logical_not(outside_hi)].max()
+	numbers[slice_hi][outside_hi] = replace_hi
+
+
+def load_runs(args: argparse.Namespace) -> list[list[np.ndarray]]:
+	"""
+	:return: the runs of every recorded measurement, or synthetic heavy-tailed runs without a PHOENIX_HOME
+	"""
+	if os.getenv("PHOENIX_HOME") is None or args.synthetic > 0:
+		generator = np.random.default_rng(0)
+		return [
+			[1e6 + 3e4 * generator.standard_t(3, args.iterations) for _ in range(args.runs)]
+			for _ in range(max(1, args.synthetic))
+		]
+
+	records = []
+	for combination_path in (Path() / os.getenv("PHOENIX_HOME") / "_cache/data").glob("*-*-*-*-*.json"):
+		with open(combination_path, "r") as combination_json:
+			records.extend(json.load(combination_json))
+
+	return [Measurement(record).read_columns(args.column, args.cleaned) for record in records[:args.limit]]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Verifies the partition-based dampening against the former sorting one and measures both")
+
+	parser.add_argument("-c", "--column", type=str, help="the column of the recorded measurements", default="iteration_time_ns")
+	parser.add_argument("--cleaned", action="store_true", help="use the cleaned column")
+	parser.add_argument("-l", "--limit", type=int, help="the maximum number of recorded measurements", default=200)
+	parser.add_argument(
+		"-n", "--synthetic", type=int, help="use the given number of synthetic measurements instead", default=0)
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per synthetic measurement", default=30)
+	parser.add_argument("-i", "--iterations", type=int, help="number of iterations per synthetic run", default=5000)
+
+	args = parser.parse_args()
+	measurements = load_runs(args)
+	comparer = Comparer()
+
+	former = [[run.copy() for run in runs] for runs in measurements]
+	start = time.perf_counter()
+	for runs in former:
+		for run in runs:
+			dampen_sorted(comparer, run)
+	former_time = time.perf_counter() - start
+
+	batched = [[run.copy() for run in runs] for runs in measurements]
+	start = time.perf_counter()
+	for runs in batched:
+		comparer.hierarchical_dampen_extremes_reordering(runs)
+	batched_time = time.perf_counter() - start
+
+	# the dampening may reorder the runs, so the runs are compared as sorted values
+	mismatches = sum(
+		not np.array_equal(np.sort(batched_run), np.sort(former_run))
+		for former_runs, batched_runs in zip(former, batched)
+		for former_run, batched_run in zip(former_runs, batched_runs)
+	)
+
+	runs = sum(len(runs) for runs in measurements)
+	print(f"measurements: {len(measurements)}, runs: {runs}, mismatching runs: {mismatches}")
+	print(f"sorting:      {former_time:.3f} s")
+	print(f"partitioning: {batched_time:.3f} s ({former_time / batched_time:.1f}x)")
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from simulation.data import Data, FILTER_KEYS
+from simulation.fetcher import Fetcher
+
+MEASUREMENT_KEYS = [
+	"combination__machine_type__id",
+	"combination__configuration__id",
+	"combination__suite__id",
+	"combination__benchmark__id",
+	"version__platform_type__id",
+]
+
+# a path the stub never serves, every request to it is answered with a server error
+FAILING_PATH = "failing"
+
+
+class StubApi:
+	"""
+		A local stand-in of the GRAALVM_WEB api with generated filter items, combinations and measurements.
+		The first failures requests of every path are answered with 503, so the fetcher has to retry them.
+	"""
+	failures: int
+	filters: dict[str, list[dict]]
+	combinations: list[dict]
+	measurements: dict[str, list[dict]]
+	requests: dict[str, int]
+
+	def __init__(self, combination_count: int, measurement_count: int, failures: int):
+		self.failures = failures
+		self.combinations = [{"id": f"5-34-1-{i}-3"} for i in range(1, combination_count + 1)]
+		# the filter items are the ids the combinations are made of
+		parts = [combination['id'].split("-") for combination in self.combinations]
+		self.filters = {
+			key: [{"id": i} for i in sorted({int(part[k]) for part in parts})] for k, key in enumerate(FILTER_KEYS)
+		}
+		self.measurements = {
+			combination['id']: [
+				{
+					"id": f"{combination['id']}-{j}",
+					"version_id": j,
+					"path_to_directory": f"measurements/{combination['id'].replace('-', '/')}/{j}",
+					"datetime": f"2022-01-{1 + j % 28:02d}T10:00:{j % 60:02d}",
+					"commit_hash": f"{j:040x}",
+					"count": 30,
+				}
+				for j in range(measurement_count)
+			]
+			for combination in self.combinations
+		}
+		self.requests = {}
+		self.lock = threading.Lock()
+
+	def body(self, path: str) -> list | None:
+		"""
+		:return: the json of an api path, None if the path is unknown
+		"""
+		url = urlparse(path)
+		name = url.path.removeprefix("/api/")
+		if name in self.filters:
+			return self.filters[name]
+		if name == "combinations":
+			return self.combinations
+		if name == "measurements":
+			query = parse_qs(url.query)
+			return self.measurements.get("-".join(query[key][0] for key in MEASUREMENT_KEYS), [])
+		return None
+
+	def handler(self) -> type[BaseHTTPRequestHandler]:
+		api = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def log_message(self, *args):
+				pass
+
+			def do_GET(self):
+				with api.lock:
+					api.requests[self.path] = api.requests.get(self.path, 0) + 1
+					served = api.requests[self.path]
+
+				body = api.body(self.path)
+				if body is None or served <= api.failures:
+					self.send_response(503)
+					self.send_header("Content-Length", "0")
+					self.end_headers()
+					return
+
+				data = json.dumps(body).encode()
+				self.send_response(200)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(data)))
+				self.end_headers()
+				self.wfile.write(data)
+
+		return Handler
+
+
+def check_retries(api: StubApi, fetcher: Fetcher, retries: int) -> None:
+	paths = FILTER_KEYS + ["combinations"] + [
+		Fetcher.measurements_path(combination['id'].split("-")) for combination in api.combinations]
+
+	start = time.perf_counter()
+	responses = fetcher.get_many(paths)
+	duration = time.perf_counter() - start
+
+	assert all(response is not None and response.status_code == 200 for response in responses), \
+		"a request failed although the server errors were retried"
+	assert all(api.requests[f"/api/{path}"] == api.failures + 1 for path in paths), \
+		"a request was not retried exactly until it succeeded"
+	print(f"retries:   {len(paths)} paths, {api.failures} server errors each, all fetched in {duration:.2f} s")
+
+	start = time.perf_counter()
+	response = fetcher.get(FAILING_PATH)
+	duration = time.perf_counter() - start
+
+	assert response is None, "a request that always fails did not give up"
+	assert api.requests[f"/api/{FAILING_PATH}"] == retries + 1, "a failing request was not retried every time"
+	print(f"exhausted: {retries + 1} requests to a failing path, given up after {duration:.2f} s")
+
+
+def check_snapshot(api: StubApi, fetcher: Fetcher, directory: Path) -> None:
+	snapshot_path = directory / "snapshot.json.gz"
+	counts = Data.write_snapshot(fetcher, snapshot_path)
+	snapshot = Data.read_snapshot(snapshot_path)
+
+	assert snapshot == {"filters": api.filters, "combinations": api.combinations, "measurements": api.measurements}, \
+		"the snapshot differs from the api"
+
+	# the measurements selected from the snapshot are the ones selected from the api
+	datetime_dict = {"from": "2022-01-01T00:00:00", "to": "2022-12-31T00:00:00"}
+	filters = {key: ["all"] for key in FILTER_KEYS}
+	from_api = Data(datetime_dict, filters).measurements
+	from_snapshot = Data(datetime_dict, filters, snapshot_path).measurements
+
+	def ids(measurements: dict) -> dict[str, list[str]]:
+		return {combination_id: [x.id for x in items] for combination_id, items in measurements.items()}
+
+	assert len(from_api) == len(api.combinations), "the api did not select every combination"
+	assert ids(from_api) == ids(from_snapshot), "the snapshot selects other measurements than the api"
+	print(f"snapshot:  {counts} stored in {snapshot_path.stat().st_size} bytes, read back equal to the api")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Verifies the retries of the fetcher and the snapshot round trip against a local stub of the api")
+
+	parser.add_argument("-c", "--combinations", type=int, help="number of combinations served", default=20)
+	parser.add_argument("-m", "--measurements", type=int, help="number of measurements per combination", default=50)
+	parser.add_argument("-f", "--failures", type=int, help="server errors before every path is served", default=2)
+	parser.add_argument("-r", "--retries", type=int, help="number of retries of a failed request", default=3)
+	parser.add_argument("-t", "--threads", type=int, help="number of concurrent requests", default=8)
+
+	args = parser.parse_args()
+	assert args.failures <= args.retries, "the stub must not fail more often than the fetcher retries"
+
+	api = StubApi(args.combinations, args.measurements, args.failures)
+	server = ThreadingHTTPServer(("127.0.0.1", 0), api.handler())
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	host, port = server.server_address
+
+	with tempfile.TemporaryDirectory() as directory:
+		# Data connects through the environment and caches the fetched measurements under PHOENIX_HOME
+		os.environ["PHOENIX_HOME"] = directory
+		os.environ["GRAALVM_WEB"] = host
+		os.environ["GRAALVM_PORT"] = str(port)
+
+		check_retries(api, Fetcher(host, str(port), args.threads, args.retries), args.retries)
+
+		api.requests.clear()
+		check_snapshot(api, Fetcher(host, str(port), args.threads, args.retries), Path(directory))
+
+	server.shutdown()
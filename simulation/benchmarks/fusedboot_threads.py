@@ -0,0 +1,46 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+from simulation.methods.comparison.extensions import fusedboot as fb
+
+
+def throughput(arrays: list[np.ndarray], thread_count: int, calls: int, replicas: int) -> float:
+	"""
+	:return: the number of bootstrap calls per second with the given number of threads calling the kernel
+	"""
+	def worker() -> None:
+		for _ in range(calls):
+			fb.hierarchical_bootstrap_mean(arrays, len(arrays), 0, replicas)
+
+	threads = [threading.Thread(target=worker) for _ in range(thread_count)]
+
+	start = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	return thread_count * calls / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Measures the fusedboot throughput versus the number of threads")
+
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per measurement", default=30)
+	parser.add_argument("-i", "--iterations", type=int, help="number of iterations per run", default=1000)
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas per call", default=3333)
+	parser.add_argument("-c", "--calls", type=int, help="number of calls per thread", default=4)
+	parser.add_argument("-t", "--threads", type=int, nargs="+", help="thread counts to measure", default=[1, 2, 4, 8])
+
+	args = parser.parse_args()
+
+	generator = np.random.default_rng(0)
+	arrays = [generator.normal(1e6, 3e4, args.iterations) for _ in range(args.runs)]
+
+	base = None
+	for thread_count in args.threads:
+		calls_per_second = throughput(arrays, thread_count, args.calls, args.boots)
+		base = calls_per_second if base is None else base
+		print(f"threads: {thread_count:3d}  calls/s: {calls_per_second:8.2f}  speedup: {calls_per_second / base:5.2f}")
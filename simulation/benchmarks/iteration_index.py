@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from simulation.measurement import Measurement
+
+
+def get_iterations_former(measurement: Measurement) -> list[tuple[int, int]]:
+	"""
+	the former counting, parses every raw csv file completely
+	"""
+	iterations = []
+	for run_csv in measurement:
+		array = pd.read_csv(measurement.path_to_directory / f"raw_{run_csv}")
+		iterations.append((int(array.warmed.count()), int(array.warmed.sum())))
+	return iterations
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Verifies the iteration index against parsing the raw csv files and measures both")
+
+	parser.add_argument("-l", "--limit", type=int, help="the maximum number of recorded measurements", default=200)
+
+	args = parser.parse_args()
+	records = []
+	for combination_path in (Path() / os.getenv("PHOENIX_HOME") / "_cache/data").glob("*-*-*-*-*.json"):
+		with open(combination_path, "r") as combination_json:
+			records.extend(json.load(combination_json))
+	measurements = [Measurement(record) for record in records[:args.limit]]
+
+	start = time.perf_counter()
+	former = [get_iterations_former(measurement) for measurement in measurements]
+	former_time = time.perf_counter() - start
+
+	# the first access builds the index (or refreshes it), the later ones only read it
+	start = time.perf_counter()
+	built = [measurement.get_iterations() for measurement in measurements]
+	build_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	indexed = [measurement.get_iterations() for measurement in measurements]
+	indexed_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	warmed = [measurement.read_warmed() for measurement in measurements]
+	warmed_time = time.perf_counter() - start
+
+	assert former == built == indexed, "the iteration index disagrees with the raw csv files"
+	assert all(
+		len(run) == count[1] for runs, counts in zip(warmed, former) for run, count in zip(runs, counts)
+	), "the warmed iterations disagree with the warmed counts"
+
+	print(f"measurements: {len(measurements)}, runs: {sum(len(counts) for counts in former)}")
+	print(f"parsing the csv files: {former_time:.3f} s")
+	print(f"first access (index):  {build_time:.3f} s")
+	print(f"indexed:               {indexed_time:.3f} s ({former_time / indexed_time:.0f}x)")
+	print(f"warmed iterations:     {warmed_time:.3f} s, {np.sum([len(run) for runs in warmed for run in runs])} rows")
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+import numpy as np
+from simulation.methods.comparison.extensions import fusedboot as fb
+
+DTYPES = ["float64", "int64", "float32", "int32"]
+
+
+def iteration_times(generator: np.random.Generator, runs: int, iterations: int) -> list[np.ndarray]:
+	"""
+	:return: right-skewed integer iteration times in ns with a run-to-run offset
+	"""
+	return [
+		np.rint(1e6 * (1 + generator.normal(0, 0.01) + 0.05 * generator.lognormal(0, 1, iterations))).astype(np.int64)
+		for _ in range(runs)
+	]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Measures the bootstrap kernels on every code path supported by the CPU")
+
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per measurement", default=30)
+	parser.add_argument("-i", "--iterations", type=int, help="number of iterations per run", default=20000)
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas per call", default=1000)
+
+	args = parser.parse_args()
+	runs = iteration_times(np.random.default_rng(0), args.runs, args.iterations)
+	active = fb.kernel_path()
+
+	print(f"active code path: {active}")
+	print("dtype    path     replicas/s  speedup  max relative difference")
+	for dtype in DTYPES + ["normal"]:
+		arrays = [run.astype(np.float64 if dtype == "normal" else dtype) for run in runs]
+		reference = None
+		baseline_time = None
+
+		# the baseline (last) path first, the same seed draws the same indices on every path
+		for path in reversed(fb.kernel_paths()):
+			fb.set_kernel_path(path)
+			fb.init_random(1)
+
+			start = time.perf_counter()
+			replicates = fb.hierarchical_bootstrap_mean(arrays, args.runs, 0, args.boots, 1, dtype == "normal")
+			duration = time.perf_counter() - start
+
+			reference = replicates if reference is None else reference
+			baseline_time = duration if baseline_time is None else baseline_time
+			difference = np.max(np.abs(replicates - reference) / np.abs(reference))
+
+			print(f"{dtype:7s}  {path:7s}  {args.boots / duration:10.0f}  {baseline_time / duration:7.2f}  {difference:23.2e}")
+
+	fb.set_kernel_path(active)
@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+import numpy as np
+from simulation.benchmarks.dampening import load_runs
+from simulation.methods.comparison.comparer import Comparer
+from simulation.methods.dimension.mutation import Mutation, RUN_COUNTS
+
+
+def train_former(comparer: Comparer, original_version: list[np.ndarray], mutation_ratio: float, samples: int) -> dict:
+	"""
+	the former training, mutates a copy of every run and compares every sample from scratch
+	"""
+	means_of_means = np.mean([nums.mean() for nums in original_version])
+	mutated_version = [nums + (mutation_ratio * means_of_means) for nums in original_version]
+
+	thresholds = {}
+	for run in RUN_COUNTS:
+		key = Mutation.threshold_key(run, mutation_ratio)
+		thresholds[key] = []
+		for sample in range(samples):
+			random_originals = [random.choice(original_version) for _ in range(run)]
+			random_mutated = [random.choice(mutated_version) for _ in range(run)]
+			thresholds[key].append(comparer.compute_difference_one_per_rep(random_originals, random_mutated))
+
+	return thresholds
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Compares the shift-invariant mutation training with the former one")
+
+	parser.add_argument("-c", "--column", type=str, help="the column of the recorded measurements", default="iteration_time_ns")
+	parser.add_argument("--cleaned", action="store_true", help="use the cleaned column")
+	parser.add_argument("-l", "--limit", type=int, help="the maximum number of recorded measurements", default=5)
+	parser.add_argument(
+		"-n", "--synthetic", type=int, help="use the given number of synthetic measurements instead", default=0)
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per synthetic measurement", default=30)
+	parser.add_argument("-i", "--iterations", type=int, help="number of iterations per synthetic run", default=5000)
+	parser.add_argument("-s", "--samples", type=int, help="samples per run count", default=10)
+	parser.add_argument(
+		"-m", "--mutation-ratios", type=float, nargs="+", help="the mutation ratios", default=[0.01, 0.02, 0.05])
+
+	args = parser.parse_args()
+	measurements = load_runs(args)
+	mutation = Mutation(args.mutation_ratios, samples=args.samples)
+
+	former_time = 0.0
+	current_time = 0.0
+	former_p_values = {}
+	current_p_values = {}
+
+	for runs in measurements:
+		for ratio in args.mutation_ratios:
+			start = time.perf_counter()
+			for key, results in train_former(Comparer(boots=3333), [run.copy() for run in runs], ratio, args.samples).items():
+				former_p_values.setdefault(key, []).extend(result["p_value"] for result in results)
+			former_time += time.perf_counter() - start
+
+		# all ratios at once
+		start = time.perf_counter()
+		for key, results in mutation.train(Comparer(boots=3333), [run.copy() for run in runs]).items():
+			current_p_values.setdefault(key, []).extend(result["p_value"] for result in results)
+		current_time += time.perf_counter() - start
+
+	print(f"measurements: {len(measurements)}, ratios: {args.mutation_ratios}, samples: {args.samples}")
+	print(f"former:  {former_time:.2f} s")
+	print(f"current: {current_time:.2f} s ({former_time / current_time:.1f}x)")
+	print("key           former median p  current median p")
+	for key in former_p_values:
+		print(f"{key:12s}  {np.median(former_p_values[key]):16.4f}  {np.median(current_p_values[key]):16.4f}")
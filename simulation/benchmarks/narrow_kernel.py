@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+from simulation.methods.comparison.extensions import fusedboot as fb
+
+DTYPES = ["int64", "int32", "float64", "float32"]
+
+
+def iteration_times(generator: np.random.Generator, runs: int, iterations: int, magnitude: float) -> list[np.ndarray]:
+	"""
+	:return: right-skewed integer iteration times in ns around the given magnitude
+	"""
+	return [
+		np.rint(magnitude * (1 + generator.normal(0, 0.01) + 0.05 * generator.lognormal(0, 1, iterations))).astype(np.int64)
+		for _ in range(runs)
+	]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Measures the throughput and accuracy of the 32-bit bootstrap kernels against the 64-bit ones")
+
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per measurement", default=30)
+	parser.add_argument("-i", "--iterations", type=int, help="number of iterations per run", default=20000)
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas per call", default=1000)
+	parser.add_argument(
+		"-m", "--magnitudes", type=float, nargs="+", help="typical iteration times in ns", default=[1e4, 1e6, 1e8])
+
+	args = parser.parse_args()
+	generator = np.random.default_rng(0)
+
+	print("magnitude  dtype    MB   replicas/s  max relative error")
+	for magnitude in args.magnitudes:
+		runs = iteration_times(generator, args.runs, args.iterations, magnitude)
+		reference = None
+
+		for dtype in DTYPES:
+			if dtype == "int32" and max(run.max() for run in runs) > np.iinfo(np.int32).max:
+				print(f"{magnitude:9.0e}  {dtype:7s}  out of range")
+				continue
+
+			arrays = [run.astype(dtype) for run in runs]
+
+			# the same seed draws the same indices, so the replicates only differ by precision
+			fb.init_random(1)
+			start = time.perf_counter()
+			replicates = fb.hierarchical_bootstrap_mean(arrays, args.runs, 0, args.boots)
+			duration = time.perf_counter() - start
+
+			reference = replicates if reference is None else reference
+			error = np.max(np.abs(replicates - reference) / np.abs(reference))
+			size = sum(array.nbytes for array in arrays) / 2**20
+
+			print(f"{magnitude:9.0e}  {dtype:7s}  {size:4.0f}  {args.boots / duration:10.0f}  {error:18.2e}")
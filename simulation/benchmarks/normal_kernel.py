@@ -0,0 +1,51 @@
+import argparse
+import time
+
+import numpy as np
+from simulation.methods.comparison.comparer import Comparer
+
+
+def synthetic_runs(generator: np.random.Generator, runs: int, iterations: int, shift: float) -> list[np.ndarray]:
+	"""
+	:return: right-skewed runs with a run-to-run offset, similar to iteration times
+	"""
+	return [
+		1e6 * (1 + shift + generator.normal(0, 0.01)) + 3e4 * generator.lognormal(0, 1, iterations)
+		for _ in range(runs)
+	]
+
+
+def timed(fn) -> tuple[np.ndarray, float]:
+	start = time.perf_counter()
+	result = fn()
+	return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Compares the accuracy and speed of the normal approximation kernel with the exact kernel")
+
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per measurement", default=30)
+	parser.add_argument(
+		"-i", "--iterations", type=int, nargs="+", help="iteration counts per run", default=[100, 1000, 10000, 50000])
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas", default=3333)
+	parser.add_argument("-s", "--shift", type=float, help="relative shift of the new measurement", default=0.003)
+
+	args = parser.parse_args()
+	generator = np.random.default_rng(0)
+	comparer = Comparer()
+
+	print("iterations   exact s  normal s  speedup  std ratio  p exact  p normal")
+	for iterations in args.iterations:
+		old = synthetic_runs(generator, args.runs, iterations, 0)
+		new = synthetic_runs(generator, args.runs, iterations, args.shift)
+
+		exact, exact_time = timed(lambda: Comparer.hierarchical_bootstrap_mean_difference(
+			new, old, args.runs, args.runs, args.boots))
+		normal, normal_time = timed(lambda: Comparer.hierarchical_bootstrap_mean_difference(
+			new, old, args.runs, args.runs, args.boots, normal=True))
+
+		print(
+			f"{iterations:10d}  {exact_time:8.3f}  {normal_time:8.3f}  {exact_time / normal_time:7.1f}"
+			f"  {normal.std() / exact.std():9.4f}"
+			f"  {comparer.estimate_likelihood_normal(exact, 0):7.4f}  {comparer.estimate_likelihood_normal(normal, 0):8.4f}")
@@ -0,0 +1,58 @@
+import argparse
+import time
+
+import numpy as np
+from simulation.methods.comparison.extensions import numpyboot
+
+try:
+	from simulation.methods.comparison.extensions import fusedboot
+except ImportError:
+	fusedboot = None
+
+
+def synthetic_runs(generator: np.random.Generator, runs: int, iterations: int) -> list[np.ndarray]:
+	"""
+	:return: right-skewed runs with a run-to-run offset, similar to iteration times
+	"""
+	return [1e6 * (1 + generator.normal(0, 0.01)) + 3e4 * generator.lognormal(0, 1, iterations) for _ in range(runs)]
+
+
+def timed(module, arrays: list[np.ndarray], args: argparse.Namespace, normal: bool) -> tuple[np.ndarray, float]:
+	start = time.perf_counter()
+	replicates = module.hierarchical_bootstrap_mean(
+		arrays, len(arrays), 0, args.boots, 1, normal, args.memory_limit)
+	return replicates, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Compares the NumPy fallback of the bootstrap with the fusedboot extension")
+
+	parser.add_argument("-r", "--runs", type=int, help="number of runs per measurement", default=30)
+	parser.add_argument(
+		"-i", "--iterations", type=int, nargs="+", help="iteration counts per run", default=[100, 1000, 10000])
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas", default=1000)
+	parser.add_argument("-m", "--memory-limit", type=int, help="memory limit of the fallback in bytes", default=1_000_000_000)
+
+	args = parser.parse_args()
+	generator = np.random.default_rng(0)
+
+	if fusedboot is None:
+		print("fusedboot is not built, only the NumPy fallback is measured")
+	else:
+		print(f"fusedboot code path: {fusedboot.kernel_path()}")
+
+	print("iterations  mode    numpy/s  fusedboot/s    gap  std ratio")
+	for iterations in args.iterations:
+		arrays = synthetic_runs(generator, args.runs, iterations)
+
+		for mode in ["exact", "normal"]:
+			replicates, duration = timed(numpyboot, arrays, args, mode == "normal")
+			line = f"{iterations:10d}  {mode:6s}  {args.boots / duration:7.0f}"
+
+			if fusedboot is not None:
+				reference, reference_duration = timed(fusedboot, arrays, args, mode == "normal")
+				line += f"  {args.boots / reference_duration:11.0f}  {duration / reference_duration:5.1f}x"
+				line += f"  {replicates.std() / reference.std():9.3f}"
+
+			print(line)
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from simulation.measurement import Measurement
+from simulation.methods.comparison.comparer import Comparer
+
+
+def load_pairs(limit: int) -> list[tuple[Measurement, Measurement]]:
+	"""
+	:return: the pairs of consecutive measurements of every cached combination
+	"""
+	pairs = []
+	for combination_path in sorted((Path() / os.getenv("PHOENIX_HOME") / "_cache/data").glob("*-*-*-*-*.json")):
+		with open(combination_path, "r") as combination_json:
+			measurements = sorted(Measurement(record) for record in json.load(combination_json))
+		pairs.extend(zip(measurements[:-1], measurements[1:]))
+
+	return pairs[:limit]
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description="Reports how often the analytic screen disagrees with the full bootstrap on the recorded measurements")
+
+	parser.add_argument("-c", "--column", type=str, help="the column of the measurements", default="iteration_time_ns")
+	parser.add_argument("-b", "--boots", type=int, help="number of bootstrap replicas", default=33333)
+	parser.add_argument("-p", "--threshold", type=float, help="the p-value threshold", default=0.01)
+	parser.add_argument("-w", "--band", type=float, help="the ambiguity band around the threshold", default=0.005)
+	parser.add_argument("-l", "--limit", type=int, help="the maximum number of pairs", default=500)
+
+	args = parser.parse_args()
+	pairs = load_pairs(args.limit)
+
+	bootstrap = Comparer(boots=args.boots, p_value_threshold=args.threshold)
+	screen = Comparer(boots=args.boots, p_value_threshold=args.threshold, screen_band=args.band)
+
+	screened = 0
+	disagreements = 0
+	differences = []
+	bootstrap_time = 0.0
+	screen_time = 0.0
+
+	for old, new in pairs:
+		column_old = old.read_columns(args.column)
+		column_new = new.read_columns(args.column)
+
+		start = time.perf_counter()
+		expected = bootstrap.compute_difference_one_per_rep(
+			[data.copy() for data in column_old], [data.copy() for data in column_new])
+		bootstrap_time += time.perf_counter() - start
+
+		start = time.perf_counter()
+		result = screen.compute_difference_one_per_rep(column_old, column_new)
+		screen_time += time.perf_counter() - start
+
+		if result["screened"]:
+			screened += 1
+			differences.append(abs(result["p_value"] - expected["p_value"]))
+			if (result["p_value"] < args.threshold) != (expected["p_value"] < args.threshold):
+				disagreements += 1
+
+	print(f"pairs: {len(pairs)}, screened: {screened} ({100 * screened / max(1, len(pairs)):.1f}%)")
+	print(f"decisions differing from the bootstrap: {disagreements} ({100 * disagreements / max(1, screened):.2f}% of screened)")
+	if screened > 0:
+		print(f"p-value difference of screened pairs: mean {np.mean(differences):.2e}, max {np.max(differences):.2e}")
+	print(f"bootstrap: {bootstrap_time:.2f} s, with screen: {screen_time:.2f} s")
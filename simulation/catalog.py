@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from simulation.measurement import Measurement
+
+CATALOG_FIELDS = ["datetimes", "ids", "version_ids", "paths", "hashes", "counts"]
+
+
+class Catalog:
+	"""
+		The measurements of one combination as arrays sorted by the commit datetime, so that a datetime window
+		is a binary search instead of parsing and comparing every measurement.
+		The arrays are stored as <combination>.npz next to the cached <combination>.json in _cache/data,
+		with the mtime of the json they were built from, so that a refreshed json rebuilds the catalog.
+	"""
+	datetimes: np.ndarray
+	ids: np.ndarray
+	version_ids: np.ndarray
+	paths: np.ndarray
+	hashes: np.ndarray
+	counts: np.ndarray
+
+	def __init__(self, arrays: dict[str, np.ndarray]):
+		for field in CATALOG_FIELDS:
+			setattr(self, field, arrays[field])
+
+	def __len__(self) -> int:
+		return len(self.datetimes)
+
+	@staticmethod
+	def from_records(records: list[dict]) -> "Catalog":
+		"""
+		:param records: the measurements as returned by the api
+		:return: a catalog sorted by datetime, measurements with equal datetimes keep the order of the records
+		"""
+		datetimes = np.array([record['datetime'] for record in records], dtype="datetime64[s]")
+		order = np.argsort(datetimes, kind="stable")
+
+		return Catalog({
+			"datetimes": datetimes[order],
+			"ids": np.array([str(record['id']) for record in records], dtype=str)[order],
+			"version_ids": np.array([str(record['version_id']) for record in records], dtype=str)[order],
+			"paths": np.array([str(record['path_to_directory']) for record in records], dtype=str)[order],
+			"hashes": np.array([str(record['commit_hash']) for record in records], dtype=str)[order],
+			"counts": np.array([record['count'] for record in records], dtype=np.int64)[order],
+		})
+
+	@staticmethod
+	def load(path: Path, source_path: Path | None = None) -> "Catalog | None":
+		"""
+		:param source_path: the json the catalog was built from, if given
+		:return: the catalog, None if the source changed since the catalog was saved
+		"""
+		with np.load(path) as arrays:
+			if source_path is not None and source_path.exists():
+				if "source_mtime_ns" not in arrays or int(arrays["source_mtime_ns"]) != source_path.stat().st_mtime_ns:
+					return None
+			return Catalog({field: arrays[field] for field in CATALOG_FIELDS})
+
+	def save(self, path: Path, source_path: Path) -> None:
+		temporary_path = Path(f"{path}.tmp.npz")
+		np.savez(
+			temporary_path, source_mtime_ns=np.int64(source_path.stat().st_mtime_ns),
+			**{field: getattr(self, field) for field in CATALOG_FIELDS})
+		os.replace(temporary_path, path)
+
+	def window(self, from_datetime: np.datetime64, to_datetime: np.datetime64) -> slice:
+		"""
+		:return: the slice of the measurements with from_datetime <= datetime <= to_datetime
+		"""
+		start = np.searchsorted(self.datetimes, from_datetime, side="left")
+		end = np.searchsorted(self.datetimes, to_datetime, side="right")
+		return slice(int(start), int(end))
+
+	def measurements(self, from_datetime: np.datetime64, to_datetime: np.datetime64) -> list[Measurement]:
+		selected = self.window(from_datetime, to_datetime)
+
+		return [
+			Measurement({
+				"id": measurement_id,
+				"version_id": version_id,
+				"path_to_directory": path,
+				"datetime": commit_datetime,
+				"commit_hash": commit_hash,
+				"count": count,
+			})
+			for measurement_id, version_id, path, commit_datetime, commit_hash, count in zip(
+				self.ids[selected].tolist(),
+				self.version_ids[selected].tolist(),
+				self.paths[selected].tolist(),
+				self.datetimes[selected].tolist(),
+				self.hashes[selected].tolist(),
+				self.counts[selected].tolist(),
+			)
+		]
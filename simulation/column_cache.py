@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ColumnCache:
+	"""
+		A least recently used cache of the runs returned by Measurement.read_columns, bounded by a byte budget.
+		The comparer dampens the runs in place, so the cached runs are read-only and every hit hands out copies.
+		Prefixes of the runs (the first iterations) are cached on their own, or copied from the whole runs if cached.
+	"""
+	budget: int
+	size: int
+	hits: int
+	misses: int
+	evictions: int
+	entries: OrderedDict[tuple[str, str, bool, int], list[np.ndarray]]
+
+	def __init__(self, budget: int):
+		self.budget = budget
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.entries = OrderedDict()
+		self.lock = threading.Lock()
+
+	def get(self, measurement_id: str, column: str, cleaned: bool, iterations: int = 0) -> list[np.ndarray] | None:
+		"""
+		:param iterations: the number of first iterations of every run, 0 for all of them
+		"""
+		keys = [(measurement_id, column, cleaned, iterations)]
+		if iterations > 0:
+			keys.append((measurement_id, column, cleaned, 0))
+
+		with self.lock:
+			for key in keys:
+				arrays = self.entries.get(key)
+				if arrays is not None:
+					self.hits += 1
+					self.entries.move_to_end(key)
+					break
+			else:
+				self.misses += 1
+				return None
+
+		if iterations > 0:
+			return [array[:iterations].copy() for array in arrays]
+		return [array.copy() for array in arrays]
+
+	def put(
+			self, measurement_id: str, column: str, cleaned: bool, arrays: list[np.ndarray],
+			iterations: int = 0) -> list[np.ndarray]:
+		"""
+		:return: copies of the given runs, the caller can modify them without affecting the cache
+		"""
+		size = sum(array.nbytes for array in arrays)
+		if size > self.budget:
+			return [np.array(array) for array in arrays]
+
+		cached = [np.array(array) for array in arrays]
+		for array in cached:
+			array.flags.writeable = False
+
+		key = (measurement_id, column, cleaned, iterations)
+		with self.lock:
+			if key in self.entries:
+				self.size -= sum(array.nbytes for array in self.entries.pop(key))
+
+			while self.size + size > self.budget and len(self.entries) > 0:
+				_, evicted = self.entries.popitem(last=False)
+				self.size -= sum(array.nbytes for array in evicted)
+				self.evictions += 1
+
+			self.entries[key] = cached
+			self.size += size
+
+		return [array.copy() for array in cached]
+
+	def statistics(self) -> dict:
+		with self.lock:
+			return {
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+				"entries": len(self.entries),
+				"bytes": self.size,
+			}
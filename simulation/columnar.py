@@ -0,0 +1,136 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAR_DIRECTORY = "columnar"
+INDEX_FILE = "index.json"
+
+
+class ColumnarStore:
+	"""
+		A binary copy of the per-run column csv files of one measurement.
+		Every stored column (raw and _cleaned) is one .npy file holding the concatenation of all runs,
+		the index keeps the order of the runs, per column, the offsets of the runs in that file, and the size and mtime
+		of the csv files the store was converted from, so that a store older than its csv files is not used:
+		<path_to_directory>/columnar/index.json
+		<path_to_directory>/columnar/<column_name>.npy
+	"""
+	path: Path
+	runs: list[str]
+	offsets: dict[str, list[int]]
+	sources: dict[str, list[int]] | None
+
+	def __init__(self, path_to_directory: Path):
+		self.path = Path() / path_to_directory / COLUMNAR_DIRECTORY
+
+		with open(self.path / INDEX_FILE, "r") as index_json:
+			index = json.load(index_json)
+
+		self.runs = index['runs']
+		self.offsets = index['offsets']
+		# stores converted before the sources were recorded cannot be checked
+		self.sources = index.get('sources')
+
+	@staticmethod
+	def exists(path_to_directory: Path) -> bool:
+		return (Path() / path_to_directory / COLUMNAR_DIRECTORY / INDEX_FILE).exists()
+
+	def has_column(self, column_name: str) -> bool:
+		return column_name in self.offsets
+
+	def is_current(self) -> bool:
+		"""
+		:return: True if the runs and the size and mtime of every csv file are the ones the store was converted from
+		"""
+		if self.sources is None:
+			return False
+
+		files = {entry.name: entry for entry in os.scandir(self.path.parent) if entry.is_file()}
+		runs = sorted(name.replace("raw_", "") for name in files if name.startswith("raw_") and name.endswith(".csv"))
+		if runs != self.runs:
+			return False
+
+		for name, (size, mtime_ns) in self.sources.items():
+			if name not in files:
+				return False
+			stat = files[name].stat()
+			if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+				return False
+
+		return True
+
+	def column_path(self, column_name: str) -> Path:
+		return self.path / f"{column_name}.npy"
+
+	def lengths(self, column_name: str) -> list[int]:
+		"""
+		:return: the number of rows of every run of the column, without reading the column file
+		"""
+		return np.diff(self.offsets[column_name]).tolist()
+
+	def read(self, column_name: str) -> list[np.ndarray]:
+		"""
+		maps the column file copy-on-write, the returned runs are views, so they can be modified in place
+		(e.g. by dampening) without copying the whole column or touching the file on disk
+		:param column_name: the stored column name, e.g. iteration_time_ns_cleaned
+		:return: one array per run in the order of self.runs
+		"""
+		column = np.load(self.column_path(column_name), mmap_mode="c")
+		offsets = self.offsets[column_name]
+		return [column[offsets[i]:offsets[i + 1]] for i in range(len(self.runs))]
+
+	@staticmethod
+	def build(path_to_directory: Path, overwrite: bool = False) -> bool:
+		"""
+		converts the <column>_<run>.csv files of a measurement directory into a columnar store
+		:param path_to_directory: the measurement directory containing raw_<run>.csv files
+		:param overwrite: rebuild the store even if it already exists and its csv files did not change
+		:return: True if a store was written
+		"""
+		path_to_directory = Path() / path_to_directory
+		if ColumnarStore.exists(path_to_directory) and not overwrite and ColumnarStore(path_to_directory).is_current():
+			return False
+
+		runs = sorted(x.name.replace("raw_", "") for x in path_to_directory.glob('raw_*.csv'))
+		if len(runs) == 0:
+			return False
+
+		columns = {}
+		sources = {}
+		for run_index, run_csv in enumerate(runs):
+			for run_path in path_to_directory.glob(f"*_{run_csv}"):
+				if run_path.name.startswith("raw_"):
+					continue
+
+				stat = run_path.stat()
+				sources[run_path.name] = [stat.st_size, stat.st_mtime_ns]
+				for column_name, series in pd.read_csv(run_path).items():
+					columns.setdefault(column_name, {})[run_index] = series.to_numpy()
+
+		store_path = path_to_directory / COLUMNAR_DIRECTORY
+		os.makedirs(store_path, exist_ok=True)
+
+		offsets = {}
+		for column_name, arrays_per_run in columns.items():
+			# a column missing in any run cannot be served from the store, the csv files stay the source for it
+			if len(arrays_per_run) != len(runs):
+				continue
+
+			arrays = [arrays_per_run[i] for i in range(len(runs))]
+			offsets[column_name] = np.cumsum([0] + [len(array) for array in arrays]).tolist()
+
+			temporary_path = store_path / f"{column_name}.tmp.npy"
+			np.save(temporary_path, np.concatenate(arrays))
+			os.replace(temporary_path, store_path / f"{column_name}.npy")
+
+		# the index is written last, so a store is only visible once all of its columns are complete
+		temporary_path = store_path / f"{INDEX_FILE}.tmp"
+		with open(temporary_path, "w") as index_json:
+			json.dump({"runs": runs, "offsets": offsets, "sources": sources}, index_json)
+		os.replace(temporary_path, store_path / INDEX_FILE)
+
+		return True
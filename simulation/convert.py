@@ -0,0 +1,48 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from simulation.columnar import ColumnarStore
+from simulation.iteration_index import IterationIndex
+from simulation.logger import Logger
+
+
+def measurement_directories(source: Path) -> list[Path]:
+	return sorted({raw_csv.parent for raw_csv in source.rglob('raw_*.csv')})
+
+
+def convert(directory: Path, force: bool) -> bool:
+	"""
+	builds the columnar store and the iteration index of one measurement
+	:return: True if a store was written
+	"""
+	IterationIndex.load(directory, [x.name.replace("raw_", "") for x in directory.glob('raw_*.csv')])
+	return ColumnarStore.build(directory, force)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Converts the measurement csv files into columnar stores and indexes their iterations")
+
+	parser.add_argument(
+		"-s", "--source", type=str, help="The path to the measurements", default=None)
+	parser.add_argument("-t", "--threads", type=int, help="number of parallel threads", default=4)
+	parser.add_argument("-f", "--force", action="store_true", help="rebuild existing stores")
+
+	args = parser.parse_args()
+	logger = Logger(method_name="CONVERT")
+
+	if args.source is None:
+		if os.getenv("PHOENIX_HOME") is None:
+			logger.log_error("__main__", "Code 101: PHOENIX_HOME is not set. Run export PHOENIX_HOME=<path-to-phoenix-repo>.")
+			exit(101)
+		source = Path() / os.getenv("PHOENIX_HOME") / "source"
+	else:
+		source = Path() / args.source
+
+	directories = measurement_directories(source)
+	logger.log_info(f"converting {len(directories)} measurements in {source}")
+
+	with ThreadPoolExecutor(max_workers=args.threads) as executor:
+		converted = sum(executor.map(lambda directory: convert(directory, args.force), directories))
+
+	logger.log_info(f"converted {converted} measurements, {len(directories) - converted} skipped")
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+DAMPENED_DIRECTORY = "_cache/dampened"
+
+
+class DampenedRuns(list):
+	"""
+		The dampened runs of one measurement, with the mean and variance of every run as computed
+		from the runs, so that the comparer does not recompute them.
+	"""
+	means: np.ndarray
+	variances: np.ndarray
+
+	def __init__(self, runs: list[np.ndarray], means: np.ndarray, variances: np.ndarray):
+		super().__init__(runs)
+		self.means = means
+		self.variances = variances
+
+
+class DampenedStore:
+	"""
+		A persistent cache of the dampened runs of the measurements, so that the comparisons skip reading and
+		trimming the columns. Per measurement, column and trim parameters, the dampened runs are sorted and stored
+		as one .npy file holding the concatenation of all runs (mapped copy-on-write when read), next to an index
+		with the offsets, means and variances of the runs and the size and mtime of the source files:
+		$PHOENIX_HOME/_cache/dampened/<measurement id>/<column>-<dtype>-<trim share>-<trim limit>.npy
+		$PHOENIX_HOME/_cache/dampened/<measurement id>/<column>-<dtype>-<trim share>-<trim limit>.json
+		The runs cut to their first iterations are stored separately, with -<iterations> appended to the name.
+		An entry whose source files changed since it was stored is never used, it is rebuilt instead.
+	"""
+	path: Path
+	hits: int
+	misses: int
+	stale: int
+
+	def __init__(self, path: Path | None = None):
+		self.path = Path() / os.getenv("PHOENIX_HOME") / DAMPENED_DIRECTORY if path is None else path
+		self.hits = 0
+		self.misses = 0
+		self.stale = 0
+		self.lock = threading.Lock()
+
+	def entry_path(
+			self, measurement_id: str, column: str, dtype: np.dtype | None, trim_share: float, trim_limit: float,
+			iterations: int = 0) -> Path:
+		dtype_name = "native" if dtype is None else np.dtype(dtype).name
+		name = f"{column}-{dtype_name}-{trim_share:g}-{trim_limit:g}"
+		if iterations > 0:
+			name += f"-{iterations}"
+		return self.path / measurement_id / name
+
+	@staticmethod
+	def file(entry_path: Path, suffix: str) -> Path:
+		# the trim parameters have dots, so the suffix is appended instead of replacing the last "suffix" of the name
+		return entry_path.with_name(entry_path.name + suffix)
+
+	@staticmethod
+	def signature(source_files: list[Path]) -> list[list] | None:
+		"""
+		:return: the name, size and mtime of every source file, None if any of them is missing
+		"""
+		signature = []
+		for source_file in source_files:
+			if not source_file.exists():
+				return None
+			stat = source_file.stat()
+			signature.append([str(source_file), stat.st_size, stat.st_mtime_ns])
+		return signature
+
+	def get(self, entry_path: Path, signature: list[list] | None) -> DampenedRuns | None:
+		"""
+		:return: the stored runs if the entry exists and its source files did not change, None otherwise
+		"""
+		index_path = DampenedStore.file(entry_path, ".json")
+		if signature is None or not index_path.exists():
+			with self.lock:
+				self.misses += 1
+			return None
+
+		with open(index_path, "r") as index_json:
+			index = json.load(index_json)
+
+		if index['signature'] != signature:
+			with self.lock:
+				self.stale += 1
+			return None
+
+		column = np.load(DampenedStore.file(entry_path, ".npy"), mmap_mode="c")
+		offsets = index['offsets']
+		with self.lock:
+			self.hits += 1
+
+		return DampenedRuns(
+			[column[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)],
+			np.array(index['means']), np.array(index['variances']))
+
+	def put(self, entry_path: Path, signature: list[list] | None, runs: list[np.ndarray]) -> DampenedRuns:
+		"""
+		sorts the dampened runs in place and stores them, unless the source files are unknown
+		:return: the runs with their means and variances
+		"""
+		for run in runs:
+			run.sort()
+
+		dampened = DampenedRuns(
+			runs,
+			np.array([run.mean(dtype=np.float64) for run in runs]),
+			np.array([run.var(dtype=np.float64) for run in runs]))
+
+		if signature is None or len(runs) == 0:
+			return dampened
+
+		os.makedirs(entry_path.parent, exist_ok=True)
+
+		# the index is written last, so an entry is only visible once its runs are complete
+		temporary_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+		np.save(DampenedStore.file(temporary_path, ".npy"), np.concatenate(runs))
+		os.replace(DampenedStore.file(temporary_path, ".npy"), DampenedStore.file(entry_path, ".npy"))
+
+		with open(DampenedStore.file(temporary_path, ".json"), "w") as index_json:
+			json.dump({
+				"signature": signature,
+				"offsets": np.cumsum([0] + [len(run) for run in runs]).tolist(),
+				"means": dampened.means.tolist(),
+				"variances": dampened.variances.tolist(),
+			}, index_json)
+		os.replace(DampenedStore.file(temporary_path, ".json"), DampenedStore.file(entry_path, ".json"))
+
+		return dampened
+
+	def statistics(self) -> str:
+		with self.lock:
+			return f"{self.hits} hits, {self.misses} misses, {self.stale} stale"
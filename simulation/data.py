@@ -1,43 +1,68 @@
-import datetime
+import gzip
 import json
 import os
-import requests
+import numpy as np
+from simulation.catalog import Catalog
+from simulation.fetcher import Fetcher
 from simulation.logger import Logger
 from simulation.measurement import Measurement
 from pathlib import Path
 
+FILTER_KEYS = ["machine_types", "configurations", "suites", "benchmarks", "platform_types"]
+
 
 class Data(Logger):
 	cache_path: Path
-	graalvm_web: str
-	graalvm_port: str
+	fetcher: Fetcher | None
+	snapshot: dict | None
 	measurements: dict[str, list[Measurement]]
 	"""
 		The measurements structure has the following shape
 		combination <machine_type, configuration, benchmark, platform_type> : list[measurement]
-		a sorted list of the measurements
+		a list of the measurements sorted by their commit datetime
 	"""
-	def __init__(self, datetime_dict: dict, filters: dict) -> None:
+	def __init__(self, datetime_dict: dict, filters: dict, snapshot_path: Path | None = None, fetch_threads: int = 8) -> None:
 		super().__init__(method_name="Simulation/Data")
 
-		self.graalvm_web = os.getenv("GRAALVM_WEB")
-		if self.graalvm_web is None:
-			self.log_error("__init__", "Code 201: GRAALVM_WEB ip is not set, use export GRAALVM_WEB=\"x.x.x.x\"")
+		self.cache_path = Path() / os.getenv("PHOENIX_HOME") / "_cache/data/"
+		os.makedirs(self.cache_path, exist_ok=True)
+
+		self.fetcher = None
+		self.snapshot = None
+
+		if snapshot_path is not None:
+			if not Path(snapshot_path).exists():
+				self.log_error("__init__", f"Code 207: the snapshot {snapshot_path} does not exist")
+				exit(207)
+			self.snapshot = self.read_snapshot(snapshot_path)
+		else:
+			self.fetcher = self.connect(fetch_threads)
+
+		combinations = self.parse_filters(filters)
+		self.measurements = self.get_measurements(combinations, datetime_dict)
+
+	def connect(self, fetch_threads: int) -> Fetcher:
+		graalvm_web = os.getenv("GRAALVM_WEB")
+		if graalvm_web is None:
+			self.log_error("connect", "Code 201: GRAALVM_WEB ip is not set, use export GRAALVM_WEB=\"x.x.x.x\"")
 			exit(201)
 
-		self.graalvm_port = os.getenv("GRAALVM_PORT")
-		if self.graalvm_port is None:
-			self.log_error("__init__", "Code 202: GRAALVM_PORT ip is not set, use export GRAALVM_WEB=6677")
+		graalvm_port = os.getenv("GRAALVM_PORT")
+		if graalvm_port is None:
+			self.log_error("connect", "Code 202: GRAALVM_PORT ip is not set, use export GRAALVM_WEB=6677")
 			exit(202)
 
-		self.cache_path = Path() / os.getenv("PHOENIX_HOME") / "_cache/data/"
-		os.makedirs(self.cache_path, exist_ok=True)
+		return Fetcher(graalvm_web, graalvm_port, fetch_threads)
 
-		combinations = self.parse_filters(filters)
-		self.measurements = {
-			key: sorted(value)
-			for key, value in self.get_measurements(combinations, datetime_dict).items()
-		}
+	def fetch_all(self, paths: list[str], unit: str, code: int) -> list:
+		responses = self.fetcher.get_many(paths)
+		for path, response in zip(paths, responses):
+			if response is None or response.status_code != 200:
+				status = "no response" if response is None else response.status_code
+				self.log_error(unit, f"Code {code}: the url {self.fetcher.url(path)} returned {status}")
+				exit(code)
+
+		return [json.loads(response.text) for response in responses]
 
 	def parse_filters(self, filters: dict) -> list:
 		"""
@@ -45,17 +70,17 @@ class Data(Logger):
 		:param filters: a set of filters for machine type, configuration, suite, benchmark, platform_type
 		:return: a set of unique url based filters [(?machine_type=5&...)]
 		"""
-		base_url = f"http://{self.graalvm_web}:{self.graalvm_port}/api"
 		filtered_meta = {}
 
-		for key, value_list in filters.items():
-			key_url = f"{base_url}/{key}"
-			response = requests.get(key_url, headers={"Accept": "application/json"})
-			if response.status_code != 200:
-				self.log_error("parse_filters", f"Code 203: the url {key_url} returned {response.status_code}")
-				exit(203)
+		keys = list(filters.keys())
+		if self.snapshot is not None:
+			items_per_key = [self.snapshot['filters'][key] for key in keys]
+			possible_combinations = self.snapshot['combinations']
+		else:
+			*items_per_key, possible_combinations = self.fetch_all(keys + ["combinations"], "parse_filters", 203)
 
-			items = [str(item['id']) for item in json.loads(response.text)]
+		for key, value_list, key_items in zip(keys, filters.values(), items_per_key):
+			items = [str(item['id']) for item in key_items]
 
 			filtered_meta[key] = []
 			for value in value_list:
@@ -70,12 +95,6 @@ class Data(Logger):
 						self.log_warn("parse_filters", f"Warning: ignoring unknown id {value} in the filter of {key}")
 						continue
 
-		response = requests.get(f"{base_url}/combinations", headers={"Accept": "application/json"})
-		if response.status_code != 200:
-			self.log_error("parse_filters", f"Code 203: the url {f"{base_url}/combinations"} returned {response.status_code}")
-			exit(203)
-
-		possible_combinations = json.loads(response.text)
 		filtered_combinations = []
 		for possible_combination in possible_combinations:
 			m, c, s, b, p = possible_combination['id'].split('-')
@@ -92,6 +111,7 @@ class Data(Logger):
 	def get_measurements(self, combinations: list, datetime_filter: dict) -> dict[str, list[Measurement]]:
 		"""
 		uses a cache system to reduce calls to the api, since they are not going to be updated at any time
+		the combinations missing in the cache are fetched concurrently
 		:param combinations: list of possible combinations
 		:return: map each combination with a list of possible measurements
 		"""
@@ -100,42 +120,93 @@ class Data(Logger):
 			self.log_error("get_measurements", f"Code 205: the path {self.cache_path} does not exist")
 			exit(205)
 
-		from_datetime = datetime.datetime.strptime(datetime_filter['from'], "%Y-%m-%dT%H:%M:%S")
-		to_datetime = datetime.datetime.strptime(datetime_filter['to'], "%Y-%m-%dT%H:%M:%S")
+		from_datetime = np.datetime64(datetime_filter['from'], "s")
+		to_datetime = np.datetime64(datetime_filter['to'], "s")
 
-		measurements = {}
+		catalogs = {}
+		records_per_combination = {}
+		missing = []
 
 		for combination in combinations:
-			m, c, s, b, p = combination
 			combination_id = "-".join([str(x) for x in combination])
-			combination_file = f"{combination_id}.json"
-
-			combination_path = self.cache_path / combination_file
-			if combination_path.exists():
+			combination_path = self.cache_path / f"{combination_id}.json"
+			catalog_path = self.cache_path / f"{combination_id}.npz"
+
+			catalog = None
+			if self.snapshot is None and catalog_path.exists():
+				# a catalog older than its json is rebuilt from the json
+				catalog = Catalog.load(catalog_path, combination_path)
+
+			if self.snapshot is not None:
+				records_per_combination[combination_id] = self.snapshot['measurements'].get(combination_id, [])
+			elif catalog is not None:
+				catalogs[combination_id] = catalog
+			elif combination_path.exists():
 				with open(combination_path, "r") as combination_json:
-					measurements_json = json.load(combination_json)
+					records_per_combination[combination_id] = json.load(combination_json)
 			else:
-				url = (
-					f"http://{self.graalvm_web}:{self.graalvm_port}/api/measurements" 
-					"?" f"combination__machine_type__id={m}&"
-					f"combination__configuration__id={c}&"
-					f"combination__suite__id={s}&"
-					f"combination__benchmark__id={b}&"
-					f"version__platform_type__id={p}"
-				)
-				response = requests.get(url, headers={"Accept": "application/json"})
-				if response.status_code != 200:
-					self.log_error("get_measurements", f"Code 205: the url {url} returned {response.status_code}")
-					exit(206)
-
-				measurements_json = json.loads(response.text)
-				with open(combination_path, "w") as combination_json:
+				missing.append(combination)
+
+		if len(missing) > 0:
+			self.log_info(f"fetching the measurements of {len(missing)} combinations")
+			fetched = self.fetch_all([Fetcher.measurements_path(x) for x in missing], "get_measurements", 206)
+
+			for combination, measurements_json in zip(missing, fetched):
+				combination_id = "-".join([str(x) for x in combination])
+				with open(self.cache_path / f"{combination_id}.json", "w") as combination_json:
 					json.dump(measurements_json, combination_json, indent=4)
+				records_per_combination[combination_id] = measurements_json
+
+		for combination_id, records in records_per_combination.items():
+			catalogs[combination_id] = Catalog.from_records(records)
+			if self.snapshot is None:
+				catalogs[combination_id].save(
+					self.cache_path / f"{combination_id}.npz", self.cache_path / f"{combination_id}.json")
+
+		return {
+			combination_id: catalogs[combination_id].measurements(from_datetime, to_datetime)
+			for combination_id in ["-".join([str(x) for x in combination]) for combination in combinations]
+		}
+
+	@staticmethod
+	def read_snapshot(snapshot_path: Path) -> dict:
+		with gzip.open(snapshot_path, "rt") as snapshot_json:
+			return json.load(snapshot_json)
 
-			measurements[combination_id] = []
+	@staticmethod
+	def write_snapshot(fetcher: Fetcher, snapshot_path: Path) -> dict:
+		"""
+		downloads the filter items, all combinations and all of their measurements into one compressed file
+		:return: the number of items per part of the snapshot
+		"""
+		responses = fetcher.get_many(FILTER_KEYS + ["combinations"])
+		for path, response in zip(FILTER_KEYS + ["combinations"], responses):
+			if response is None or response.status_code != 200:
+				raise ConnectionError(f"the url {fetcher.url(path)} did not respond with the data")
 
-			for measurement in measurements_json:
-				if from_datetime <= datetime.datetime.strptime(measurement['datetime'], "%Y-%m-%dT%H:%M:%S") <= to_datetime:
-					measurements[combination_id].append(Measurement(measurement))
+		*items_per_key, combinations = [json.loads(response.text) for response in responses]
+		combination_ids = [combination['id'] for combination in combinations]
 
-		return measurements
+		paths = [Fetcher.measurements_path(combination_id.split('-')) for combination_id in combination_ids]
+		measurements = {}
+		for combination_id, path, response in zip(combination_ids, paths, fetcher.get_many(paths)):
+			if response is None or response.status_code != 200:
+				raise ConnectionError(f"the url {fetcher.url(path)} did not respond with the data")
+			measurements[combination_id] = json.loads(response.text)
+
+		snapshot = {
+			"filters": dict(zip(FILTER_KEYS, items_per_key)),
+			"combinations": combinations,
+			"measurements": measurements,
+		}
+
+		temporary_path = Path(f"{snapshot_path}.tmp")
+		with gzip.open(temporary_path, "wt") as snapshot_json:
+			json.dump(snapshot, snapshot_json)
+		os.replace(temporary_path, snapshot_path)
+
+		return {
+			"filters": sum(len(items) for items in items_per_key),
+			"combinations": len(combinations),
+			"measurements": sum(len(items) for items in measurements.values()),
+		}
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from simulation.logger import Logger
+
+
+class Fetcher(Logger):
+	"""
+		Fetches json documents from the GRAALVM_WEB api over one pooled session,
+		with a bounded number of concurrent requests and retries of failed connections and server errors.
+	"""
+	base_url: str
+	thread_count: int
+	session: requests.Session
+
+	def __init__(self, graalvm_web: str, graalvm_port: str, thread_count: int = 8, retries: int = 3):
+		super().__init__(method_name="Simulation/Fetcher")
+		self.base_url = f"http://{graalvm_web}:{graalvm_port}/api"
+		self.thread_count = thread_count
+
+		retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=thread_count, max_retries=retry)
+
+		self.session = requests.Session()
+		self.session.headers.update({"Accept": "application/json"})
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+
+	def url(self, path: str) -> str:
+		return f"{self.base_url}/{path}"
+
+	@staticmethod
+	def measurements_path(combination: tuple) -> str:
+		m, c, s, b, p = combination
+		return (
+			"measurements"
+			"?" f"combination__machine_type__id={m}&"
+			f"combination__configuration__id={c}&"
+			f"combination__suite__id={s}&"
+			f"combination__benchmark__id={b}&"
+			f"version__platform_type__id={p}"
+		)
+
+	def get(self, path: str) -> requests.Response | None:
+		try:
+			return self.session.get(self.url(path))
+		except requests.RequestException as e:
+			self.log_warn("get", f"request to {self.url(path)} failed: {e}")
+			return None
+
+	def get_many(self, paths: list[str]) -> list[requests.Response | None]:
+		"""
+		:param paths: api paths relative to the base url, e.g. measurements?...
+		:return: the responses in the order of the paths, None for requests that failed after all retries
+		"""
+		if len(paths) == 0:
+			return []
+
+		with ThreadPoolExecutor(max_workers=min(self.thread_count, len(paths))) as executor:
+			return list(executor.map(self.get, paths))
@@ -0,0 +1,21 @@
+import argparse
+import os
+from pathlib import Path
+from simulation.methods.analyze.store import ComparisonStore
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Imports the json comparison cache into the comparison store")
+	parser.add_argument(
+		"-s", "--source", type=str, help="The path to the json cache, PHOENIX_HOME/_cache/comparisons by default",
+		default=None)
+
+	args = parser.parse_args()
+	store = ComparisonStore.shared()
+
+	if args.source is None:
+		source = Path() / os.getenv("PHOENIX_HOME") / "_cache/comparisons"
+	else:
+		source = Path() / args.source
+
+	store.log_info(f"imported {store.import_json(source)} results from {source} into {store.path}")
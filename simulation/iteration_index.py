@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+ITERATION_INDEX_FILE = "iteration_index.json"
+# indexes of another version are built again
+INDEX_VERSION = 1
+
+
+class IterationIndex:
+	"""
+		The iteration counts of the raw_<run>.csv files of one measurement, so that they are not parsed to count them.
+		Per run, the index keeps the number of iterations, the number of warmed iterations, the byte range from the
+		first to the last warmed row (to read the warmed iterations with one seek) and the size and mtime of the file:
+		<path_to_directory>/iteration_index.json
+		A run whose file changed since it was indexed is indexed again. The counts follow pandas: iterations whose
+		warmed flag is missing are not counted. In a measurement tree that cannot be written (read-only or shared),
+		the index is kept in memory for the process instead.
+	"""
+	path: Path
+	runs: dict[str, dict]
+
+	# the runs of the indexes that could not be saved, by index path
+	unsaved: dict[Path, dict[str, dict]] = {}
+
+	def __init__(self, path_to_directory: Path):
+		self.path = Path() / path_to_directory / ITERATION_INDEX_FILE
+		self.runs = dict(IterationIndex.unsaved.get(self.path, {}))
+
+		if len(self.runs) == 0 and self.path.is_file():
+			with open(self.path, "r") as index_json:
+				index = json.load(index_json)
+			if index.get('version') == INDEX_VERSION:
+				self.runs = index['runs']
+
+	@staticmethod
+	def load(path_to_directory: Path, run_csvs: list[str]) -> "IterationIndex":
+		"""
+		reads the index of the measurement, indexes the runs that are missing or changed and saves it if needed
+		:param run_csvs: the runs, e.g. 0.csv for raw_0.csv
+		"""
+		index = IterationIndex(path_to_directory)
+
+		changed = False
+		for run_csv in run_csvs:
+			run_path = Path() / path_to_directory / f"raw_{run_csv}"
+			stat = run_path.stat()
+			entry = index.runs.get(run_csv)
+			if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+				index.runs[run_csv] = IterationIndex.index_run(run_path)
+				changed = True
+
+		if changed:
+			index.save()
+		return index
+
+	@staticmethod
+	def index_run(run_path: Path) -> dict:
+		"""
+		:return: the entry of one raw csv file, the warmed range is None if the file has no warmed rows
+		"""
+		stat = run_path.stat()
+		data = run_path.read_bytes()
+		flags = pd.read_csv(io.BytesIO(data), usecols=["warmed"])['warmed']
+		warmed = flags.eq(True).to_numpy()
+
+		# the rows start after the header line, a trailing newline does not start a row
+		line_starts = np.concatenate(([0], np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1))
+		if line_starts[-1] == len(data):
+			line_starts = line_starts[:-1]
+		row_starts = np.append(line_starts[1:], len(data))
+
+		warmed_rows = np.flatnonzero(warmed)
+		warmed_range = None
+		if len(warmed_rows) > 0 and len(row_starts) == len(warmed) + 1:
+			warmed_range = [int(row_starts[warmed_rows[0]]), int(row_starts[warmed_rows[-1] + 1])]
+
+		return {
+			"size": stat.st_size,
+			"mtime_ns": stat.st_mtime_ns,
+			"iterations": int(flags.count()),
+			"warmed": int(warmed.sum()),
+			"warmed_range": warmed_range,
+		}
+
+	def save(self) -> None:
+		temporary_path = self.path.with_name(f"{ITERATION_INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+		try:
+			with open(temporary_path, "w") as index_json:
+				json.dump({"version": INDEX_VERSION, "runs": self.runs}, index_json)
+			os.replace(temporary_path, self.path)
+		except OSError:
+			IterationIndex.unsaved[self.path] = dict(self.runs)
+			if temporary_path.exists():
+				temporary_path.unlink()
+
+	def counts(self, run_csvs: list[str]) -> list[tuple[int, int]]:
+		"""
+		:return: the number of iterations and of warmed iterations of every run
+		"""
+		return [(self.runs[run_csv]['iterations'], self.runs[run_csv]['warmed']) for run_csv in run_csvs]
+
+	def read_warmed(self, run_path: Path, run_csv: str, column: str) -> np.ndarray:
+		"""
+		reads the column of the warmed iterations of a run, seeking to the warmed rows of the raw csv file
+		"""
+		entry = self.runs[run_csv]
+		if entry['warmed_range'] is None:
+			if entry['warmed'] > 0:
+				array = pd.read_csv(run_path, usecols=[column, "warmed"])
+				return array[column].to_numpy()[array['warmed'].eq(True).to_numpy()]
+			return pd.read_csv(run_path, usecols=[column], nrows=0)[column].to_numpy()
+
+		begin, end = entry['warmed_range']
+		with open(run_path, "rb") as run_file:
+			header = run_file.readline()
+			run_file.seek(begin)
+			rows = run_file.read(end - begin)
+
+		# unwarmed rows between the first and the last warmed row are dropped
+		array = pd.read_csv(io.BytesIO(header + rows), usecols=[column, "warmed"])
+		return array[column].to_numpy()[array['warmed'].eq(True).to_numpy()]
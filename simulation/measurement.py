@@ -1,45 +1,78 @@
 import pandas as pd
+from simulation.column_cache import ColumnCache
+from simulation.columnar import ColumnarStore, INDEX_FILE
+from simulation.iteration_index import IterationIndex
 from simulation.logger import Logger
 from pathlib import Path
 from datetime import datetime
 import numpy as np
 
 
+logger = Logger(method_name="Measurement")
+
+# the directories whose columnar store was found older than its csv files, logged once
+_stale_stores: set[Path] = set()
+
+
 # error codes: 3xx
-class Measurement(Logger):
+class Measurement:
+	"""
+		A lightweight record of one measurement, tens of thousands of them are created at startup,
+		so it has no per-instance logger and the run files are only listed when first needed.
+	"""
+	__slots__ = ("id", "version_id", "path_to_directory", "commit_datetime", "commit_hash", "count", "_items")
+
 	id: str
 	version_id: str
 	path_to_directory: Path
 	commit_datetime: datetime
 	commit_hash: str
 	count: int
+	column_cache: ColumnCache | None = None
+	# narrower dtype of the read columns (e.g. float32 or int32) to halve the memory traffic, None keeps 64 bits
+	column_dtype: np.dtype | None = None
 
 	def __init__(self, data: dict):
-		super().__init__(method_name="Measurement")
-
 		self.id = data['id']
 		self.version_id = str(data['version_id'])
 		self.path_to_directory = Path() / data['path_to_directory']
-		self.commit_datetime = datetime.strptime(data['datetime'], "%Y-%m-%dT%H:%M:%S")
+		if isinstance(data['datetime'], datetime):
+			self.commit_datetime = data['datetime']
+		else:
+			self.commit_datetime = datetime.strptime(data['datetime'], "%Y-%m-%dT%H:%M:%S")
 		self.commit_hash = data['commit_hash']
 		self.count = data['count']
-		self.items = [x.name.replace("raw_", "") for x in  self.path_to_directory.rglob('*raw*.csv')]
+		self._items = None
+
+	@property
+	def items(self) -> list[str]:
+		# sorted like the runs of the columnar store, so that both read the runs in the same order
+		if self._items is None:
+			self._items = sorted(x.name.replace("raw_", "") for x in self.path_to_directory.rglob('*raw*.csv'))
+		return self._items
 
 	def __iter__(self):
-		# The iterator object is just the class itself
-		self._index = 0
-		return self
-
-	def __next__(self):
-		# Stop iteration when the index exceeds the length of the list
-		if self._index < len(self.items):
-			result = self.items[self._index]
-			self._index += 1
-			return result
-		else:
-			raise StopIteration
+		return iter(self.items)
 
-	def read_columns(self, column: str, cleaned: bool = True) -> list[np.array]:
+	def read_columns(self, column: str, cleaned: bool = True, iterations: int = 0) -> list[np.array]:
+		"""
+		:param iterations: read only the first iterations of every run, 0 reads all of them
+		"""
+		if Measurement.column_cache is None:
+			return self.read_columns_from_disk(column, cleaned, iterations)
+
+		np_arrays = Measurement.column_cache.get(self.id, column, cleaned, iterations)
+		if np_arrays is None:
+			np_arrays = Measurement.column_cache.put(
+				self.id, column, cleaned, self.read_columns_from_disk(column, cleaned, iterations), iterations)
+
+		return np_arrays
+
+	def read_columns_from_disk(self, column: str, cleaned: bool = True, iterations: int = 0) -> list[np.array]:
+		"""
+		the first iterations are views of the mapped columnar store, which reads only their pages,
+		or the first rows of the csv files
+		"""
 		np_arrays = []
 
 		if cleaned:
@@ -47,17 +80,110 @@ class Measurement(Logger):
 		else:
 			column_name = column
 
+		store = self.columnar_store(column_name)
+		if store is not None:
+			if iterations > 0:
+				return [Measurement.narrow(array[:iterations]) for array in store.read(column_name)]
+			return [Measurement.narrow(array) for array in store.read(column_name)]
+
 		for run_csv in self:
 			run_path = self.path_to_directory / f"{column}_{run_csv}"
 			if not run_path.exists():
-				self.log_error(unit="read_columns", msg=f"File {run_path} does not exist on the system")
+				logger.log_error(unit="read_columns", msg=f"File {run_path} does not exist on the system")
 				raise FileNotFoundError
 
-			array = pd.read_csv(run_path)[column_name].to_numpy()
-			np_arrays.append(array)
+			array = pd.read_csv(
+				run_path, usecols=[column_name], nrows=iterations if iterations > 0 else None)[column_name].to_numpy()
+			np_arrays.append(Measurement.narrow(array))
 
 		return np_arrays
 
+	def columnar_store(self, column_name: str) -> ColumnarStore | None:
+		"""
+		:return: the columnar store of the measurement if it has the column and its csv files did not change since
+		the conversion, None if the column is read from the csv files
+		"""
+		if not ColumnarStore.exists(self.path_to_directory):
+			return None
+
+		store = ColumnarStore(self.path_to_directory)
+		if not store.has_column(column_name):
+			return None
+
+		if not store.is_current():
+			if self.path_to_directory not in _stale_stores:
+				_stale_stores.add(self.path_to_directory)
+				logger.log_error(
+					unit="columnar_store",
+					msg=f"the columnar store of {self.path_to_directory} does not match its csv files, "
+					f"the csv files are read instead, convert the measurement again")
+			return None
+
+		return store
+
+	def iteration_counts(self, column: str, cleaned: bool = True) -> list[int]:
+		"""
+		the number of iterations of every run without reading the column, exact from the columnar store
+		or estimated from the size of the column csv files
+		"""
+		column_name = column + "_cleaned" if cleaned else column
+
+		store = self.columnar_store(column_name)
+		if store is not None:
+			return store.lengths(column_name)
+
+		return [Measurement.estimate_rows(self.path_to_directory / f"{column}_{run_csv}") for run_csv in self]
+
+	def source_files(self, column: str, cleaned: bool = True) -> list[Path]:
+		"""
+		the files read_columns_from_disk reads the column from, the columnar store or the column csv files
+		"""
+		column_name = column + "_cleaned" if cleaned else column
+
+		store = self.columnar_store(column_name)
+		if store is not None:
+			return [store.path / INDEX_FILE, store.column_path(column_name)]
+
+		return [self.path_to_directory / f"{column}_{run_csv}" for run_csv in self]
+
+	@staticmethod
+	def estimate_rows(csv_path: Path, sample_size: int = 65536) -> int:
+		"""
+		:return: the number of data rows of a csv file, extrapolated from the line length of its beginning
+		"""
+		if not csv_path.exists():
+			return 0
+
+		size = csv_path.stat().st_size
+		with open(csv_path, "rb") as csv_file:
+			sample = csv_file.read(sample_size)
+
+		lines = sample.count(b"\n")
+		if len(sample) == size or lines == 0:
+			return max(0, lines - 1)
+
+		# the header line is not a data row
+		return max(0, round(size * lines / len(sample)) - 1)
+
+	@staticmethod
+	def narrow(array: np.ndarray) -> np.ndarray:
+		"""
+		converts a run to the column dtype, integer runs are only narrowed to an integer dtype if all values fit
+		:return: the converted run, or the run itself if it cannot be narrowed without loss
+		"""
+		dtype = Measurement.column_dtype
+		if dtype is None or array.dtype == dtype:
+			return array
+
+		if np.issubdtype(dtype, np.integer):
+			if not np.issubdtype(array.dtype, np.integer):
+				return array
+			limits = np.iinfo(dtype)
+			if len(array) > 0 and (array.min() < limits.min or array.max() > limits.max):
+				return array
+
+		return array.astype(dtype)
+
 	def __gt__(self, other):
 		return self.commit_datetime > other.commit_datetime
 
@@ -68,15 +194,26 @@ class Measurement(Logger):
 		return f"{self.id} -> {self.commit_datetime}"
 
 	def get_iterations(self) -> list[[int, int]]:
-		iterations = []
-
+		"""
+		the number of iterations and of warmed iterations of every run, from the iteration index of the measurement
+		(built on first access, see IterationIndex)
+		"""
+		return self.iteration_index().counts(self.items)
+
+	def read_warmed(self, column: str = "iteration_time_ns") -> list[np.array]:
+		"""
+		the column of the warmed iterations of every run, read from the warmed rows of the raw csv files
+		"""
+		index = self.iteration_index()
+		return [
+			Measurement.narrow(index.read_warmed(self.path_to_directory / f"raw_{run_csv}", run_csv, column))
+			for run_csv in self]
+
+	def iteration_index(self) -> IterationIndex:
 		for run_csv in self:
 			run_path = self.path_to_directory / f"raw_{run_csv}"
 			if not run_path.exists():
-				self.log_error(unit="read_columns", msg=f"File {run_path} does not exist on the system")
+				logger.log_error(unit="read_columns", msg=f"File {run_path} does not exist on the system")
 				raise FileNotFoundError
 
-			array = pd.read_csv(run_path)
-			iterations.append((int(array.warmed.count()), int(array.warmed.sum())))
-
-		return iterations
+		return IterationIndex.load(self.path_to_directory, self.items)
@@ -1,26 +1,37 @@
-import json
-import os
 from simulation.logger import Logger
-from pathlib import Path
 from simulation.measurement import Measurement
+from simulation.methods.analyze.store import ComparisonStore
 
 
 class AnalyzeBase(Logger):
-	cache_path: Path
+	store: ComparisonStore
+	# analyzers that implement analyze_batch get all pairs of a combination at once
+	supports_batch: bool = False
 
 	def __init__(self, method_name: str):
 		super().__init__(method_name=method_name)
-		self.cache_path = Path() / os.getenv("PHOENIX_HOME") / "_cache/comparisons"
+		self.store = ComparisonStore.shared()
 
 	def analyze(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str, run_size: dict) -> dict:
 		raise NotImplemented
 
-	def check_ground_truth(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str) -> [dict, Path]:
-		directory = self.cache_path / key.replace("-", "/")
-		os.makedirs(directory, exist_ok=True)
-		file_path = directory / f"{old_ms.version_id}-{new_ms.version_id}-{column}.json"
-		if file_path.exists():
-			with open(file_path, "r", encoding="utf-8-sig") as json_file:
-				return json.load(json_file), file_path
-		else:
-			return {}, file_path
+	def analyze_batch(self, key: str, pairs: list[tuple[Measurement, Measurement, dict]], column: str) -> list[dict]:
+		"""
+		:param pairs: the pairs of old and new measurements with their run sizes
+		:return: the results in the order of the pairs, the same as calling analyze for each pair
+		"""
+		raise NotImplemented
+
+	def estimate_bytes(self, pairs: list[tuple[Measurement, Measurement]], column: str) -> int:
+		"""
+		:param pairs: the pairs of old and new measurements of a combination
+		:return: the estimated peak bytes of analyzing the pairs, 0 for analyzers that do not compare measurements
+		"""
+		return 0
+
+	def check_ground_truth(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str) -> dict:
+		return self.store.get(key, old_ms.version_id, new_ms.version_id, column)
+
+	def save_ground_truth(
+			self, key: str, old_ms: Measurement, new_ms: Measurement, column: str, run_key: str, result: dict) -> None:
+		self.store.put(key, old_ms.version_id, new_ms.version_id, column, run_key, result)
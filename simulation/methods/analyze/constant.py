@@ -1,27 +1,63 @@
-import json
-
 from simulation.measurement import Measurement
 from simulation.methods.analyze.base import AnalyzeBase
-from simulation.methods.comparison.comparer import Comparer
+from simulation.methods.comparison.comparer import Comparer, BATCH_PAIRS
 
 
 class Constant(AnalyzeBase):
-	def __init__(self):
+	comparer_kwargs: dict
+	supports_batch = True
+
+	def __init__(self, **comparer_kwargs):
+		"""
+		:param comparer_kwargs: passed to the comparer, e.g. adaptive_block to draw the replicates adaptively
+		"""
 		super().__init__(method_name="Analyze/Constant")
+		self.comparer_kwargs = {"boots": 33333, **comparer_kwargs}
 
 	def analyze(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str, run_size: dict) -> dict:
 		run_key = f"{run_size["old_run_count"]}-{run_size["new_run_count"]}-{run_size["iterations_count"]}"
 
-		ground_truth, path = self.check_ground_truth(key, old_ms, new_ms, column)
+		ground_truth = self.check_ground_truth(key, old_ms, new_ms, column)
 
-		if ground_truth != {}:
-			if run_key in ground_truth:
-				return ground_truth[run_key]
+		if run_key in ground_truth:
+			return ground_truth[run_key]
 
-		comparer = Comparer(run_size=run_size, boots=33333)
+		comparer = Comparer(run_size=run_size, **self.comparer_kwargs)
 		new_result = comparer.compare(old_ms, new_ms, column)
 
-		with open(path, "w") as json_file:
-			json.dump({run_key: new_result, **ground_truth}, json_file, indent=4)
+		self.save_ground_truth(key, old_ms, new_ms, column, run_key, new_result)
 
 		return new_result
+
+	def estimate_bytes(self, pairs: list[tuple[Measurement, Measurement]], column: str) -> int:
+		# the pairs are compared together in windows (see analyze_batch and Comparer.compare_batch)
+		comparer = Comparer(**self.comparer_kwargs)
+		required = 0
+		for begin in range(0, len(pairs), BATCH_PAIRS):
+			window = pairs[begin:begin + BATCH_PAIRS]
+			measurements = list({measurement.id: measurement for pair in window for measurement in pair}.values())
+			required = max(required, comparer.estimate_bytes(measurements, column, len(window)))
+		return required
+
+	def analyze_batch(self, key: str, pairs: list[tuple[Measurement, Measurement, dict]], column: str) -> list[dict]:
+		results = []
+		missing = []
+		for index, (old_ms, new_ms, run_size) in enumerate(pairs):
+			run_key = f"{run_size["old_run_count"]}-{run_size["new_run_count"]}-{run_size["iterations_count"]}"
+			ground_truth = self.check_ground_truth(key, old_ms, new_ms, column)
+
+			results.append(ground_truth.get(run_key))
+			if run_key not in ground_truth:
+				missing.append((index, run_key))
+
+		# the pairs missing in the store are compared together
+		if len(missing) > 0:
+			comparer = Comparer(**self.comparer_kwargs)
+			new_results = comparer.compare_batch([pairs[index] for index, _ in missing], column)
+
+			for (index, run_key), new_result in zip(missing, new_results):
+				old_ms, new_ms, _ = pairs[index]
+				self.save_ground_truth(key, old_ms, new_ms, column, run_key, new_result)
+				results[index] = new_result
+
+		return results
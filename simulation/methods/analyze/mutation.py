@@ -1,56 +1,54 @@
-import json
 from simulation.methods.analyze.base import AnalyzeBase
 from simulation.measurement import Measurement
 from simulation.methods.comparison.comparer import Comparer
+from simulation.methods.dimension import mutation
 
 
 class Mutation(AnalyzeBase):
 	threshold_selection: str
-
-	def __init__(self, threshold_selection):
+	mutation_ratio: float
+	comparer_kwargs: dict
+
+	def __init__(self, threshold_selection, mutation_ratio: float = 0.01, **comparer_kwargs):
+		"""
+		:param mutation_ratio: the mutation ratio of the thresholds to use, one of the ratios the dimension trained
+		:param comparer_kwargs: passed to the comparer, e.g. adaptive_block to draw the replicates adaptively
+		"""
 		super().__init__(method_name="Analyze/Mutation")
 		self.threshold_selection = threshold_selection
+		self.mutation_ratio = mutation_ratio
+		self.comparer_kwargs = {"boots": 33333, **comparer_kwargs}
+
+	def estimate_bytes(self, pairs: list[tuple[Measurement, Measurement]], column: str) -> int:
+		# the pairs are compared one by one, at most for the six run counts of the thresholds in one pass
+		comparer = Comparer(**self.comparer_kwargs)
+		return max((comparer.estimate_bytes([old_ms, new_ms], column, 6) for old_ms, new_ms in pairs), default=0)
 
 	def analyze(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str, run_size: dict) -> dict:
 		run_key = f"{run_size["old_run_count"]}-{run_size["new_run_count"]}-{run_size["iterations_count"]}"
 
-		ground_truth, path = self.check_ground_truth(key, old_ms, new_ms, column)
-
-		if ground_truth == {}:
-			comparer = Comparer(run_size=run_size, boots=33333)
-			ground_truth_result = comparer.compare(old_ms, new_ms, column)
+		ground_truth = self.check_ground_truth(key, old_ms, new_ms, column)
 
-			with open(path, "w") as json_file:
-				json.dump({run_key: ground_truth_result}, json_file, indent=4)
+		if run_key in ground_truth:
+			ground_truth_result = ground_truth[run_key]
 		else:
-			if run_key in ground_truth:
-				ground_truth_result = ground_truth[run_key]
-			else:
-				comparer = Comparer(run_size=run_size, boots=33333)
-				ground_truth_result = comparer.compare(old_ms, new_ms, column)
-				with open(path, "w") as json_file:
-					json.dump({run_key: ground_truth_result, **ground_truth}, json_file, indent=4)
+			comparer = Comparer(run_size=run_size, **self.comparer_kwargs)
+			ground_truth_result = comparer.compare(old_ms, new_ms, column)
+			self.save_ground_truth(key, old_ms, new_ms, column, run_key, ground_truth_result)
 
 		if "thresholds" in run_size and run_size["thresholds"] is not None:
+			# all missing run counts in one pass, the data is read and dampened once
+			missing = [run for run in range(5, 31, 5) if f"{run}-{run}-max" not in ground_truth]
+			if len(missing) > 0:
+				comparer = Comparer(**self.comparer_kwargs)
+				for run, result in comparer.compare_run_counts(old_ms, new_ms, column, missing).items():
+					ground_truth[f"{run}-{run}-max"] = result
+					self.save_ground_truth(key, old_ms, new_ms, column, f"{run}-{run}-max", result)
+
 			for run in range(5, 31, 5):
+				result = ground_truth[f"{run}-{run}-max"]
 
-				new_run_key = f"{run}-{run}-max"
-				if new_run_key in ground_truth:
-					result = ground_truth[new_run_key]
-				else:
-					new_run_size = {
-						"old_run_count": run,
-						"new_run_count": run,
-						"iterations_count": "max"
-					}
-					comparer = Comparer(run_size=new_run_size, boots=33333)
-					result = comparer.compare(old_ms, new_ms, column)
-					ground_truth[new_run_key] = result
-
-					with open(path, "w") as json_file:
-						json.dump(ground_truth, json_file, indent=4)
-
-				threshold_key = f"{run}-{run}-max-1"
+				threshold_key = mutation.Mutation.threshold_key(run, self.mutation_ratio)
 				threshold = run_size["thresholds"][threshold_key][self.threshold_selection]
 
 				if result['p_value'] > threshold:
@@ -1,6 +1,67 @@
+import numpy as np
+from scipy import stats
+
+from simulation.measurement import Measurement
 from simulation.methods.analyze.base import AnalyzeBase
+from simulation.methods.comparison.comparer import Comparer
 
 
 class Peass(AnalyzeBase):
-	def __init__(self):
+	comparer_kwargs: dict
+
+	def __init__(self, **comparer_kwargs):
+		"""
+		:param comparer_kwargs: passed to the comparer that reads and dampens the runs, e.g. bootstrap_diff_trim_share
+		"""
 		super().__init__(method_name="Analyze/Peass")
+		self.comparer_kwargs = comparer_kwargs
+
+	def estimate_bytes(self, pairs: list[tuple[Measurement, Measurement]], column: str) -> int:
+		# the pairs are compared one by one, without replicates
+		comparer = Comparer(**self.comparer_kwargs)
+		return max((comparer.estimate_bytes([old_ms, new_ms], column, 0) for old_ms, new_ms in pairs), default=0)
+
+	def analyze(self, key: str, old_ms: Measurement, new_ms: Measurement, column: str, run_size: dict) -> dict:
+		"""
+		compares the means of the first runs of both measurements with Welch's t-test, like Peass compares the means
+		of its VM runs, the runs are cut to the first iterations of the run size
+		the t-test is one-sided in the direction of the difference, like the p-values of the comparer
+		"""
+		run_key = f"peass-{run_size["old_run_count"]}-{run_size["new_run_count"]}-{run_size["iterations_count"]}"
+
+		ground_truth = self.check_ground_truth(key, old_ms, new_ms, column)
+
+		if run_key in ground_truth:
+			return ground_truth[run_key]
+
+		comparer = Comparer(run_size=run_size, **self.comparer_kwargs)
+		iterations = Comparer.resolve_iterations_count(run_size)
+		column_data_old = comparer.read_dampened(old_ms, column, iterations)
+		column_data_new = comparer.read_dampened(new_ms, column, iterations)
+
+		run_count_old = Comparer.resolve_run_count(run_size, "old_run_count", column_data_old)
+		run_count_new = Comparer.resolve_run_count(run_size, "new_run_count", column_data_new)
+		means_old = Comparer.run_means(column_data_old)[:run_count_old]
+		means_new = Comparer.run_means(column_data_new)[:run_count_new]
+
+		difference = means_new.mean() - means_old.mean()
+		p_value = 1.0
+		if len(means_old) >= 2 and len(means_new) >= 2:
+			alternative = "greater" if difference >= 0 else "less"
+			p_value = stats.ttest_ind(means_new, means_old, equal_var=False, alternative=alternative).pvalue
+			# without any variance, the t-test is undefined and the means either differ or not
+			if np.isnan(p_value):
+				p_value = 1.0 if difference == 0 else 0.0
+
+		new_result = {
+			"measurement_old_count": len(means_old),
+			"measurement_new_count": len(means_new),
+			"p_value": float(p_value),
+			"relative_change": difference / means_old.mean(),
+			"replicates": 0,
+			"screened": False,
+		}
+
+		self.save_ground_truth(key, old_ms, new_ms, column, run_key, new_result)
+
+		return new_result
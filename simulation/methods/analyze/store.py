@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from simulation.logger import Logger
+
+
+class ComparisonStore(Logger):
+	"""
+		The cached comparison results of all analyzers in one SQLite database (_cache/comparisons.sqlite) in WAL mode,
+		so concurrent threads and processes read without blocking each other and writes are single transactions.
+		A result is identified by <combination key, old version, new version, column, run key>.
+		Inserts are buffered and written in batches, the results of a whole combination can be preloaded into memory.
+	"""
+	path: Path
+	pid: int
+	batch_size: int
+	pending: list[tuple]
+	preloaded: dict[tuple[str, str], dict[tuple[str, str], dict[str, dict]]]
+
+	_shared = None
+	_shared_lock = threading.Lock()
+
+	def __init__(self, path: Path, batch_size: int = 256):
+		super().__init__(method_name="Analyze/ComparisonStore")
+		self.path = path
+		self.pid = os.getpid()
+		self.batch_size = batch_size
+		self.pending = []
+		self.preloaded = {}
+		self.lock = threading.RLock()
+		self.local = threading.local()
+
+		os.makedirs(self.path.parent, exist_ok=True)
+		connection = self.connection()
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute(
+			"CREATE TABLE IF NOT EXISTS comparisons ("
+			"key TEXT NOT NULL, old_version TEXT NOT NULL, new_version TEXT NOT NULL, "
+			"column_name TEXT NOT NULL, run_key TEXT NOT NULL, result TEXT NOT NULL, "
+			"PRIMARY KEY (key, old_version, new_version, column_name, run_key)) WITHOUT ROWID")
+		connection.commit()
+
+	@staticmethod
+	def shared() -> "ComparisonStore":
+		"""
+		:return: the store of this process in $PHOENIX_HOME/_cache/comparisons.sqlite
+		"""
+		with ComparisonStore._shared_lock:
+			if ComparisonStore._shared is None or ComparisonStore._shared.pid != os.getpid():
+				ComparisonStore._shared = ComparisonStore(
+					Path() / os.getenv("PHOENIX_HOME") / "_cache/comparisons.sqlite")
+			return ComparisonStore._shared
+
+	def connection(self) -> sqlite3.Connection:
+		# one connection per thread and process, sqlite connections must not be shared across either
+		if getattr(self.local, "pid", None) != os.getpid():
+			self.local.connection = sqlite3.connect(self.path, timeout=60)
+			self.local.connection.execute("PRAGMA synchronous=NORMAL")
+			self.local.pid = os.getpid()
+		return self.local.connection
+
+	def get(self, key: str, old_version: str, new_version: str, column: str) -> dict[str, dict]:
+		"""
+		:return: the stored results of the pair by run key, empty if none were stored
+		"""
+		with self.lock:
+			if (key, column) in self.preloaded:
+				return dict(self.preloaded[(key, column)].get((old_version, new_version), {}))
+
+			results = {
+				run_key: json.loads(result)
+				for _key, _old, _new, _column, run_key, result in self.pending
+				if (_key, _old, _new, _column) == (key, old_version, new_version, column)
+			}
+
+		rows = self.connection().execute(
+			"SELECT run_key, result FROM comparisons "
+			"WHERE key = ? AND old_version = ? AND new_version = ? AND column_name = ?",
+			(key, old_version, new_version, column)).fetchall()
+
+		return {**{run_key: json.loads(result) for run_key, result in rows}, **results}
+
+	def put(self, key: str, old_version: str, new_version: str, column: str, run_key: str, result: dict) -> None:
+		with self.lock:
+			self.pending.append((key, old_version, new_version, column, run_key, json.dumps(result)))
+			if (key, column) in self.preloaded:
+				self.preloaded[(key, column)].setdefault((old_version, new_version), {})[run_key] = result
+
+			if len(self.pending) >= self.batch_size:
+				self.flush()
+
+	def flush(self) -> None:
+		with self.lock:
+			if len(self.pending) == 0:
+				return
+
+			connection = self.connection()
+			with connection:
+				connection.executemany("INSERT OR REPLACE INTO comparisons VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+			self.pending = []
+
+	def preload(self, key: str, column: str) -> int:
+		"""
+		reads all stored results of a combination and column at once, later lookups are served from memory
+		:return: the number of loaded results
+		"""
+		self.flush()
+		rows = self.connection().execute(
+			"SELECT old_version, new_version, run_key, result FROM comparisons WHERE key = ? AND column_name = ?",
+			(key, column)).fetchall()
+
+		loaded = {}
+		for old_version, new_version, run_key, result in rows:
+			loaded.setdefault((old_version, new_version), {})[run_key] = json.loads(result)
+
+		with self.lock:
+			self.preloaded[(key, column)] = loaded
+		return len(rows)
+
+	def release(self, key: str, column: str) -> None:
+		self.flush()
+		with self.lock:
+			self.preloaded.pop((key, column), None)
+
+	def import_json(self, comparisons_path: Path) -> int:
+		"""
+		imports the per-pair json files of the former cache, _cache/comparisons/<m>/<c>/<s>/<b>/<p>/<old>-<new>-<column>.json
+		:return: the number of imported results
+		"""
+		imported = 0
+		for json_path in comparisons_path.rglob("*.json"):
+			key = "-".join(json_path.parent.relative_to(comparisons_path).parts)
+			old_version, new_version, column = json_path.stem.split("-", 2)
+
+			try:
+				with open(json_path, "r", encoding="utf-8-sig") as json_file:
+					results = json.load(json_file)
+			except json.JSONDecodeError:
+				self.log_warn("import_json", f"skipping the unreadable file {json_path}")
+				continue
+
+			for run_key, result in results.items():
+				self.put(key, old_version, new_version, column, run_key, result)
+				imported += 1
+
+		self.flush()
+		return imported
@@ -1,21 +1,36 @@
 import numpy as np
 from scipy import stats
-from simulation.methods.comparison.extensions import fusedboot as fb
+try:
+    from simulation.methods.comparison.extensions import fusedboot as fb
+except ImportError:
+    # Without the compiled extension, the bootstrap runs in NumPy (slower, same results up to the draws).
+    from simulation.methods.comparison.extensions import numpyboot as fb
+from simulation.dampened_store import DampenedRuns, DampenedStore
 from simulation.measurement import Measurement
 
 MIN_RUN_COUNT = 5
 MAX_RUN_COUNT = 31
+BOOTSTRAP_MEMORY_LIMIT = 1_000_000_000
+# pairs compared together by compare_batch, the data of at most their measurements is held at the same time
+BATCH_PAIRS = 8
 
 
 class Comparer:
     run_size: dict
+    # persistent cache of the dampened runs, None reads and dampens the columns for every comparison
+    dampened_store: DampenedStore | None = None
 
     def __init__(
             self, run_size: dict = {}, boots: int = 3333,
             p_value_threshold: float = 0.01,
             bootstrap_diff_trim_share: float = 0.05,
             bootstrap_diff_trim_limit: float = 0.1,
-            bootstrap_memory_limit: int = 1_000_000_000) -> None:
+            bootstrap_memory_limit: int = BOOTSTRAP_MEMORY_LIMIT,
+            bootstrap_threads: int = 1,
+            bootstrap_normal: bool = False,
+            adaptive_block: int = 0,
+            adaptive_confidence: float = 3.0,
+            screen_band: float = 0.0) -> None:
 
         self.run_size = run_size
         self.boots = boots
@@ -24,6 +39,17 @@ class Comparer:
         self.bootstrap_diff_trim_share = bootstrap_diff_trim_share
         self.bootstrap_diff_trim_limit = bootstrap_diff_trim_limit
         self.bootstrap_memory_limit = bootstrap_memory_limit
+        self.bootstrap_threads = bootstrap_threads
+
+        # With the normal approximation, the resampled mean of each drawn run is a normal draw (faster, approximate).
+        self.bootstrap_normal = bootstrap_normal
+
+        # With adaptive blocks, the replicates are drawn in blocks until the p-value is settled, boots is the cap.
+        self.adaptive_block = adaptive_block
+        self.adaptive_confidence = adaptive_confidence
+
+        # With a screen band, pairs whose analytic p-value is farther than the band from the threshold skip the bootstrap.
+        self.screen_band = screen_band
 
         self.log_warning = self.log_error = self.log_info = print
 
@@ -53,85 +79,222 @@ class Comparer:
 
         return p
 
+    @staticmethod
+    def hierarchical_mean_variance(data_list, run_count: int) -> float:
+        """Closed-form variance of the hierarchical bootstrap mean over `run_count` drawn runs.
+
+        Each drawn run contributes the variance of the run means (between runs) and on average
+        the variance of its resampled mean (within runs), averaging the drawn runs divides both by their count.
+        """
+
+        if isinstance(data_list, DampenedRuns):
+            variances = data_list.variances
+        else:
+            variances = np.array([data.var(dtype=np.float64) for data in data_list])
+
+        between = Comparer.run_means(data_list).var()
+        within = (variances / np.array([len(data) for data in data_list])).mean()
+        return (between + within) / run_count
+
+    def screen_p_value(self, column_data_old, column_data_new, run_count_old: int, run_count_new: int) -> float | None:
+        """Estimate the p-value of the difference of hierarchical means in closed form.
+
+        Returns None when screening is disabled or the estimate lies inside the ambiguity band around the threshold.
+        """
+
+        if self.screen_band <= 0 or ((run_count_old < MIN_RUN_COUNT) and (run_count_new < MIN_RUN_COUNT)):
+            return None
+
+        difference = Comparer.mean_one_per_rep(column_data_new) - Comparer.mean_one_per_rep(column_data_old)
+        variance = (
+            Comparer.hierarchical_mean_variance(column_data_old, run_count_old) +
+            Comparer.hierarchical_mean_variance(column_data_new, run_count_new))
+
+        if variance == 0:
+            p_value = 1.0 if difference == 0 else 0.0
+        else:
+            p_value = stats.norm.sf(abs(difference) / np.sqrt(variance))
+
+        if abs(p_value - self.p_value_threshold) <= self.screen_band:
+            return None
+        return p_value
+
+    def is_p_value_settled(self, data: np.array) -> bool:
+        """Decide whether the normal approximation p-value of the replicates is settled relative to the threshold.
+
+        The Monte Carlo standard error of the p-value follows from the standard errors of the replicate
+        mean and standard deviation, se(p) = pdf(z) * sqrt((1 + z^2 / 2) / replicates) with z = |mean| / std.
+        """
+
+        std = data.std()
+        if std == 0:
+            return True
+
+        z = abs(data.mean()) / std
+        p_value = stats.norm.sf(z)
+        standard_error = stats.norm.pdf(z) * np.sqrt((1 + z * z / 2) / len(data))
+
+        return abs(p_value - self.p_value_threshold) > self.adaptive_confidence * standard_error
+
+    def replicate_adaptively(self, replicator, data_one, data_two, count_one, count_two):
+        """Draw replicates in blocks of `adaptive_block` until the p-value is settled or `boots` replicates are drawn."""
+
+        blocks = []
+        drawn = 0
+        while drawn < self.boots:
+            block = replicator(
+                data_one, data_two, count_one, count_two,
+                min(self.adaptive_block, self.boots - drawn),
+                self.bootstrap_threads, self.bootstrap_normal, self.bootstrap_memory_limit)
+            if block is None:
+                return None
+
+            blocks.append(block)
+            drawn += len(block)
+            if self.is_p_value_settled(np.concatenate(blocks)):
+                break
+
+        return np.concatenate(blocks)
+
     def hierarchical_dampen_extremes_reordering(self, data_list):
-        for data in data_list:
+        # Runs of equal length are dampened together as the rows of one batch.
+        indices_per_length = {}
+        for index, data in enumerate(data_list):
+            indices_per_length.setdefault(len(data), []).append(index)
+
+        for length, indices in indices_per_length.items():
+            batch = np.stack([data_list[index] for index in indices])
             try:
-                self.dampen_extremes_reordering(data)
+                self.dampen_extremes_batch(batch)
             except ValueError as e:
-                self.log_error(f"something happened with {len(data)}, {e}")
+                self.log_error(f"something happened with {length}, {e}")
+                continue
+
+            for index, row in zip(indices, batch):
+                data_list[index][:] = row
 
     def dampen_extremes_reordering(self, numbers: np.ndarray) -> None:
-        """Replaces extreme sequence values by nearest remaining element in place with possible reordering.
+        """Replaces extreme sequence values by nearest remaining element in place with possible reordering."""
+
+        self.dampen_extremes_batch(numbers[np.newaxis, :])
+
+    def dampen_extremes_batch(self, batch: np.ndarray) -> None:
+        """Replaces extreme values in each row of a batch of equally long sequences in place with possible reordering.
 
-        This implementation is roughly five times faster than dampening extremes without reordering.
+        Only the extremes are put in place by partitioning, each row ends up with
+        the same values as when dampening it after a full sort.
         """
 
         # See how many items to replace. Return if none.
 
-        count = len(numbers)
+        row_count, count = batch.shape
         replace = int(count * self.bootstrap_diff_trim_share)
-        if replace == 0:
+        if replace == 0 or row_count == 0:
             return
 
-        # Locate the given share of values most distant from median.
-        # The distance is measured additively to avoid issues with straddling zero.
+        # Partition the rows around the lower median, then the lower and upper halves around the extremes
+        # and sort just the extremes. Single partitions of shrinking halves are much faster than one
+        # partition around several indices. With shares so large that the extremes reach the median,
+        # sort the whole rows instead.
+
+        rows = np.arange(row_count)
+        middle = (count - 1) // 2
+
+        if replace >= middle:
+            batch.sort(axis=1)
+            median_lo = batch[:, middle]
+            median_hi = batch[:, count // 2]
+        else:
+            batch.partition(middle, axis=1)
+            batch[:, :middle].partition(replace, axis=1)
+            batch[:, middle + 1:].partition(count - 1 - replace - (middle + 1), axis=1)
+            batch[:, :replace + 1].sort(axis=1)
+            batch[:, count - 1 - replace:].sort(axis=1)
+
+            median_lo = batch[:, middle]
+            median_hi = median_lo if count % 2 == 1 else batch[:, middle + 1:].min(axis=1)
 
-        numbers.sort()
-        median_lo = numbers[(count - 1) // 2]
-        median_hi = numbers[count // 2]
         median = (median_lo + median_hi) / 2
 
-        survivor_index_lo = 0
-        survivor_index_hi = count - 1
-        for i in range(replace):
-            distance_lo = median - numbers[survivor_index_lo]
-            distance_hi = numbers[survivor_index_hi] - median
-            if distance_lo > distance_hi:
-                survivor_index_lo += 1
-            else:
-                survivor_index_hi -= 1
+        # Locate the given share of values most distant from median.
+        # The distance is measured additively to avoid issues with straddling zero.
+        # Dropping the more distant of the remaining extremes `replace` times drops the i-th lowest value
+        # exactly when it is more distant than the (replace - i)-th highest value.
+
+        distance_lo = median[:, np.newaxis] - batch[:, :replace]
+        distance_hi = batch[:, count - replace:] - median[:, np.newaxis]
+        survivor_index_lo = np.count_nonzero(distance_lo > distance_hi, axis=1)
+        survivor_index_hi = count - 1 - replace + survivor_index_lo
 
         # Compute the range of values considered extreme based on the range of remaining values.
         # Again the distance is measured additively to avoid issues with straddling zero.
 
-        survivor_lo = numbers[survivor_index_lo]
-        survivor_hi = numbers[survivor_index_hi]
+        survivor_lo = batch[rows, survivor_index_lo]
+        survivor_hi = batch[rows, survivor_index_hi]
         survivor_range = survivor_hi - survivor_lo
         limit_lo = survivor_lo - survivor_range * self.bootstrap_diff_trim_limit
         limit_hi = survivor_hi + survivor_range * self.bootstrap_diff_trim_limit
 
         # Replace values outside computed range with most extreme values within that range.
-        # By including valid survivor positions, we avoid array bounds issues.
+        # The extremes are sorted, so the values outside are a prefix (suffix) of them.
+
+        extremes_lo = batch[:, :replace + 1]
+        outside_lo = extremes_lo < limit_lo[:, np.newaxis]
+        replace_lo = extremes_lo[rows, np.count_nonzero(outside_lo, axis=1)]
+        np.copyto(extremes_lo, replace_lo[:, np.newaxis], where=outside_lo)
+
+        extremes_hi = batch[:, count - 1 - replace:]
+        outside_hi = extremes_hi > limit_hi[:, np.newaxis]
+        replace_hi = extremes_hi[rows, replace - np.count_nonzero(outside_hi, axis=1)]
+        np.copyto(extremes_hi, replace_hi[:, np.newaxis], where=outside_hi)
+
+    @staticmethod
+    def resolve_run_count(run_size: dict, name: str, column_data) -> int:
+        """Use the run count of the run size if given, otherwise the number of available runs."""
+
+        if name in run_size and run_size[name] > 0:
+            return run_size[name]
+        return len(column_data)
 
-        slice_lo = slice(0, survivor_index_lo + 1)
-        outside_lo = numbers[slice_lo] < limit_lo
-        replace_lo = numbers[slice_lo][np.logical_not(outside_lo)].min()
-        numbers[slice_lo][outside_lo] = replace_lo
+    @staticmethod
+    def resolve_iterations_count(run_size: dict) -> int:
+        """Use the iterations count of the run size if numeric, otherwise 0 for all iterations ("max")."""
 
-        slice_hi = slice(survivor_index_hi, None)
-        outside_hi = numbers[slice_hi] > limit_hi
-        replace_hi = numbers[slice_hi][np.logical_not(outside_hi)].max()
-        numbers[slice_hi][outside_hi] = replace_hi
+        iterations = run_size.get("iterations_count", "max")
+        if isinstance(iterations, int) and iterations > 0:
+            return iterations
+        return 0
 
     def compute_difference_with_run_size(self, column_data_old, column_data_new, aggregator, replicator) -> dict:
 
         # Dimensions handy later.
-        if "old_run_count" in self.run_size and self.run_size["old_run_count"] > 0:
-            run_count_old = self.run_size["old_run_count"]
-        else:
-            run_count_old = len(column_data_old)
-
-        if "new_run_count" in self.run_size and self.run_size["new_run_count"] > 0:
-            run_count_new = self.run_size["new_run_count"]
-        else:
-            run_count_new = len(column_data_new)
+        run_count_old = Comparer.resolve_run_count(self.run_size, "old_run_count", column_data_old)
+        run_count_new = Comparer.resolve_run_count(self.run_size, "new_run_count", column_data_new)
 
         mean_old = aggregator(column_data_old)
         mean_new = aggregator(column_data_new)
-
-        typical_difference = replicator(column_data_new, column_data_old, run_count_new, run_count_old, self.boots)
         difference = mean_new - mean_old
 
+        # Clear-cut pairs take the analytic p-value without bootstrapping.
+        p_value = self.screen_p_value(column_data_old, column_data_new, run_count_old, run_count_new)
+        if p_value is not None:
+            return {
+                "measurement_old_count": run_count_old,
+                "measurement_new_count": run_count_new,
+                "p_value": p_value,
+                "relative_change": difference / mean_old,
+                "replicates": 0,
+                "screened": True,
+            }
+
+        if self.adaptive_block > 0:
+            typical_difference = self.replicate_adaptively(
+                replicator, column_data_new, column_data_old, run_count_new, run_count_old)
+        else:
+            typical_difference = replicator(
+                column_data_new, column_data_old, run_count_new, run_count_old,
+                self.boots, self.bootstrap_threads, self.bootstrap_normal, self.bootstrap_memory_limit)
+
         # Compute likelihood of actual difference distribution including zero.
         p_value = self.estimate_likelihood_normal(typical_difference, 0)
         return {
@@ -139,6 +302,8 @@ class Comparer:
             "measurement_new_count": run_count_new,
             "p_value": p_value,
             "relative_change": difference / mean_old,
+            "replicates": 0 if typical_difference is None else len(typical_difference),
+            "screened": False,
         }
 
     def compute_difference_one_per_rep(self, column_data_old, column_data_new):
@@ -153,27 +318,263 @@ class Comparer:
         )
 
     @staticmethod
-    def hierarchical_bootstrap_mean_difference(data_one, data_two, count_one, count_two, replicates) -> np.ndarray:
-        """Boostrap difference in mean over two hierarchical data sets."""
+    def hierarchical_bootstrap_mean_difference(
+            data_one, data_two, count_one, count_two, replicates, threads: int = 1, normal: bool = False,
+            memory_limit: int = BOOTSTRAP_MEMORY_LIMIT) -> np.ndarray:
+        """Boostrap difference in mean over two hierarchical data sets.
+
+        The replicates of each data set are split among the given number of threads. With `normal`, the
+        resampled mean of each drawn run is approximated by a draw from its normal distribution.
+        The memory limit bounds the chunks of the NumPy fallback.
+        """
+
+        results_one = fb.hierarchical_bootstrap_mean(data_one, count_one, 0, replicates, threads, normal, memory_limit)
+        results_two = fb.hierarchical_bootstrap_mean(data_two, count_two, 0, replicates, threads, normal, memory_limit)
+        return results_one - results_two
+
+    @staticmethod
+    def hierarchical_bootstrap_mean_difference_nested(
+            data_one, data_two, run_counts, replicates, threads: int = 1, normal: bool = False,
+            memory_limit: int = BOOTSTRAP_MEMORY_LIMIT) -> np.ndarray:
+        """Boostrap difference in mean over two hierarchical data sets for several run counts.
+
+        Returns one row of replicates per run count, the replicates of the smaller run counts
+        are computed from the first runs drawn for the largest one.
+        """
 
-        results_one = fb.hierarchical_bootstrap_mean(data_one, count_one, 0, replicates)
-        results_two = fb.hierarchical_bootstrap_mean(data_two, count_two, 0, replicates)
+        results_one = fb.hierarchical_bootstrap_mean_nested(
+            data_one, run_counts, 0, replicates, threads, normal, memory_limit)
+        results_two = fb.hierarchical_bootstrap_mean_nested(
+            data_two, run_counts, 0, replicates, threads, normal, memory_limit)
         return results_one - results_two
 
+    def bootstrap_groups(self, groups, run_counts: list[int], replicates: int) -> np.ndarray:
+        """Boostrap mean of several hierarchical data sets (lists of runs) in one kernel call.
+
+        Returns one row of replicates per data set, each drawing the given number of runs.
+        """
+
+        return fb.hierarchical_bootstrap_mean_batch(
+            groups, run_counts, 0, replicates, self.bootstrap_threads, self.bootstrap_normal, self.bootstrap_memory_limit)
+
+    @staticmethod
+    def run_means(data_list) -> np.ndarray:
+        if isinstance(data_list, DampenedRuns):
+            return data_list.means
+        return np.array([data.mean(dtype=np.float64) for data in data_list])
+
     @staticmethod
     def mean_one_per_rep(data_list):
-        return np.array([data.mean() for data in data_list]).mean()
+        return Comparer.run_means(data_list).mean()
 
     @staticmethod
-    def get_mean_difference_distribution_one_per_rep(data_one, data_two, count_one, count_two, boots):
+    def get_mean_difference_distribution_one_per_rep(
+            data_one, data_two, count_one, count_two, boots, threads: int = 1, normal: bool = False,
+            memory_limit: int = BOOTSTRAP_MEMORY_LIMIT):
         if (count_one < MIN_RUN_COUNT) and (count_two < MIN_RUN_COUNT):
             return None
 
         return Comparer.hierarchical_bootstrap_mean_difference(
-            data_one, data_two, count_one, count_two, boots)
+            data_one, data_two, count_one, count_two, boots, threads, normal, memory_limit)
+
+    def read_dampened(self, measurement: Measurement, column: str, iterations: int = 0) -> list[np.ndarray]:
+        """Read the runs of the measurement column dampened with the trim parameters of this comparer.
+
+        With `iterations`, only the first iterations of every run are read and dampened.
+        With a dampened store, the runs are sorted and come from the store unless their source files changed,
+        otherwise they are read, dampened and stored.
+        """
+
+        if Comparer.dampened_store is None:
+            column_data = measurement.read_columns(column, iterations=iterations)
+            self.hierarchical_dampen_extremes_reordering(column_data)
+            return column_data
+
+        store = Comparer.dampened_store
+        entry_path = store.entry_path(
+            measurement.id, column, Measurement.column_dtype,
+            self.bootstrap_diff_trim_share, self.bootstrap_diff_trim_limit, iterations)
+        # The signature is taken before reading, so runs read from files changing meanwhile are rebuilt next time.
+        signature = DampenedStore.signature(measurement.source_files(column))
+
+        column_data = store.get(entry_path, signature)
+        if column_data is None:
+            column_data = measurement.read_columns(column, iterations=iterations)
+            self.hierarchical_dampen_extremes_reordering(column_data)
+            column_data = store.put(entry_path, signature, column_data)
+
+        return column_data
+
+    def estimate_bytes(self, measurements: list[Measurement], column: str, replicate_rows: int) -> int:
+        """Estimate the peak bytes of comparing the given distinct measurements together.
+
+        Each measurement is held as its read runs, the copy made by the reader (pandas or the column cache)
+        and the length batches of the dampening. Each replicate row (one per pair and run count) holds the
+        replicates of both sides and their difference. The NumPy fallback adds its chunks.
+        """
+
+        itemsize = np.dtype(Measurement.column_dtype or np.float64).itemsize
+        iterations = sum(sum(measurement.iteration_counts(column)) for measurement in measurements)
+        required = 3 * iterations * itemsize + replicate_rows * 3 * self.boots * np.dtype(np.float64).itemsize
+
+        if fb.kernel_path() == "numpy":
+            required += min(self.bootstrap_memory_limit, fb.CHUNK_BYTES + 16 * MAX_RUN_COUNT * self.boots)
+
+        return required
+
+    def compare_run_counts(self, old_ms: Measurement, new_ms: Measurement, column: str, run_counts: list[int]) -> dict[int, dict]:
+        """Compares two measurements for several run counts, used for both measurements.
+
+        The columns are read and dampened once and the replicates of all run counts are drawn
+        in one kernel call per measurement. Each result has the same form as the result of `compare`
+        with the run count as `old_run_count` and `new_run_count`.
+        """
+
+        column_data_old = self.read_dampened(old_ms, column)
+        column_data_new = self.read_dampened(new_ms, column)
+
+        mean_old = Comparer.mean_one_per_rep(column_data_old)
+        mean_new = Comparer.mean_one_per_rep(column_data_new)
+        difference = mean_new - mean_old
+
+        screened = {
+            run_count: self.screen_p_value(column_data_old, column_data_new, run_count, run_count)
+            for run_count in run_counts
+        }
+        screened = {run_count: p_value for run_count, p_value in screened.items() if p_value is not None}
+
+        bootstrapped = [
+            run_count for run_count in run_counts if run_count >= MIN_RUN_COUNT and run_count not in screened]
+        typical_differences = {}
+        if len(bootstrapped) > 0:
+            # Adaptively, blocks are drawn until the p-values of all run counts are settled.
+            block_size = self.adaptive_block if self.adaptive_block > 0 else self.boots
+            blocks = []
+            drawn = 0
+            while drawn < self.boots:
+                blocks.append(Comparer.hierarchical_bootstrap_mean_difference_nested(
+                    column_data_new, column_data_old, bootstrapped,
+                    min(block_size, self.boots - drawn),
+                    self.bootstrap_threads, self.bootstrap_normal, self.bootstrap_memory_limit))
+                drawn += blocks[-1].shape[1]
+                typical_differences = dict(zip(bootstrapped, np.concatenate(blocks, axis=1)))
+                if self.adaptive_block > 0 and all(map(self.is_p_value_settled, typical_differences.values())):
+                    break
+
+        return {
+            run_count: {
+                "measurement_old_count": run_count,
+                "measurement_new_count": run_count,
+                "p_value": screened[run_count] if run_count in screened else
+                self.estimate_likelihood_normal(typical_differences.get(run_count), 0),
+                "relative_change": difference / mean_old,
+                "replicates": len(typical_differences[run_count]) if run_count in typical_differences else 0,
+                "screened": run_count in screened,
+            }
+            for run_count in run_counts
+        }
+
+    def compare_batch(self, pairs: list[tuple[Measurement, Measurement, dict]], column: str) -> list[dict]:
+        """Compares several pairs of measurements with their run sizes, e.g. all pairs of a combination.
+
+        The pairs are compared in windows of BATCH_PAIRS, so the data held at the same time is bounded by a window
+        and not by the number of pairs. Within a window, each measurement is read and dampened once (per iterations
+        count), and the replicates of every distinct measurement and run count are drawn in one kernel call (one per
+        block when drawing adaptively), so a measurement shared by consecutive pairs is bootstrapped once.
+        A measurement used by the next window too is kept, the others are dropped.
+        Each result has the same form as the result of `compare`.
+        """
+
+        # The data of a measurement is keyed by its id and the iterations count it was read with.
+        column_data = {}
+        means = {}
+        results = []
+        for begin in range(0, len(pairs), BATCH_PAIRS):
+            window = pairs[begin:begin + BATCH_PAIRS]
+            sources = [
+                tuple((measurement.id, Comparer.resolve_iterations_count(run_size)) for measurement in (old_ms, new_ms))
+                for old_ms, new_ms, run_size in window]
+
+            used = {source for pair_sources in sources for source in pair_sources}
+            for source in list(column_data.keys()):
+                if source not in used:
+                    del column_data[source]
+                    del means[source]
+
+            for (old_ms, new_ms, _), pair_sources in zip(window, sources):
+                for measurement, source in zip((old_ms, new_ms), pair_sources):
+                    if source not in column_data:
+                        column_data[source] = self.read_dampened(measurement, column, source[1])
+                        means[source] = Comparer.mean_one_per_rep(column_data[source])
+
+            results.extend(self.compare_window(window, sources, column_data, means))
+
+        return results
+
+    def compare_window(
+            self, pairs: list[tuple[Measurement, Measurement, dict]], sources: list[tuple[tuple, tuple]],
+            column_data: dict, means: dict) -> list[dict]:
+        """Compares the pairs of one window of `compare_batch` from the data of their sources (old, new)."""
+
+        results = []
+        sides = {}
+        for index, ((source_old, source_new), (_, _, run_size)) in enumerate(zip(sources, pairs)):
+            run_count_old = Comparer.resolve_run_count(run_size, "old_run_count", column_data[source_old])
+            run_count_new = Comparer.resolve_run_count(run_size, "new_run_count", column_data[source_new])
+            p_value = self.screen_p_value(
+                column_data[source_old], column_data[source_new], run_count_old, run_count_new)
+
+            results.append({
+                "measurement_old_count": run_count_old,
+                "measurement_new_count": run_count_new,
+                "p_value": p_value,
+                "relative_change": (means[source_new] - means[source_old]) / means[source_old],
+                "replicates": 0,
+                "screened": p_value is not None,
+            })
+
+            if p_value is None and ((run_count_old >= MIN_RUN_COUNT) or (run_count_new >= MIN_RUN_COUNT)):
+                sides[index] = ((source_new, run_count_new), (source_old, run_count_old))
+
+        # Adaptively, blocks are drawn until the p-values of all pairs are settled.
+        block_size = self.adaptive_block if self.adaptive_block > 0 else self.boots
+        pending = list(sides.keys())
+        replicates = {}
+        typical_differences = {}
+        drawn = 0
+        while len(pending) > 0 and drawn < self.boots:
+            groups = sorted({group for index in pending for group in sides[index]})
+            block = self.bootstrap_groups(
+                [column_data[source] for source, _ in groups],
+                [run_count for _, run_count in groups],
+                min(block_size, self.boots - drawn))
+            drawn += block.shape[1]
+
+            for group, row in zip(groups, block):
+                replicates.setdefault(group, []).append(row)
+
+            # The groups of a pending pair got a block in every round so far.
+            for index in pending:
+                group_new, group_old = sides[index]
+                typical_differences[index] = np.concatenate(replicates[group_new]) - np.concatenate(replicates[group_old])
+
+            if self.adaptive_block > 0:
+                pending = [index for index in pending if not self.is_p_value_settled(typical_differences[index])]
+
+        for index, result in enumerate(results):
+            if not result["screened"]:
+                result["p_value"] = self.estimate_likelihood_normal(typical_differences.get(index), 0)
+                result["replicates"] = len(typical_differences[index]) if index in typical_differences else 0
+
+        return results
 
     def compare(self, old_ms: Measurement, new_ms: Measurement, column: str) -> dict:
-        results = self.compute_difference_one_per_rep(old_ms.read_columns(column), new_ms.read_columns(column))
+        iterations = Comparer.resolve_iterations_count(self.run_size)
+        results = self.compute_difference_with_run_size(
+            self.read_dampened(old_ms, column, iterations), self.read_dampened(new_ms, column, iterations),
+            Comparer.mean_one_per_rep,
+            Comparer.get_mean_difference_distribution_one_per_rep,
+        )
         if len(results) > 0:
             return results
 
@@ -1,6 +1,7 @@
 #ifndef COMMON_H_GUARD
 #define COMMON_H_GUARD
 
+#include <math.h>
 #include <stdint.h>
 
 
@@ -57,4 +58,17 @@ static uint64_t __random_uint64_mod_float64(const uint64_t random, const double
     return __random_uint64_to_float64(random) * modulus;
 }
 
+
+/**
+ * Converts two (random) 64-bit unsigned integers to a (random) standard normal
+ * value using the Box-Muller transform. The first value is converted to the
+ * interval (0, 1] so that its logarithm is always finite.
+ */
+inline ALWAYS
+static double __random_uint64_to_normal(const uint64_t random_radius, const uint64_t random_angle) {
+    const double radius = ((random_radius >> 11) + 1) * (double) 0x1.0p-53;
+    const double angle = __random_uint64_to_float64(random_angle);
+    return sqrt(-2.0 * log(radius)) * cos(2.0 * M_PI * angle);
+}
+
 #endif // COMMON_H_GUARD
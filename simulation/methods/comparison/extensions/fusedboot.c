@@ -8,22 +8,29 @@
 #define NPY_NO_DEPRECATED_API NPY_2_0_API_VERSION
 #include <numpy/arrayobject.h>
 
+#include <math.h>
+#include <pthread.h>
 #include <stdint.h>
 #include <stdlib.h>
+#include <string.h>
 
 
 // Auxiliary RNG state.
 
 static splitmix64_t splitmix64;
 
-// Main RNG state.
+// Main RNG state. It is only accessed with the GIL held and never used for
+// computation directly. Each call takes a copy of the state and jumps the
+// main state ahead, so that concurrent calls use non-overlapping sequences.
 
 static xoshiro256pv_t xoshiro256pv;
 
 // Macros to simplify switching between different main RNGs.
 
+#define random_t xoshiro256pv_t
 #define random_init_using(next, next_arg) xoshiro256pv_init_using(&xoshiro256pv, (void *) (next), (next_arg))
-#define random_next_bulk(values) __xoshiro256pv_next_bulk(&xoshiro256pv, XOSHIRO256PV_WIDTH, (values))
+#define random_next_bulk(state, values) __xoshiro256pv_next_bulk((state), XOSHIRO256PV_WIDTH, (values))
+#define random_jump(state) __xoshiro256pv_jump(state)
 #define RANDOM_WIDTH XOSHIRO256PV_WIDTH
 
 //
@@ -38,7 +45,7 @@ static void xoshiro256pv_init_using(
         }
     }
 
-    __xoshiro256pv_init(&xoshiro256pv, xoshiro256pv_seed);
+    __xoshiro256pv_init(state, xoshiro256pv_seed);
 }
 
 
@@ -49,6 +56,15 @@ static void init_random(const uint64_t seed) {
 }
 
 
+/**
+ * Provides a private RNG state for a single call. Must be called with the GIL held.
+ */
+static void take_random(random_t * const restrict state) {
+    *state = xoshiro256pv;
+    random_jump(&xoshiro256pv);
+}
+
+
 static PyObject* python_init_random(PyObject* self, PyObject* args) {
     long int random_seed;
 
@@ -62,239 +78,336 @@ static PyObject* python_init_random(PyObject* self, PyObject* args) {
 
 //
 
-/**
- * Computes the bootstrap mean of a given array of double values
- * using a given number of samples.
- */
-static double bootstrap_mean_1d_float64_simple(
-    const npy_intp count, const npy_intp length, double const values[length]
-) {
-    const unsigned count_tail = count % RANDOM_WIDTH;
-    const unsigned count_head = count - count_tail;
-
-    double sum = 0.0;
-    uint64_t randoms[RANDOM_WIDTH];
+typedef double (* bootstrap_mean_1d_fn_t)(
+    random_t * const restrict state, const npy_intp count, const npy_intp length, void const * values
+);
 
-    // Handle head elements (if any).
-    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
-        random_next_bulk(randoms);
+typedef struct kernel_path kernel_path_t;
 
-        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
-        }
-    }
 
-    // Handle tail elements (if any).
-    if (count_tail != 0) {
-        random_next_bulk(randoms);
+/**
+ * Plain C view of the input arrays, which can be used without holding the GIL.
+ * The array objects referenced in `arrays` keep the data alive.
+ */
+typedef struct {
+    Py_ssize_t array_count;
+    PyArrayObject ** arrays;
+    void const ** values;
+    npy_intp * lengths;
+    npy_intp * sample_counts;
+    int value_type;
+    double * moments;
+    kernel_path_t const * kernels;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_fn;
+} bootstrap_input_t;
+
+
+typedef void (* bootstrap_mean_2d_fn_t)(
+    random_t * const restrict state,
+    const unsigned count_count, unsigned const * mean_counts, unsigned const * rows,
+    bootstrap_input_t const * const restrict input,
+    double * const restrict means, const long row_stride
+);
 
-        for (unsigned ri = 0; ri < count_tail; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
-        }
-    }
 
-    return sum / count;
-}
+/**
+ * The bootstrap kernels compiled for one code path (see kernels.h).
+ */
+struct kernel_path {
+    const char * name;
+    int (* supported)(void);
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_float64;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_int64;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_uint64;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_float32;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_int32;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_uint32;
+    bootstrap_mean_1d_fn_t bootstrap_mean_1d_normal;
+    bootstrap_mean_2d_fn_t bootstrap_mean_2d_nested;
+};
 
 //
 
-/**
- * Computes the bootstrap mean of a given array of signed integer
- * values using a given number of samples.
- */
-static double bootstrap_mean_1d_int64_simple(
-    const npy_intp count, const npy_intp length, int64_t const values[length]
-) {
-    const unsigned count_tail = count % RANDOM_WIDTH;
-    const unsigned count_head = count - count_tail;
+// Code paths. The module is compiled for a baseline instruction set (SSE2 on
+// x86-64), and the kernels are compiled once more for each wider instruction
+// set, so that the same binary runs on any node and uses the widest vectors
+// the node supports.
+
+#if defined(__GNUC__) && (defined(__x86_64__) || defined(__i386__))
+#define KERNEL_PATHS_X86
+#endif
+
+#ifdef KERNEL_PATHS_X86
+#define KERNEL_PATH sse2
+#define KERNEL_PATH_BASELINE kernel_path_sse2
+#else
+#define KERNEL_PATH generic
+#define KERNEL_PATH_BASELINE kernel_path_generic
+#endif
+#define KERNEL_TARGET
+#define KERNEL_SUPPORTED 1
+#include "kernels.h"
+#undef KERNEL_SUPPORTED
+#undef KERNEL_TARGET
+#undef KERNEL_PATH
+
+#ifdef KERNEL_PATHS_X86
+
+#define KERNEL_PATH avx2
+#define KERNEL_TARGET __attribute__((target("avx2")))
+#define KERNEL_SUPPORTED __builtin_cpu_supports("avx2")
+#include "kernels.h"
+#undef KERNEL_SUPPORTED
+#undef KERNEL_TARGET
+#undef KERNEL_PATH
+
+// AVX-512DQ provides the vector conversions between 64-bit integers and
+// doubles used to compute the indices, AVX-512VL the 256-bit variants.
+#define KERNEL_PATH avx512
+#define KERNEL_TARGET __attribute__((target("avx512f,avx512dq,avx512vl")))
+#define KERNEL_SUPPORTED \
+    (__builtin_cpu_supports("avx512f") && __builtin_cpu_supports("avx512dq") && __builtin_cpu_supports("avx512vl"))
+#include "kernels.h"
+#undef KERNEL_SUPPORTED
+#undef KERNEL_TARGET
+#undef KERNEL_PATH
+
+#endif // KERNEL_PATHS_X86
+
+
+// All code paths, the preferred ones first.
+
+static kernel_path_t const * const kernel_paths[] = {
+#ifdef KERNEL_PATHS_X86
+    &kernel_path_avx512,
+    &kernel_path_avx2,
+#endif
+    &KERNEL_PATH_BASELINE
+};
 
-    int_fast64_t sum = 0;
-    uint64_t randoms[RANDOM_WIDTH];
+#define KERNEL_PATH_COUNT (sizeof(kernel_paths) / sizeof(kernel_paths[0]))
 
-    // Handle head elements (if any).
-    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
-        random_next_bulk(randoms);
+// Active code path. It is only accessed with the GIL held, each call
+// uses the code path that was active when its input was collected.
 
-        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
-        }
-    }
+static kernel_path_t const * kernel_path = &KERNEL_PATH_BASELINE;
 
-    // Handle tail elements (if any).
-    if (count_tail != 0) {
-        random_next_bulk(randoms);
 
-        for (unsigned ri = 0; ri < count_tail; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
+/**
+ * Selects the preferred code path supported by the CPU.
+ */
+static void init_kernel_path(void) {
+#ifdef KERNEL_PATHS_X86
+    __builtin_cpu_init();
+#endif
+
+    for (size_t pi = 0; pi < KERNEL_PATH_COUNT; pi++) {
+        if (kernel_paths[pi]->supported()) {
+            kernel_path = kernel_paths[pi];
+            return;
         }
     }
-
-    return sum / (double) count;
 }
 
-//
-
-/**
- * Computes the bootstrap mean of a given array of unsigned integer
- * values using a given number of samples.
- */
-static double bootstrap_mean_1d_uint64_simple(
-    const npy_intp count, const npy_intp length, uint64_t const values[length]
-) {
-    const unsigned count_tail = count % RANDOM_WIDTH;
-    const unsigned count_head = count - count_tail;
 
-    uint_fast64_t sum = 0;
-    uint64_t randoms[RANDOM_WIDTH];
+static PyObject* python_kernel_path(PyObject* self, PyObject* args) {
+    return PyUnicode_FromString(kernel_path->name);
+}
 
-    // Handle head elements (if any).
-    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
-        random_next_bulk(randoms);
 
-        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
-        }
+static PyObject* python_kernel_paths(PyObject* self, PyObject* args) {
+    PyObject * const names = PyList_New(0);
+    if (names == NULL) {
+        return NULL;
     }
 
-    // Handle tail elements (if any).
-    if (count_tail != 0) {
-        random_next_bulk(randoms);
+    for (size_t pi = 0; pi < KERNEL_PATH_COUNT; pi++) {
+        if (!kernel_paths[pi]->supported()) {
+            continue;
+        }
 
-        for (unsigned ri = 0; ri < count_tail; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
-            sum += values[index];
+        PyObject * const name = PyUnicode_FromString(kernel_paths[pi]->name);
+        if (name == NULL || PyList_Append(names, name) != 0) {
+            Py_XDECREF(name);
+            Py_DECREF(names);
+            return NULL;
         }
+
+        Py_DECREF(name);
     }
 
-    return sum / (double) count;
+    return names;
 }
 
-//
 
-typedef double (* bootstrap_mean_1d_fn_t)(const npy_intp count, const npy_intp length, void * arg);
+static PyObject* python_set_kernel_path(PyObject* self, PyObject* args) {
+    const char * name;
 
-/**
- * Computes the bootstrap mean of the given arrays using a given number of samples.
- * Uses a type-specific function to compute the bootstrap mean of the 1-D arrays.
- */
-static double bootstrap_mean_2d(
-    const unsigned mean_count, const unsigned array_count,
-    PyArrayObject * const restrict arrays[array_count],
-    const npy_intp sample_counts[array_count],
-    bootstrap_mean_1d_fn_t bootstrap_mean_1d_fn
-) {
-    double sum = 0.0;
+    if (!PyArg_ParseTuple(args, "s", &name)) {
+        return NULL;
+    }
 
-    for (unsigned mi = 0; mi < mean_count; mi += RANDOM_WIDTH) {
-        uint64_t randoms[RANDOM_WIDTH];
-        random_next_bulk(randoms);
+    for (size_t pi = 0; pi < KERNEL_PATH_COUNT; pi++) {
+        if (strcmp(kernel_paths[pi]->name, name) != 0) {
+            continue;
+        }
 
-        // Handle tail here, this should not be performance critical.
-        for (unsigned ri = 0; ri < RANDOM_WIDTH && (mi + ri) < mean_count; ri++) {
-            const unsigned index = __random_uint64_mod_float64(randoms[ri], array_count);
-            sum += bootstrap_mean_1d_fn(
-                sample_counts[index], PyArray_SIZE(arrays[index]), PyArray_DATA(arrays[index])
-            );
+        if (!kernel_paths[pi]->supported()) {
+            PyErr_Format(PyExc_ValueError, "Code path `%s` is not supported by this CPU", name);
+            return NULL;
         }
+
+        kernel_path = kernel_paths[pi];
+        Py_RETURN_NONE;
     }
 
-    return sum / mean_count;
+    PyErr_Format(PyExc_ValueError, "Unknown code path `%s`", name);
+    return NULL;
 }
 
 //
 
-static PyObject* python_hierarchical_bootstrap_mean_2d(PyObject * const self, PyObject * const args) {
-    PyObject * arrays;
-    long run_count;
-    long sample_count;
-    long replica_count;
-
-    if (!PyArg_ParseTuple(args, "Olll", &arrays, &run_count, &sample_count, &replica_count)) {
-        return NULL;
+static void release_input(bootstrap_input_t * const input) {
+    if (input->arrays != NULL) {
+        for (Py_ssize_t i = 0; i < input->array_count; i++) {
+            // Some of the references may be NULL.
+            Py_XDECREF(input->arrays[i]);
+        }
     }
 
+    // Free auxiliary arrays.
+    free(input->arrays);
+    free(input->values);
+    free(input->lengths);
+    free(input->sample_counts);
+    free(input->moments);
+}
+
+
+/**
+ * Checks the input list of arrays and collects the array references, data
+ * pointers, lengths, and sample counts. Returns 0 on success. On failure,
+ * sets a Python exception and returns -1. In both cases, the input must be
+ * released using release_input().
+ */
+static int collect_input(PyObject * const arrays, const long sample_count, bootstrap_input_t * const input) {
     if (!PyList_Check(arrays)) {
         PyErr_SetString(PyExc_TypeError, "`arrays` parameter must be of type `list`");
-        return NULL;
+        return -1;
     }
 
-    PyArrayObject * result = NULL;
-
     //
-    // We use two auxiliary arrays. One to hold the references to array objects
-    // and one to hold the number of samples to take from each array (which does
-    // not have to be equal to the number of array elements).
+    // We use auxiliary arrays. One to hold the references to array objects,
+    // and others to hold the data pointers, the array lengths, and the number
+    // of samples to take from each array (which does not have to be equal to
+    // the number of array elements).
     //
 
     const Py_ssize_t arrays_count = PyList_Size(arrays);
 
-    PyArrayObject ** const array_objects = calloc(arrays_count, sizeof(PyArrayObject *));
-    npy_intp * const sample_counts = malloc(arrays_count * sizeof(npy_intp));
+    input->array_count = arrays_count;
+    input->arrays = calloc(arrays_count, sizeof(PyArrayObject *));
+    input->values = malloc(arrays_count * sizeof(void *));
+    input->lengths = malloc(arrays_count * sizeof(npy_intp));
+    input->sample_counts = malloc(arrays_count * sizeof(npy_intp));
 
-    if (array_objects == NULL || sample_counts == NULL) {
+    if (input->arrays == NULL || input->values == NULL || input->lengths == NULL || input->sample_counts == NULL) {
         PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
-        goto exit_free_arrays;
+        return -1;
     }
 
     //
-    // Check array type and collect array object references. For arrays of the right type
-    // that are C contiguous, we just increment a reference count on the borrowed reference
-    // (so that we can decrement it later). For other arrays, we create a new array with a
-    // new reference that will be released later.
-    //
-    // For each array, we also determine the sample count, which defaults to array length.
+    // Check the arrays and determine the target type. We expect all arrays to be of
+    // the same general type, i.e., floats, unsigned ints, or signed ints. If all of
+    // them are 32-bit (single precision) arrays, we use them as they are, otherwise
+    // we use the 64-bit (double precision) type of their kind.
     //
 
     int target_type = NPY_NOTYPE;
-    bootstrap_mean_1d_fn_t bootstrap_mean_1d_fn = NULL;
 
     for (Py_ssize_t ai = 0; ai < arrays_count; ai++) {
         // PyList_GetItem returns a borrowed reference (no need to release it).
         PyObject * const object = PyList_GetItem(arrays, ai);
         if (!PyArray_Check(object)) {
             PyErr_Format(PyExc_TypeError, "Item %zd of the input list is not a `numpy.ndarray`", ai);
-            goto exit_free_refs;
+            return -1;
         }
 
         // Check the number of dimensions.
         const int ndim = PyArray_NDIM((PyArrayObject *) object);
         if (ndim != 1) {
             PyErr_Format(PyExc_ValueError, "Array %zd of the input list has %d dimensions (expecting 1)", ai, ndim);
-            goto exit_free_refs;
+            return -1;
         }
 
-        // Check/upgrade array type and determine type-specific bootstrap function.
-        int array_type = PyArray_TYPE((PyArrayObject *) object);
+        // Determine the narrow (32-bit) and wide (64-bit) type of the array kind.
+        const int array_type = PyArray_TYPE((PyArrayObject *) object);
+        int narrow_type;
+        int wide_type;
         if (PyTypeNum_ISFLOAT(array_type)) {
-            bootstrap_mean_1d_fn = (bootstrap_mean_1d_fn_t) bootstrap_mean_1d_float64_simple;
-            array_type = NPY_FLOAT64;
+            narrow_type = NPY_FLOAT32;
+            wide_type = NPY_FLOAT64;
         } else if (PyTypeNum_ISSIGNED(array_type)) {
-            bootstrap_mean_1d_fn = (bootstrap_mean_1d_fn_t) bootstrap_mean_1d_int64_simple;
-            array_type = NPY_INT64;
+            narrow_type = NPY_INT32;
+            wide_type = NPY_INT64;
         } else if (PyTypeNum_ISUNSIGNED(array_type)) {
-            bootstrap_mean_1d_fn = (bootstrap_mean_1d_fn_t) bootstrap_mean_1d_uint64_simple;
-            array_type = NPY_UINT64;
+            narrow_type = NPY_UINT32;
+            wide_type = NPY_UINT64;
         } else {
             PyErr_Format(PyExc_TypeError, "Array %zd of the input list has invalid element type (expecting signed/unsigned integer, or float)", ai);
-            goto exit_free_refs;
+            return -1;
         }
 
-        // Check for mismatching array types (or set the target type).
-        // We expect all arrays to be of the same general type, i.e.,
-        // floats, unsigned ints, or signed ints.
-        if (array_type != target_type) {
-            if (target_type != NPY_NOTYPE) {
-                PyErr_Format(PyExc_TypeError, "Array %zd of the input list has a mismatching type (expecting similar types)", ai);
-                goto exit_free_refs;
-            } else {
-                target_type = array_type;
+        // Check for mismatching array kinds (or set the target type).
+        const int array_target_type = (array_type == narrow_type) ? narrow_type : wide_type;
+        if (target_type == NPY_NOTYPE) {
+            target_type = array_target_type;
+        } else if (target_type == narrow_type || target_type == wide_type) {
+            // Any wide array makes the whole input wide.
+            if (array_target_type == wide_type) {
+                target_type = wide_type;
             }
+        } else {
+            PyErr_Format(PyExc_TypeError, "Array %zd of the input list has a mismatching type (expecting similar types)", ai);
+            return -1;
         }
+    }
+
+    // Determine the type-specific bootstrap function of the active code path.
+    input->value_type = target_type;
+    input->kernels = kernel_path;
+    switch (target_type) {
+        case NPY_FLOAT32:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_float32;
+            break;
+        case NPY_INT32:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_int32;
+            break;
+        case NPY_UINT32:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_uint32;
+            break;
+        case NPY_INT64:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_int64;
+            break;
+        case NPY_UINT64:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_uint64;
+            break;
+        default:
+            input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_float64;
+            break;
+    }
+
+    //
+    // Collect array object references. For arrays of the target type that are C contiguous,
+    // we just increment a reference count on the borrowed reference (so that we can decrement
+    // it later) and use the caller's buffer directly. For other arrays, we create a new array
+    // with a new reference that will be released later.
+    //
+    // For each array, we also determine the sample count, which defaults to array length.
+    //
+
+    for (Py_ssize_t ai = 0; ai < arrays_count; ai++) {
+        PyObject * const object = PyList_GetItem(arrays, ai);
 
         // Get a reference to a well-behaved (contiguous and aligned) array.
         // This may convert the input arrays to arrays using a wider type.
@@ -302,15 +415,206 @@ static PyObject* python_hierarchical_bootstrap_mean_2d(PyObject * const self, Py
         PyArrayObject * array_object = (PyArrayObject *) PyArray_FROM_OTF(object, target_type, NPY_ARRAY_IN_ARRAY);
         if (array_object == NULL) {
             PyErr_Format(PyExc_ValueError, "Failed getting a well-behaved `numpy.ndarray` for item %zd of the input list", ai);
-            goto exit_free_refs;
+            return -1;
         }
 
-        array_objects[ai] = array_object;
+        input->arrays[ai] = array_object;
+        input->values[ai] = PyArray_DATA(array_object);
+        input->lengths[ai] = PyArray_SIZE(array_object);
 
         // Use array size if the `sample_count` is not well defined.
-        sample_counts[ai] = (sample_count > 0) ? (npy_intp) sample_count : PyArray_SIZE(array_object);
+        input->sample_counts[ai] = (sample_count > 0) ? (npy_intp) sample_count : PyArray_SIZE(array_object);
+    }
+
+    return 0;
+}
+
+
+/**
+ * Computes the mean and variance of an array in two passes.
+ */
+#define ARRAY_MOMENTS(type, values, length, mean, variance) { \
+    type const * const __values = (values); \
+    double __sum = 0.0; \
+    for (npy_intp __i = 0; __i < (length); __i++) { \
+        __sum += __values[__i]; \
+    } \
+    (mean) = __sum / (length); \
+    double __squares = 0.0; \
+    for (npy_intp __i = 0; __i < (length); __i++) { \
+        const double __deviation = __values[__i] - (mean); \
+        __squares += __deviation * __deviation; \
+    } \
+    (variance) = __squares / (length); \
+}
+
+
+/**
+ * Switches the collected input to the normal approximation of the inner
+ * bootstrap: each array is replaced by the mean and standard deviation of
+ * its resampled mean, i.e., sqrt(variance / sample count). Returns 0 on
+ * success and -1 if the memory cannot be allocated. Does not need the GIL.
+ */
+static int use_normal_approximation(bootstrap_input_t * const input) {
+    input->moments = malloc(2 * input->array_count * sizeof(double));
+    if (input->moments == NULL) {
+        return -1;
+    }
+
+    for (Py_ssize_t ai = 0; ai < input->array_count; ai++) {
+        double mean = NAN;
+        double variance = NAN;
+
+        switch (input->value_type) {
+            case NPY_FLOAT32:
+                ARRAY_MOMENTS(float, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+            case NPY_INT32:
+                ARRAY_MOMENTS(int32_t, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+            case NPY_UINT32:
+                ARRAY_MOMENTS(uint32_t, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+            case NPY_INT64:
+                ARRAY_MOMENTS(int64_t, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+            case NPY_UINT64:
+                ARRAY_MOMENTS(uint64_t, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+            default:
+                ARRAY_MOMENTS(double, input->values[ai], input->lengths[ai], mean, variance);
+                break;
+        }
+
+        input->moments[2 * ai] = mean;
+        input->moments[2 * ai + 1] = sqrt(variance / input->sample_counts[ai]);
+        input->values[ai] = &input->moments[2 * ai];
+    }
+
+    input->bootstrap_mean_1d_fn = input->kernels->bootstrap_mean_1d_normal;
+    return 0;
+}
+
+//
+
+//
+
+/**
+ * A contiguous range of replicas computed by one thread using its own RNG state.
+ * The replicas for the i-th number of samples are stored in the row `rows[i]`
+ * of the `replicas` array, with rows `replica_count` elements apart.
+ */
+typedef struct {
+    random_t state;
+    bootstrap_input_t const * input;
+    unsigned count_count;
+    unsigned const * mean_counts;
+    unsigned const * rows;
+    long replica_count;
+    long replica_begin;
+    long replica_end;
+    double * replicas;
+} bootstrap_task_t;
+
+
+static void * bootstrap_task_run(void * const arg) {
+    bootstrap_task_t * const task = arg;
+
+    for (long ri = task->replica_begin; ri < task->replica_end; ri++) {
+        task->input->kernels->bootstrap_mean_2d_nested(
+            &task->state, task->count_count, task->mean_counts, task->rows, task->input,
+            &task->replicas[ri], task->replica_count
+        );
+    }
+
+    return NULL;
+}
+
+
+/**
+ * Computes the hierarchical bootstrap mean replicas, splitting them into
+ * contiguous ranges computed by the given number of threads. Each thread
+ * uses a copy of the given RNG state jumped ahead by a multiple of 2^128
+ * steps, so the replicas are computed from non-overlapping sequences.
+ * With one thread, the replicas are computed in the calling thread from
+ * the given state. Does not need the GIL.
+ */
+static void bootstrap_replicas(
+    random_t * const restrict state, bootstrap_input_t const * const restrict input,
+    const unsigned count_count, unsigned const mean_counts[count_count], unsigned const rows[count_count],
+    const long replica_count, double * const replicas, long thread_count
+) {
+    if (thread_count > replica_count) {
+        thread_count = replica_count;
+    }
+
+    bootstrap_task_t * const tasks = (thread_count > 1) ? malloc(thread_count * sizeof(bootstrap_task_t)) : NULL;
+    pthread_t * const threads = (thread_count > 1) ? malloc(thread_count * sizeof(pthread_t)) : NULL;
+    int * const started = (thread_count > 1) ? calloc(thread_count, sizeof(int)) : NULL;
+
+    if (tasks == NULL || threads == NULL || started == NULL) {
+        // Single thread (or no memory for more threads).
+        bootstrap_task_t task = {
+            *state, input, count_count, mean_counts, rows, replica_count, 0, replica_count, replicas
+        };
+        bootstrap_task_run(&task);
+        *state = task.state;
+
+    } else {
+        for (long ti = 0; ti < thread_count; ti++) {
+            tasks[ti] = (bootstrap_task_t) {
+                *state, input, count_count, mean_counts, rows, replica_count,
+                replica_count * ti / thread_count, replica_count * (ti + 1) / thread_count,
+                replicas
+            };
+            random_jump(state);
+        }
+
+        // The calling thread computes the first range. Ranges of threads
+        // that fail to start are also computed by the calling thread.
+        for (long ti = 1; ti < thread_count; ti++) {
+            started[ti] = pthread_create(&threads[ti], NULL, bootstrap_task_run, &tasks[ti]) == 0;
+        }
+
+        bootstrap_task_run(&tasks[0]);
+
+        for (long ti = 1; ti < thread_count; ti++) {
+            if (started[ti]) {
+                pthread_join(threads[ti], NULL);
+            } else {
+                bootstrap_task_run(&tasks[ti]);
+            }
+        }
+    }
+
+    free(started);
+    free(threads);
+    free(tasks);
+}
+
+//
+
+static PyObject* python_hierarchical_bootstrap_mean_2d(PyObject * const self, PyObject * const args) {
+    PyObject * arrays;
+    long run_count;
+    long sample_count;
+    long replica_count;
+    long thread_count = 1;
+    int normal = 0;
+    long memory_limit = 0;
+
+    if (!PyArg_ParseTuple(
+        args, "Olll|lpl", &arrays, &run_count, &sample_count, &replica_count, &thread_count, &normal, &memory_limit
+    )) {
+        return NULL;
     }
 
+    PyArrayObject * result = NULL;
+    bootstrap_input_t input = { 0 };
+
+    if (collect_input(arrays, sample_count, &input) != 0) {
+        goto exit_release_input;
+    }
 
     //
     // Allocate the result object.
@@ -319,31 +623,265 @@ static PyObject* python_hierarchical_bootstrap_mean_2d(PyObject * const self, Py
     result = (PyArrayObject *) PyArray_SimpleNew(1, dims, NPY_DOUBLE);
     if (result == NULL) {
         PyErr_Format(PyExc_MemoryError, "Failed to allocate memory for the output array of %ld replicas", replica_count);
-        goto exit_free_refs;
+        goto exit_release_input;
     }
 
     //
     // Compute the hierarchical bootstrap mean replicas.
     // Use the bootstrap function corresponding to the target type.
+    // The computation uses a private RNG state and only plain C
+    // data, so it runs without the GIL (and possibly in threads).
     //
+    random_t state;
+    take_random(&state);
+
     double * const replicas = PyArray_DATA(result);
-    for (long ri = 0; ri < replica_count; ri++) {
-        replicas[ri] = bootstrap_mean_2d(
-            run_count, arrays_count, array_objects, sample_counts,
-            bootstrap_mean_1d_fn
-        );
+
+    const unsigned mean_counts[] = { run_count };
+    const unsigned rows[] = { 0 };
+
+    int status = 0;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (normal) {
+        status = use_normal_approximation(&input);
     }
+    if (status == 0) {
+        bootstrap_replicas(&state, &input, 1, mean_counts, rows, replica_count, replicas, thread_count);
+    }
+    Py_END_ALLOW_THREADS
 
-exit_free_refs:
-    for (Py_ssize_t i = 0; i < arrays_count; i++) {
-        // Some of the references may be NULL.
-        Py_XDECREF(array_objects[i]);
+    if (status != 0) {
+        PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
+        Py_CLEAR(result);
     }
 
-exit_free_arrays:
-    // Free auxiliary arrays.
-    free(sample_counts);
-    free(array_objects);
+exit_release_input:
+    release_input(&input);
+    return (PyObject *) result;
+}
+
+//
+
+static PyObject* python_hierarchical_bootstrap_mean_nested(PyObject * const self, PyObject * const args) {
+    PyObject * arrays;
+    PyObject * run_counts;
+    long sample_count;
+    long replica_count;
+    long thread_count = 1;
+    int normal = 0;
+    long memory_limit = 0;
+
+    if (!PyArg_ParseTuple(
+        args, "OOll|lpl", &arrays, &run_counts, &sample_count, &replica_count, &thread_count, &normal, &memory_limit
+    )) {
+        return NULL;
+    }
+
+    PyArrayObject * result = NULL;
+    bootstrap_input_t input = { 0 };
+    unsigned * mean_counts = NULL;
+    unsigned * rows = NULL;
+
+    if (collect_input(arrays, sample_count, &input) != 0) {
+        goto exit_release_input;
+    }
+
+    //
+    // Collect the run counts sorted in ascending order, together with
+    // the output rows they belong to (in the order they were given).
+    //
+    PyObject * const run_counts_fast = PySequence_Fast(run_counts, "`run_counts` parameter must be a sequence");
+    if (run_counts_fast == NULL) {
+        goto exit_release_input;
+    }
+
+    const Py_ssize_t count_count = PySequence_Fast_GET_SIZE(run_counts_fast);
+    if (count_count == 0) {
+        PyErr_SetString(PyExc_ValueError, "`run_counts` parameter must not be empty");
+        goto exit_release_counts;
+    }
+
+    mean_counts = malloc(count_count * sizeof(unsigned));
+    rows = malloc(count_count * sizeof(unsigned));
+    if (mean_counts == NULL || rows == NULL) {
+        PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
+        goto exit_release_counts;
+    }
+
+    for (Py_ssize_t ci = 0; ci < count_count; ci++) {
+        const long run_count = PyLong_AsLong(PySequence_Fast_GET_ITEM(run_counts_fast, ci));
+        if (run_count < 0) {
+            if (!PyErr_Occurred()) {
+                PyErr_Format(PyExc_ValueError, "Item %zd of `run_counts` is negative", ci);
+            }
+            goto exit_release_counts;
+        }
+
+        // Insertion sort, there are only a few run counts.
+        Py_ssize_t position = ci;
+        while (position > 0 && mean_counts[position - 1] > (unsigned) run_count) {
+            mean_counts[position] = mean_counts[position - 1];
+            rows[position] = rows[position - 1];
+            position--;
+        }
+
+        mean_counts[position] = run_count;
+        rows[position] = ci;
+    }
+
+    //
+    // Allocate the result object, one row of replicas per run count.
+    //
+    const npy_intp dims[] = { count_count, replica_count };
+    result = (PyArrayObject *) PyArray_SimpleNew(2, dims, NPY_DOUBLE);
+    if (result == NULL) {
+        PyErr_Format(PyExc_MemoryError, "Failed to allocate memory for the output array of %ld replicas", replica_count);
+        goto exit_release_counts;
+    }
+
+    random_t state;
+    take_random(&state);
+
+    double * const replicas = PyArray_DATA(result);
+
+    int status = 0;
+
+    Py_BEGIN_ALLOW_THREADS
+    if (normal) {
+        status = use_normal_approximation(&input);
+    }
+    if (status == 0) {
+        bootstrap_replicas(&state, &input, count_count, mean_counts, rows, replica_count, replicas, thread_count);
+    }
+    Py_END_ALLOW_THREADS
+
+    if (status != 0) {
+        PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
+        Py_CLEAR(result);
+    }
+
+exit_release_counts:
+    Py_DECREF(run_counts_fast);
+
+exit_release_input:
+    free(rows);
+    free(mean_counts);
+    release_input(&input);
+    return (PyObject *) result;
+}
+
+//
+
+static PyObject* python_hierarchical_bootstrap_mean_batch(PyObject * const self, PyObject * const args) {
+    PyObject * groups;
+    PyObject * run_counts;
+    long sample_count;
+    long replica_count;
+    long thread_count = 1;
+    int normal = 0;
+    long memory_limit = 0;
+
+    if (!PyArg_ParseTuple(
+        args, "OOll|lpl", &groups, &run_counts, &sample_count, &replica_count, &thread_count, &normal, &memory_limit
+    )) {
+        return NULL;
+    }
+
+    if (!PyList_Check(groups)) {
+        PyErr_SetString(PyExc_TypeError, "`groups` parameter must be of type `list`");
+        return NULL;
+    }
+
+    PyObject * const run_counts_fast = PySequence_Fast(run_counts, "`run_counts` parameter must be a sequence");
+    if (run_counts_fast == NULL) {
+        return NULL;
+    }
+
+    PyArrayObject * result = NULL;
+    const Py_ssize_t group_count = PyList_Size(groups);
+
+    bootstrap_input_t * const inputs = calloc(group_count > 0 ? group_count : 1, sizeof(bootstrap_input_t));
+    unsigned * const mean_counts = malloc((group_count > 0 ? group_count : 1) * sizeof(unsigned));
+    if (inputs == NULL || mean_counts == NULL) {
+        PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
+        goto exit_release_inputs;
+    }
+
+    if (PySequence_Fast_GET_SIZE(run_counts_fast) != group_count) {
+        PyErr_SetString(PyExc_ValueError, "`run_counts` must have one run count per group");
+        goto exit_release_inputs;
+    }
+
+    //
+    // Collect the input of every group (a list of arrays) and its run count.
+    //
+    for (Py_ssize_t gi = 0; gi < group_count; gi++) {
+        if (collect_input(PyList_GetItem(groups, gi), sample_count, &inputs[gi]) != 0) {
+            goto exit_release_inputs;
+        }
+
+        const long run_count = PyLong_AsLong(PySequence_Fast_GET_ITEM(run_counts_fast, gi));
+        if (run_count < 0) {
+            if (!PyErr_Occurred()) {
+                PyErr_Format(PyExc_ValueError, "Item %zd of `run_counts` is negative", gi);
+            }
+            goto exit_release_inputs;
+        }
+
+        mean_counts[gi] = run_count;
+    }
+
+    //
+    // Allocate the result object, one row of replicas per group.
+    //
+    const npy_intp dims[] = { group_count, replica_count };
+    result = (PyArrayObject *) PyArray_SimpleNew(2, dims, NPY_DOUBLE);
+    if (result == NULL) {
+        PyErr_Format(PyExc_MemoryError, "Failed to allocate memory for the output array of %ld replicas", replica_count);
+        goto exit_release_inputs;
+    }
+
+    //
+    // Compute the replicas of all groups in one pass without the GIL,
+    // the groups consume consecutive parts of the same RNG sequence.
+    //
+    random_t state;
+    take_random(&state);
+
+    double * const replicas = PyArray_DATA(result);
+    const unsigned rows[] = { 0 };
+    int status = 0;
+
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t gi = 0; gi < group_count && status == 0; gi++) {
+        if (normal) {
+            status = use_normal_approximation(&inputs[gi]);
+        }
+        if (status == 0) {
+            bootstrap_replicas(
+                &state, &inputs[gi], 1, &mean_counts[gi], rows,
+                replica_count, &replicas[gi * replica_count], thread_count
+            );
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    if (status != 0) {
+        PyErr_SetString(PyExc_MemoryError, "Failed to allocate memory for auxiliary data");
+        Py_CLEAR(result);
+    }
+
+exit_release_inputs:
+    if (inputs != NULL) {
+        for (Py_ssize_t gi = 0; gi < group_count; gi++) {
+            release_input(&inputs[gi]);
+        }
+    }
+
+    free(mean_counts);
+    free(inputs);
+    Py_DECREF(run_counts_fast);
     return (PyObject *) result;
 }
 
@@ -353,7 +891,52 @@ static PyMethodDef module_methods[] = {
         "hierarchical_bootstrap_mean",
         python_hierarchical_bootstrap_mean_2d,
         METH_VARARGS,
-        "Calculates a hierarchical bootstrap mean for a list of Numpy arrays."
+        "Calculates a hierarchical bootstrap mean for a list of Numpy arrays.\n"
+        "hierarchical_bootstrap_mean(arrays, run_count, sample_count, replica_count, threads=1, normal=False, memory_limit=0)\n"
+        "With normal=True, the resampled mean of each drawn array is approximated by a normal draw.\n"
+        "The memory_limit is accepted for compatibility with numpyboot, the kernels only allocate the replicas."
+    },
+
+    {
+        "hierarchical_bootstrap_mean_nested",
+        python_hierarchical_bootstrap_mean_nested,
+        METH_VARARGS,
+        "Calculates hierarchical bootstrap means for several run counts from the same draws.\n"
+        "hierarchical_bootstrap_mean_nested(arrays, run_counts, sample_count, replica_count, threads=1, normal=False, memory_limit=0)\n"
+        "Returns an array with one row of replicas per run count, the replicas for the\n"
+        "smaller run counts are computed from the first runs drawn for the largest one."
+    },
+
+    {
+        "hierarchical_bootstrap_mean_batch",
+        python_hierarchical_bootstrap_mean_batch,
+        METH_VARARGS,
+        "Calculates hierarchical bootstrap means for several groups of arrays in one call.\n"
+        "hierarchical_bootstrap_mean_batch(groups, run_counts, sample_count, replica_count, threads=1, normal=False, memory_limit=0)\n"
+        "Takes a list of groups (lists of arrays) with one run count per group and\n"
+        "returns an array with one row of replicas per group."
+    },
+
+    {
+        "kernel_path",
+        python_kernel_path,
+        METH_NOARGS,
+        "Returns the name of the active code path (instruction set) of the bootstrap kernels."
+    },
+
+    {
+        "kernel_paths",
+        python_kernel_paths,
+        METH_NOARGS,
+        "Returns the names of the code paths supported by the CPU, the preferred one first."
+    },
+
+    {
+        "set_kernel_path",
+        python_set_kernel_path,
+        METH_VARARGS,
+        "Activates the given code path of the bootstrap kernels.\n"
+        "Raises ValueError if the code path is unknown or not supported by the CPU."
     },
 
     {
@@ -382,6 +965,7 @@ static struct PyModuleDef module = {
 PyMODINIT_FUNC PyInit_fusedboot(void) {
     // Initialize NumPy and the internal random number generator.
     import_array();
+    init_kernel_path();
 
     uint64_t initial_seed = time(NULL);
     init_random(initial_seed);
@@ -0,0 +1,389 @@
+/*
+ * Bootstrap kernels compiled for a single code path.
+ *
+ * This file is included by fusedboot.c once per code path, with KERNEL_PATH
+ * set to the name of the code path, KERNEL_TARGET set to the function
+ * attributes selecting its instruction set, and KERNEL_SUPPORTED set to an
+ * expression checking that the CPU supports it. The functions get the name
+ * of the code path as a suffix, and are collected in a kernel_path_t
+ * structure named kernel_path_<name>. Only the kernels are compiled for the
+ * target, the support check must run on any CPU.
+ *
+ * The RNG and the index conversion are inlined into the kernels, so the
+ * bulk generator and the gather/sum loops are vectorized for the target.
+ * Every code path draws the same indices, but with -fassociative-math the
+ * sums are reduced in the order of the vector width of the target, so the
+ * replicates of the code paths agree to rounding (about 1e-16 relative),
+ * not bit for bit.
+ */
+
+#ifndef KERNELS_H_GUARD
+#define KERNELS_H_GUARD
+
+#define __KERNEL_CONCAT(name, path) name ## _ ## path
+#define __KERNEL_NAME(name, path) __KERNEL_CONCAT(name, path)
+#define __KERNEL_QUOTE(path) #path
+#define __KERNEL_STRING(path) __KERNEL_QUOTE(path)
+
+#endif // KERNELS_H_GUARD
+
+
+#define KERNEL(name) __KERNEL_NAME(name, KERNEL_PATH)
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of double values
+ * using a given number of samples.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_float64_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, double const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    double sum = 0.0;
+    uint64_t randoms[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    return sum / count;
+}
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of signed integer
+ * values using a given number of samples.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_int64_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, int64_t const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    int_fast64_t sum = 0;
+    uint64_t randoms[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    return sum / (double) count;
+}
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of unsigned integer
+ * values using a given number of samples.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_uint64_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, uint64_t const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    uint_fast64_t sum = 0;
+    uint64_t randoms[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sum += values[index];
+        }
+    }
+
+    return sum / (double) count;
+}
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of single precision float
+ * values using a given number of samples, accumulated in double precision.
+ * In the 32-bit functions, the indices are computed in a separate loop,
+ * because the compiler does not vectorize a loop mixing 32-bit values
+ * with 64-bit random numbers, and the values are accumulated per lane
+ * to avoid a serial dependency on a single sum.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_float32_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, float const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    double sums[RANDOM_WIDTH] = { 0 };
+    uint64_t randoms[RANDOM_WIDTH];
+    uint64_t indices[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            indices[ri] = __random_uint64_mod_float64(randoms[ri], count);
+        }
+
+        #pragma GCC unroll 8
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            sums[ri] += values[indices[ri]];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sums[ri] += values[index];
+        }
+    }
+
+    double sum = 0.0;
+    for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+        sum += sums[ri];
+    }
+
+    return sum / count;
+}
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of 32-bit signed integer
+ * values using a given number of samples.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_int32_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, int32_t const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    int_fast64_t sums[RANDOM_WIDTH] = { 0 };
+    uint64_t randoms[RANDOM_WIDTH];
+    uint64_t indices[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            indices[ri] = __random_uint64_mod_float64(randoms[ri], count);
+        }
+
+        #pragma GCC unroll 8
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            sums[ri] += values[indices[ri]];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sums[ri] += values[index];
+        }
+    }
+
+    int_fast64_t sum = 0;
+    for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+        sum += sums[ri];
+    }
+
+    return sum / (double) count;
+}
+
+//
+
+/**
+ * Computes the bootstrap mean of a given array of 32-bit unsigned integer
+ * values using a given number of samples.
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_uint32_simple)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, uint32_t const values[length]
+) {
+    const unsigned count_tail = count % RANDOM_WIDTH;
+    const unsigned count_head = count - count_tail;
+
+    uint_fast64_t sums[RANDOM_WIDTH] = { 0 };
+    uint64_t randoms[RANDOM_WIDTH];
+    uint64_t indices[RANDOM_WIDTH];
+
+    // Handle head elements (if any).
+    for (unsigned si = 0; si < count_head; si += RANDOM_WIDTH) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            indices[ri] = __random_uint64_mod_float64(randoms[ri], count);
+        }
+
+        #pragma GCC unroll 8
+        for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+            sums[ri] += values[indices[ri]];
+        }
+    }
+
+    // Handle tail elements (if any).
+    if (count_tail != 0) {
+        random_next_bulk(state, randoms);
+
+        for (unsigned ri = 0; ri < count_tail; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], count);
+            sums[ri] += values[index];
+        }
+    }
+
+    uint_fast64_t sum = 0;
+    for (unsigned ri = 0; ri < RANDOM_WIDTH; ri++) {
+        sum += sums[ri];
+    }
+
+    return sum / (double) count;
+}
+
+//
+
+/**
+ * Approximates the bootstrap mean of an array by a draw from the normal
+ * distribution of the resampled mean (central limit theorem). Instead of
+ * the array values, takes the precomputed mean and standard deviation of
+ * the resampled mean, so each draw is O(1) instead of O(count).
+ */
+static KERNEL_TARGET double KERNEL(bootstrap_mean_1d_normal)(
+    random_t * const restrict state,
+    const npy_intp count, const npy_intp length, double const moments[2]
+) {
+    uint64_t randoms[RANDOM_WIDTH];
+    random_next_bulk(state, randoms);
+
+    return moments[0] + moments[1] * __random_uint64_to_normal(randoms[0], randoms[1]);
+}
+
+//
+
+/**
+ * Computes the bootstrap means of the given arrays for several numbers of
+ * samples from a single sequence of draws: the mean for the i-th number
+ * of samples is taken over the first `mean_counts[i]` draws, so that the
+ * smaller sample sets are nested in the larger ones. The numbers of samples
+ * must be sorted in ascending order, the mean for the i-th number of samples
+ * is stored to `means[rows[i] * row_stride]`. With a single number of samples,
+ * this is the plain bootstrap mean (using the same draws).
+ * Uses a type-specific function to compute the bootstrap mean of the 1-D arrays.
+ */
+static KERNEL_TARGET void KERNEL(bootstrap_mean_2d_nested)(
+    random_t * const restrict state,
+    const unsigned count_count, unsigned const mean_counts[count_count], unsigned const rows[count_count],
+    bootstrap_input_t const * const restrict input,
+    double * const restrict means, const long row_stride
+) {
+    const unsigned mean_count = mean_counts[count_count - 1];
+
+    double sum = 0.0;
+    unsigned ci = 0;
+
+    // Means over zero samples (if any) are undefined.
+    while (ci < count_count && mean_counts[ci] == 0) {
+        means[rows[ci] * row_stride] = NAN;
+        ci++;
+    }
+
+    for (unsigned mi = 0; mi < mean_count; mi += RANDOM_WIDTH) {
+        uint64_t randoms[RANDOM_WIDTH];
+        random_next_bulk(state, randoms);
+
+        // Handle tail here, this should not be performance critical.
+        for (unsigned ri = 0; ri < RANDOM_WIDTH && (mi + ri) < mean_count; ri++) {
+            const unsigned index = __random_uint64_mod_float64(randoms[ri], input->array_count);
+            sum += input->bootstrap_mean_1d_fn(
+                state, input->sample_counts[index], input->lengths[index], input->values[index]
+            );
+
+            // Store the means whose number of samples has been reached.
+            while (ci < count_count && mean_counts[ci] == mi + ri + 1) {
+                means[rows[ci] * row_stride] = sum / mean_counts[ci];
+                ci++;
+            }
+        }
+    }
+}
+
+//
+
+static int KERNEL(kernel_supported)(void) {
+    return KERNEL_SUPPORTED;
+}
+
+
+static const kernel_path_t KERNEL(kernel_path) = {
+    .name = __KERNEL_STRING(KERNEL_PATH),
+    .supported = KERNEL(kernel_supported),
+    .bootstrap_mean_1d_float64 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_float64_simple),
+    .bootstrap_mean_1d_int64 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_int64_simple),
+    .bootstrap_mean_1d_uint64 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_uint64_simple),
+    .bootstrap_mean_1d_float32 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_float32_simple),
+    .bootstrap_mean_1d_int32 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_int32_simple),
+    .bootstrap_mean_1d_uint32 = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_uint32_simple),
+    .bootstrap_mean_1d_normal = (bootstrap_mean_1d_fn_t) KERNEL(bootstrap_mean_1d_normal),
+    .bootstrap_mean_2d_nested = KERNEL(bootstrap_mean_2d_nested),
+};
+
+
+#undef KERNEL
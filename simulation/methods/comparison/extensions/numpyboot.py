@@ -0,0 +1,158 @@
+"""NumPy implementation of the fusedboot extension, used when the extension is not built.
+
+The functions take the same arguments as their fusedboot counterparts and return replicates
+of the same distribution (not the same draws). `threads` is accepted for compatibility and ignored.
+The replicates are drawn in chunks, so that the indices and the values gathered at once
+take at most `memory_limit` bytes, and at most CHUNK_BYTES, which keeps them in the cache.
+"""
+
+import numpy as np
+
+MEMORY_LIMIT = 1_000_000_000
+CHUNK_BYTES = 8 * 2**20
+KERNEL_PATH = "numpy"
+
+_generator = np.random.default_rng()
+
+
+def init_random(seed: int) -> None:
+    """Initializes the random number generator using the given seed."""
+
+    global _generator
+    _generator = np.random.default_rng(seed)
+
+
+def kernel_path() -> str:
+    return KERNEL_PATH
+
+
+def kernel_paths() -> list[str]:
+    return [KERNEL_PATH]
+
+
+def set_kernel_path(name: str) -> None:
+    if name != KERNEL_PATH:
+        raise ValueError(f"Unknown code path `{name}`")
+
+
+def collect_input(arrays, sample_count: int) -> tuple[list[np.ndarray], np.ndarray]:
+    """Checks the input list of arrays like fusedboot does.
+
+    Returns the arrays and the number of samples to take from each array,
+    which defaults to the array length.
+    """
+
+    if not isinstance(arrays, list):
+        raise TypeError("`arrays` parameter must be of type `list`")
+
+    kinds = set()
+    for ai, array in enumerate(arrays):
+        if not isinstance(array, np.ndarray):
+            raise TypeError(f"Item {ai} of the input list is not a `numpy.ndarray`")
+        if array.ndim != 1:
+            raise ValueError(f"Array {ai} of the input list has {array.ndim} dimensions (expecting 1)")
+        if array.dtype.kind not in "fiu":
+            raise TypeError(
+                f"Array {ai} of the input list has invalid element type (expecting signed/unsigned integer, or float)")
+
+        kinds.add(array.dtype.kind)
+        if len(kinds) > 1:
+            raise TypeError(f"Array {ai} of the input list has a mismatching type (expecting similar types)")
+
+    sample_counts = np.array([sample_count if sample_count > 0 else len(array) for array in arrays], dtype=np.int64)
+    return arrays, sample_counts
+
+
+def resampled_means(arrays, sample_counts, drawn: np.ndarray, normal: bool, memory_limit: int) -> np.ndarray:
+    """Computes the resampled mean of every drawn array, `drawn` holds the array indices."""
+
+    if normal:
+        # The resampled mean is approximated by a draw from its normal distribution.
+        means = np.array([array.mean(dtype=np.float64) for array in arrays])
+        deviations = np.sqrt(np.array([array.var(dtype=np.float64) for array in arrays]) / sample_counts)
+        return means[drawn] + deviations[drawn] * _generator.standard_normal(drawn.shape)
+
+    # The draws of each array are resampled together, in chunks of rows fitting the memory limit.
+    flat = drawn.ravel()
+    order = np.argsort(flat, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(flat, minlength=len(arrays)))))
+
+    result = np.empty(flat.shape)
+    for ai, array in enumerate(arrays):
+        positions = order[bounds[ai]:bounds[ai + 1]]
+        sample_count = int(sample_counts[ai])
+        if len(positions) == 0:
+            continue
+
+        rows = max(1, min(memory_limit, CHUNK_BYTES) // (sample_count * (np.dtype(np.intp).itemsize + array.itemsize)))
+        for begin in range(0, len(positions), rows):
+            chunk = positions[begin:begin + rows]
+            indices = _generator.integers(0, sample_count, (len(chunk), sample_count))
+            result[chunk] = array[indices].mean(axis=1, dtype=np.float64)
+
+    return result.reshape(drawn.shape)
+
+
+def bootstrap_nested(arrays, run_counts, sample_count: int, replica_count: int, normal: bool, memory_limit: int) -> np.ndarray:
+    """Computes the replicates of several run counts, the smaller run counts use the first runs drawn."""
+
+    arrays, sample_counts = collect_input(arrays, sample_count)
+
+    run_counts = [int(run_count) for run_count in run_counts]
+    if len(run_counts) == 0:
+        raise ValueError("`run_counts` parameter must not be empty")
+    for ci, run_count in enumerate(run_counts):
+        if run_count < 0:
+            raise ValueError(f"Item {ci} of `run_counts` is negative")
+
+    # Means over zero runs are undefined.
+    replicas = np.full((len(run_counts), replica_count), np.nan)
+    max_run_count = max(run_counts)
+    if max_run_count == 0:
+        return replicas
+
+    # The drawn array indices and their means for a chunk of replicates take 16 bytes per run.
+    chunk = max(1, memory_limit // (16 * max_run_count))
+    for begin in range(0, replica_count, chunk):
+        end = min(replica_count, begin + chunk)
+        drawn = _generator.integers(0, len(arrays), (end - begin, max_run_count))
+        sums = np.cumsum(resampled_means(arrays, sample_counts, drawn, normal, memory_limit), axis=1)
+
+        for row, run_count in enumerate(run_counts):
+            if run_count > 0:
+                replicas[row, begin:end] = sums[:, run_count - 1] / run_count
+
+    return replicas
+
+
+def hierarchical_bootstrap_mean(
+        arrays, run_count: int, sample_count: int, replica_count: int,
+        threads: int = 1, normal: bool = False, memory_limit: int = MEMORY_LIMIT) -> np.ndarray:
+    """Calculates a hierarchical bootstrap mean for a list of NumPy arrays."""
+
+    return bootstrap_nested(arrays, [run_count], sample_count, replica_count, normal, memory_limit)[0]
+
+
+def hierarchical_bootstrap_mean_nested(
+        arrays, run_counts, sample_count: int, replica_count: int,
+        threads: int = 1, normal: bool = False, memory_limit: int = MEMORY_LIMIT) -> np.ndarray:
+    """Calculates hierarchical bootstrap means for several run counts from the same draws."""
+
+    return bootstrap_nested(arrays, run_counts, sample_count, replica_count, normal, memory_limit)
+
+
+def hierarchical_bootstrap_mean_batch(
+        groups, run_counts, sample_count: int, replica_count: int,
+        threads: int = 1, normal: bool = False, memory_limit: int = MEMORY_LIMIT) -> np.ndarray:
+    """Calculates hierarchical bootstrap means for several groups of arrays, one row per group."""
+
+    if not isinstance(groups, list):
+        raise TypeError("`groups` parameter must be of type `list`")
+    if len(run_counts) != len(groups):
+        raise ValueError("`run_counts` must have one run count per group")
+
+    replicas = np.empty((len(groups), replica_count))
+    for row, (arrays, run_count) in enumerate(zip(groups, run_counts)):
+        replicas[row] = bootstrap_nested(arrays, [run_count], sample_count, replica_count, normal, memory_limit)[0]
+
+    return replicas
@@ -79,4 +79,37 @@ static void __xoshiro256pv_next_bulk(
     for (unsigned ui = 0; ui < unroll_factor; ui++) state->data[3][ui] = __rotate_left_uint64(state->data[3][ui], 45);
 }
 
+
+
+/**
+ * Advances every lane of the state by 2^128 steps, which is equivalent
+ * to 2^128 calls to __xoshiro256pv_next_bulk(). Copying a state and then
+ * jumping the original yields two states with non-overlapping sequences,
+ * which can be used by independent computations (e.g., threads).
+ */
+inline ALWAYS
+static void __xoshiro256pv_jump(xoshiro256pv_t * const restrict state) {
+    static const uint64_t jump[] = {
+        UINT64_C(0x180ec6d33cfd0aba), UINT64_C(0xd5a61266f0c9392c),
+        UINT64_C(0xa9582618e03fc9aa), UINT64_C(0x39abdc4529b1661c)
+    };
+
+    uint64_t result[4][XOSHIRO256PV_WIDTH] = { 0 };
+    uint64_t discard[XOSHIRO256PV_WIDTH];
+
+    for (unsigned ji = 0; ji < 4; ji++) {
+        for (unsigned bi = 0; bi < 64; bi++) {
+            if (jump[ji] & (UINT64_C(1) << bi)) {
+                for (unsigned di = 0; di < 4; di++) {
+                    for (unsigned ui = 0; ui < XOSHIRO256PV_WIDTH; ui++) result[di][ui] ^= state->data[di][ui];
+                }
+            }
+
+            __xoshiro256pv_next_bulk(state, XOSHIRO256PV_WIDTH, discard);
+        }
+    }
+
+    __xoshiro256pv_init(state, (const uint64_t (*)[XOSHIRO256PV_WIDTH]) result);
+}
+
 #endif // XOSHIRO256PV_H_GUARD
@@ -1,8 +1,36 @@
+from datetime import datetime, timedelta
+
 from simulation.logger import Logger
 from simulation.measurement import Measurement
 
 
 class DimensionBase(Logger):
+	# the training window of the methods that train, see is_train
+	train_start: datetime | None = None
+	train_count: int = 0
+	train_duration_days: int = 0
+
+	def is_train(self, measurement: Measurement) -> bool:
+		"""
+		the first measurement starts the training, which covers the measurements of the following train_duration_days
+		and, after them, the measurements until train_count is used up
+		"""
+		if self.train_start is None:
+			self.train_start = measurement.commit_datetime
+			return True
+		else:
+			train_end = self.train_start + timedelta(days=self.train_duration_days)
+			if self.train_start <= measurement.commit_datetime < train_end:
+				if self.train_count > 0:
+					self.train_count = self.train_count - 1
+				return True
+			else:
+				if self.train_count == 0:
+					return False
+				else:
+					self.train_count = self.train_count - 1
+					return True
+
 	def calculate_dimension(self, old_measurement: Measurement, new_measurement: Measurement) -> dict[str, int]:
 		"""
 
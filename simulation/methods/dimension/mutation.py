@@ -1,53 +1,52 @@
 import json
-import random
-
 
 from simulation.methods.comparison.comparer import Comparer
 from simulation.methods.dimension.base import DimensionBase
 from simulation.measurement import Measurement
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 import numpy as np
 import os
 
 
+RUN_COUNTS = list(range(5, 31, 5))
+
+
 class Mutation(DimensionBase):
 	mutation_ratio: float
+	mutation_ratios: list[float]
 	train_start: datetime | None
 	train_count: int
 	train_duration_days: int
 	cache_directory: Path
 	samples: int
-	train_set: list
-
-	def __init__(self, mutation_ratio: float, train_count: int = 0, train_duration_days: int = 0, samples: int = 10):
+	gathered_key: str | None
+	train_versions: list[str]
+	statistics: dict[str, dict]
+	thresholds: dict | None
+
+	def __init__(
+			self, mutation_ratio: float | list[float], train_count: int = 0, train_duration_days: int = 0,
+			samples: int = 10):
+		"""
+		:param mutation_ratio: the shift of the mutated runs relative to the mean, or several shifts trained together
+		"""
 		super().__init__(method_name="Dimension/Mutation")
 
-		self.mutation_ratio = mutation_ratio
+		self.mutation_ratios = list(mutation_ratio) if isinstance(mutation_ratio, list) else [mutation_ratio]
+		self.mutation_ratio = self.mutation_ratios[0]
 		self.train_start = None
 		self.train_count = train_count
 		self.train_duration_days = train_duration_days
 		self.samples = samples
-		self.train_set = []
 
-		self.cache_directory = Path() / os.getenv("PHOENIX_HOME") / "_cache/mutations"
+		# the p-values of the training samples are aggregated as they are learnt, and finalized once
+		self.gathered_key = None
+		self.train_versions = []
+		self.statistics = {}
+		self.thresholds = None
 
-	def is_train(self, measurement: Measurement) -> bool:
-		if self.train_start is None:
-			self.train_start = measurement.commit_datetime
-			return True
-		else:
-			train_end = self.train_start + timedelta(days=self.train_duration_days)
-			if self.train_start <= measurement.commit_datetime < train_end:
-				if self.train_count > 0:
-					self.train_count = self.train_count - 1
-				return True
-			else:
-				if self.train_count == 0:
-					return False
-				else:
-					self.train_count = self.train_count - 1
-					return True
+		self.cache_directory = Path() / os.getenv("PHOENIX_HOME") / "_cache/mutations"
 
 	def calculate_dimension(self, old_measurement: Measurement, new_measurement: Measurement) -> dict:
 
@@ -67,55 +66,141 @@ class Mutation(DimensionBase):
 			"iterations_count": "max",
 		}
 
+	@staticmethod
+	def threshold_key(run: int, mutation_ratio: float) -> str:
+		# the ratio in percent, e.g. 1 for 0.01 or 0.5 for 0.005
+		return f"{run}-{run}-max-{round(mutation_ratio * 100, 6):g}"
+
+	def threshold_keys(self) -> list[str]:
+		return [self.threshold_key(run, ratio) for ratio in self.mutation_ratios for run in RUN_COUNTS]
+
 	def learn(self, measurement: Measurement) -> None:
 		gathered_key = "/".join(measurement.id.split("-")[:-1])
 		measurement_mutation_directory = self.cache_directory / f"{gathered_key}"
 		measurement_mutation_path = measurement_mutation_directory / f"{measurement.version_id}.json"
 
+		self.gathered_key = gathered_key
+		self.train_versions.append(measurement.version_id)
+
+		thresholds = {}
 		if measurement_mutation_path.exists():
 			with open(measurement_mutation_path, "r") as json_file:
 				thresholds = json.load(json_file)
-				self.train_set.append(thresholds)
-			return
+
+			if all(key in thresholds for key in self.threshold_keys()):
+				self.accumulate(thresholds)
+				return
 
 		os.makedirs(measurement_mutation_directory, exist_ok=True)
 
-		original_version = measurement.read_columns("iteration_time_ns", True)
+		# the keys of other mutation ratios trained before are kept next to the ones trained now
+		thresholds.update(self.train(Comparer(boots=3333), measurement.read_columns("iteration_time_ns", True)))
+
+		with open(measurement_mutation_path, "w") as json_file:
+			json.dump(thresholds, json_file, indent=4)
+
+		self.accumulate(thresholds)
+
+	def train(self, comparer: Comparer, original_version: list[np.ndarray]) -> dict[str, list[dict]]:
+		"""
+		compares random sets of the original runs with random sets of the mutated runs (shifted by the mutation
+		ratio of the mean of means), for every run count and mutation ratio
+		the dampening and the bootstrap are shift invariant, so the original runs are dampened once, every sampled
+		set is bootstrapped once (all sets in one batch), and the shift is added to the replicates of the mutated sets
+		:param original_version: the runs of the measurement, dampened in place
+		:return: the comparison results of the samples per threshold key
+		"""
 		means_of_means = np.mean([nums.mean() for nums in original_version])
-		mutated_version = [nums + (self.mutation_ratio * means_of_means) for nums in original_version]
-		comparer = Comparer(boots=3333)
+		comparer.hierarchical_dampen_extremes_reordering(original_version)
 
-		thresholds = {}
-		for run in range(5, 31, 5):
-			key = f"{run}-{run}-max-{int(self.mutation_ratio*100)}"
-			thresholds[key] = []
-			for sample in range(self.samples):
-				random_originals = [random.choice(original_version) for _ in range(run)]
-				random_mutated = [random.choice(mutated_version) for _ in range(run)]
+		generator = np.random.default_rng()
+		originals = []
+		mutated = []
+		for run in RUN_COUNTS:
+			for _ in range(self.samples):
+				originals.append([original_version[i] for i in generator.integers(len(original_version), size=run)])
+				mutated.append([original_version[i] for i in generator.integers(len(original_version), size=run)])
 
-				thresholds[key].append(
-					comparer.compute_difference_one_per_rep(random_originals, random_mutated))
+		run_counts = [len(sample) for sample in originals]
+		replicates = comparer.bootstrap_groups(originals + mutated, run_counts + run_counts, comparer.boots)
+		replicates_original = replicates[:len(originals)]
+		replicates_mutated = replicates[len(originals):]
 
-		with open(measurement_mutation_path, "w") as json_file:
-			json.dump(thresholds, json_file, indent=4)
+		means_original = [Comparer.mean_one_per_rep(sample) for sample in originals]
+		means_mutated = [Comparer.mean_one_per_rep(sample) for sample in mutated]
 
-		self.train_set.append(thresholds)
+		thresholds = {}
+		for ratio in self.mutation_ratios:
+			shift = ratio * means_of_means
+			for index, run in enumerate(run_counts):
+				thresholds.setdefault(self.threshold_key(run, ratio), []).append({
+					"measurement_old_count": run,
+					"measurement_new_count": run,
+					"p_value": comparer.estimate_likelihood_normal(
+						replicates_mutated[index] + shift - replicates_original[index], 0),
+					"relative_change": (means_mutated[index] + shift - means_original[index]) / means_original[index],
+					"replicates": comparer.boots,
+					"screened": False,
+				})
+
+		return thresholds
+
+	def accumulate(self, thresholds: dict[str, list[dict]]) -> None:
+		"""
+		adds the p-values of the samples of one trained measurement to the running statistics of every key
+		"""
+		for key in self.threshold_keys():
+			statistic = self.statistics.setdefault(
+				key, {"count": 0, "sum": 0.0, "min": np.inf, "max": -np.inf, "p_values": []})
+
+			for sample in thresholds.get(key, []):
+				p_value = sample["p_value"]
+				statistic["count"] += 1
+				statistic["sum"] += p_value
+				statistic["min"] = min(statistic["min"], p_value)
+				statistic["max"] = max(statistic["max"], p_value)
+				statistic["p_values"].append(p_value)
+
+		# a new training sample invalidates the finalized thresholds
+		self.thresholds = None
+
+	def thresholds_path(self) -> Path:
+		ratios = "_".join(f"{round(ratio * 100, 6):g}" for ratio in self.mutation_ratios)
+		return self.cache_directory / self.gathered_key / f"thresholds-{ratios}.json"
+
+	def finalize_thresholds(self) -> dict:
+		"""
+		:return: the thresholds of the training set, from the cache if it was aggregated from the same measurements
+		"""
+		thresholds_path = self.thresholds_path()
+		if thresholds_path.exists():
+			with open(thresholds_path, "r") as json_file:
+				cached = json.load(json_file)
+			if cached["train_versions"] == self.train_versions:
+				return cached["thresholds"]
+
+		thresholds = {
+			key: {
+				"mean": statistic["sum"] / statistic["count"],
+				"max": statistic["max"],
+				"min": statistic["min"],
+				"median": float(np.median(statistic["p_values"])),
+			}
+			for key, statistic in self.statistics.items() if statistic["count"] > 0
+		}
+
+		with open(thresholds_path, "w") as json_file:
+			json.dump({"train_versions": self.train_versions, "thresholds": thresholds}, json_file, indent=4)
+
+		return thresholds
 
 	def gather_thresholds(self) -> dict:
-		if len(self.train_set) == 0:
+		if len(self.train_versions) == 0:
 			self.log_warn("gather_thresholds", "No train sample was collected")
 			return {}
 
-		aggregated = {}
-		for run in range(5,31,5):
-			key = f"{run}-{run}-max-1"
-			threshold_group = [sample[key] for sample in self.train_set if key in sample]
-			p_values = np.array([s["p_value"]  for sample in threshold_group for s in sample])
-			aggregated[key] = {
-				"mean": np.mean(p_values),
-				"max": np.max(p_values),
-				"min": np.min(p_values),
-				"median": np.median(p_values),
-			}
+		# the training set does not change after the training, so the thresholds are only aggregated once
+		if self.thresholds is None:
+			self.thresholds = self.finalize_thresholds()
 
-		return aggregated
+		return self.thresholds
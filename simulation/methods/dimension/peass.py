@@ -1,6 +1,138 @@
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from simulation.measurement import Measurement
+from simulation.methods.comparison.comparer import Comparer, MIN_RUN_COUNT
 from simulation.methods.dimension.base import DimensionBase
 
 
+# the iteration counts the training considers, the runs are cut to their first iterations
+ITERATION_COUNTS = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000]
+
+
 class Peass(DimensionBase):
-	def __init__(self):
+	"""
+		Chooses the number of runs and iterations like Peass, from the variability of the training measurements:
+		the cheapest combination (runs times iterations) whose mean has a standard error within relative_error.
+		The simulated pairs are then read with only the first runs and iterations.
+	"""
+	train_start: datetime | None
+	train_count: int
+	train_duration_days: int
+	relative_error: float
+	cache_directory: Path
+	trained: int
+	relative_variances: dict[int, list[float]]
+
+	def __init__(self, train_count: int = 0, train_duration_days: int = 0, relative_error: float = 0.005):
+		"""
+		:param relative_error: the standard error of the mean of a measurement relative to the mean
+		"""
 		super().__init__(method_name="Dimension/Peass")
+
+		self.train_start = None
+		self.train_count = train_count
+		self.train_duration_days = train_duration_days
+		self.relative_error = relative_error
+
+		# per iteration count, the relative variance of the mean of one run of every trained measurement
+		self.trained = 0
+		self.relative_variances = {}
+
+		self.cache_directory = Path() / os.getenv("PHOENIX_HOME") / "_cache/peass"
+
+	def calculate_dimension(self, old_measurement: Measurement, new_measurement: Measurement) -> dict:
+		if self.is_train(old_measurement):
+			self.learn(old_measurement)
+			return {
+				"old_run_count": old_measurement.count,
+				"new_run_count": new_measurement.count,
+				"iterations_count": "max",
+			}
+
+		chosen = self.choose(min(old_measurement.count, new_measurement.count))
+		if chosen is None:
+			return {
+				"old_run_count": old_measurement.count,
+				"new_run_count": new_measurement.count,
+				"iterations_count": "max",
+			}
+
+		run_count, iterations_count = chosen
+		return {
+			"old_run_count": run_count,
+			"new_run_count": run_count,
+			"iterations_count": iterations_count,
+		}
+
+	def choose(self, max_run_count: int) -> tuple[int, int] | None:
+		"""
+		:return: the run and iteration counts of the fewest iterations in total that reach the relative error
+		in every trained measurement, None if none of them fits in max_run_count runs
+		"""
+		best = None
+		best_cost = math.inf
+		for iterations, relative_variances in self.relative_variances.items():
+			# a trained measurement with shorter runs cannot tell
+			if len(relative_variances) < self.trained:
+				continue
+
+			run_count = max(MIN_RUN_COUNT, math.ceil(max(relative_variances) / self.relative_error ** 2))
+			if run_count <= max_run_count and run_count * iterations < best_cost:
+				best = (run_count, iterations)
+				best_cost = run_count * iterations
+
+		return best
+
+	def learn(self, measurement: Measurement) -> None:
+		gathered_key = "/".join(measurement.id.split("-")[:-1])
+		measurement_peass_directory = self.cache_directory / f"{gathered_key}"
+		measurement_peass_path = measurement_peass_directory / f"{measurement.version_id}.json"
+
+		if measurement_peass_path.exists():
+			with open(measurement_peass_path, "r") as json_file:
+				relative_variances = {int(iterations): value for iterations, value in json.load(json_file).items()}
+		else:
+			os.makedirs(measurement_peass_directory, exist_ok=True)
+			relative_variances = self.train(Comparer(), measurement.read_columns("iteration_time_ns", True))
+
+			with open(measurement_peass_path, "w") as json_file:
+				json.dump(relative_variances, json_file, indent=4)
+
+		self.trained += 1
+		for iterations, relative_variance in relative_variances.items():
+			self.relative_variances.setdefault(iterations, []).append(relative_variance)
+
+	@staticmethod
+	def train(comparer: Comparer, runs: list[np.ndarray]) -> dict[int, float]:
+		"""
+		estimates the variance of the mean of one run, relative to the squared mean, for every iteration count up to
+		the shortest run, in closed form from the between-run and within-run variances of the first iterations
+		the dampening reorders the runs, so they are clipped to the range of their dampened values instead,
+		which keeps the order of the iterations and gives the same values for the whole runs
+		:return: the relative variance per iteration count, divided by the run count it is that of the mean of the runs
+		"""
+		if len(runs) == 0:
+			return {}
+
+		dampened = [run.astype(np.float64) for run in runs]
+		comparer.hierarchical_dampen_extremes_reordering(dampened)
+		clipped = [np.clip(run, limits.min(), limits.max()) for run, limits in zip(runs, dampened)]
+
+		shortest = min(len(run) for run in clipped)
+		relative_variances = {}
+		for iterations in ITERATION_COUNTS:
+			if iterations > shortest:
+				break
+
+			prefixes = [run[:iterations] for run in clipped]
+			mean = Comparer.mean_one_per_rep(prefixes)
+			if mean != 0:
+				relative_variances[iterations] = float(Comparer.hierarchical_mean_variance(prefixes, 1) / mean ** 2)
+
+		return relative_variances
@@ -1,7 +1,7 @@
 import argparse
 import os
 from pathlib import Path
-from simulation.simulation_class import Simulation
+from simulation.simulation_class import Simulation, EXECUTORS, COLUMN_DTYPES
 
 
 if __name__ == "__main__":
@@ -10,10 +10,34 @@ if __name__ == "__main__":
 	parser.add_argument("configuration_filename", type=str, help="The path to the configuration file")
 	parser.add_argument(
 		"-o", "--output", type=str, help="The path to result sub directory in PHOENIX_HOME/_results", default="temporary")
-	parser.add_argument("-t", "--threads", type=int, help="number of parallel threads", default=4)
+	parser.add_argument("-t", "--threads", type=int, help="number of parallel threads (or processes)", default=4)
+	parser.add_argument(
+		"-e", "--executor", type=str, choices=EXECUTORS,
+		help="run the combinations in threads or in worker processes", default="thread")
+	parser.add_argument(
+		"-c", "--column-cache", type=int,
+		help="memory budget in MB for caching the read measurement columns (per process), 0 disables it", default=0)
+	parser.add_argument(
+		"-s", "--snapshot", type=str,
+		help="load the measurements from a snapshot file (see simulation.snapshot) instead of the api", default=None)
+
+	parser.add_argument(
+		"-d", "--dtype", type=str, choices=COLUMN_DTYPES,
+		help="read the measurement columns in this dtype, float32 or int32 halve the memory traffic", default=None)
+
+	parser.add_argument(
+		"-m", "--memory-budget", type=int,
+		help="memory budget in MB of the combinations evaluated at the same time (in all threads or processes), "
+			 "0 disables the limit", default=0)
+
+	parser.add_argument(
+		"--dampened-cache", action="store_true",
+		help="keep the dampened runs of the measurements in PHOENIX_HOME/_cache/dampened for later simulations")
 
 	args = parser.parse_args()
-	simulation = Simulation(args.configuration_filename, args.output, args.threads)
+	simulation = Simulation(
+		args.configuration_filename, args.output, args.threads, args.executor, args.column_cache * 1024 * 1024,
+		args.snapshot, args.dtype, args.memory_budget * 1024 * 1024, args.dampened_cache)
 	phoenix_home = os.getenv("PHOENIX_HOME")
 	result_folder = Path() / phoenix_home / "_results" / args.output
 	simulation.run(result_folder)
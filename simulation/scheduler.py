@@ -0,0 +1,101 @@
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from simulation.logger import Logger
+from simulation.measurement import Measurement
+from simulation.methods.commit.base import CommitBase
+
+
+class Scheduler(Logger):
+	"""
+		Orders the combinations longest-first, so that the long combinations do not start last and
+		keep one worker busy after all the others are done.
+		The cost of a combination is estimated from the number of runs of the measurements of its commit pairs,
+		and replaced by the time it took in a previous simulation with the same configuration if known.
+	"""
+	timings_path: Path
+	timings: dict[str, dict[str, float]]
+	busy: dict[str, float]
+	lock: threading.Lock
+
+	def __init__(self, name: str):
+		super().__init__(method_name="Simulation/Scheduler")
+		self.timings_path = Path() / os.getenv("PHOENIX_HOME") / "_cache/scheduler" / f"{name}.json"
+		os.makedirs(self.timings_path.parent, exist_ok=True)
+
+		self.timings = {}
+		if self.timings_path.exists():
+			with open(self.timings_path, "r") as timings_json:
+				self.timings = json.load(timings_json)
+
+		self.busy = {}
+		self.lock = threading.Lock()
+		self.start_time = time.perf_counter()
+
+	@staticmethod
+	def measurement_cost(measurement: Measurement) -> float:
+		# the number of runs of the metadata, listing or reading the run files of every measurement
+		# before the first comparison would cost more than the ordering saves
+		return measurement.count
+
+	def estimate_costs(
+			self, measurements: dict[str, list[Measurement]], commit_picker: CommitBase, metric: str) -> dict[str, float]:
+		"""
+		:param measurements: the combinations with their measurements, as in Data.measurements
+		:param commit_picker: the commit picker of the simulation, to find the compared pairs
+		:param metric: the metric the timings of previous simulations are looked up for
+		:return: the estimated cost of each combination, in seconds if previous timings are available
+		"""
+		measurement_costs = {}
+		estimates = {}
+
+		for key, key_measurements in measurements.items():
+			estimates[key] = 0
+			for old, new in commit_picker.pick_measurements(key, key_measurements):
+				for measurement in (old, new):
+					if measurement.id not in measurement_costs:
+						measurement_costs[measurement.id] = self.measurement_cost(measurement)
+					estimates[key] += measurement_costs[measurement.id]
+
+		timings = self.timings.get(metric, {})
+		ratios = [timings[key] / estimates[key] for key in estimates if key in timings and estimates[key] > 0]
+		if len(ratios) == 0:
+			return estimates
+
+		# scale the estimates to seconds, so that timed and untimed combinations can be ordered together
+		seconds_per_unit = statistics.median(ratios)
+		return {
+			key: timings[key] if key in timings else estimate * seconds_per_unit
+			for key, estimate in estimates.items()
+		}
+
+	def order(self, measurements: dict[str, list[Measurement]], commit_picker: CommitBase, metric: str) -> list[str]:
+		costs = self.estimate_costs(measurements, commit_picker, metric)
+		self.start_time = time.perf_counter()
+		self.busy = {}
+		return sorted(costs.keys(), key=lambda key: costs[key], reverse=True)
+
+	def record(self, metric: str, key: str, worker: str, duration: float) -> None:
+		with self.lock:
+			self.timings.setdefault(metric, {})[key] = duration
+			self.busy[worker] = self.busy.get(worker, 0.0) + duration
+
+	def save(self) -> None:
+		with self.lock:
+			with open(self.timings_path, "w") as timings_json:
+				json.dump(self.timings, timings_json, indent=4)
+
+	def report(self, metric: str) -> None:
+		wall_time = time.perf_counter() - self.start_time
+		if wall_time <= 0 or len(self.busy) == 0:
+			return
+
+		for worker, busy in sorted(self.busy.items()):
+			self.log_info(f"{metric}: worker {worker} busy {busy:.1f}s of {wall_time:.1f}s ({100 * busy / wall_time:.1f}%)")
+
+		total = sum(self.busy.values())
+		self.log_info(
+			f"{metric}: {len(self.busy)} workers, utilisation {100 * total / (wall_time * len(self.busy)):.1f}%")
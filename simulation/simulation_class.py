@@ -1,19 +1,54 @@
 import importlib
 import json
+import multiprocessing
 import os
+import queue
 import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import yaml
 from yaml.parser import ParserError
 
 import simulation.methods.analyze.constant
+from simulation.admission import AdmissionController
+from simulation.column_cache import ColumnCache
+from simulation.dampened_store import DampenedStore, DAMPENED_DIRECTORY
 from simulation.data import Data
 from simulation.evaluation.base import EvaluationBase
 from simulation.logger import Logger
+from simulation.measurement import Measurement
 from pathlib import Path
 from simulation.methods.commit.base import CommitBase
+from simulation.methods.comparison.comparer import Comparer, BATCH_PAIRS, fb
+from simulation.methods.comparison.extensions import numpyboot
 from simulation.methods.dimension.base import DimensionBase
 from simulation.methods.analyze.base import AnalyzeBase
+from simulation.scheduler import Scheduler
+
+EXECUTORS = ["thread", "process"]
+COLUMN_DTYPES = ["float32", "int32", "float64", "int64"]
+
+# state inherited by forked worker processes, set by Simulation.run right before the pool is created
+_process_state: dict = {}
+
+
+def _init_process() -> None:
+	"""
+	reseeds the bootstrap RNGs of a forked worker, the workers would otherwise inherit the state the parent seeded at
+	import and draw the same replicates, the NumPy fallback included
+	"""
+	seed = (os.getpid() ^ time.time_ns()) & (2 ** 63 - 1)
+	fb.init_random(seed)
+	if numpyboot is not fb:
+		numpyboot.init_random(seed)
+
+
+def _evaluate_in_process(key: str, metric: str) -> tuple[str, dict, str, float]:
+	start = time.perf_counter()
+	evaluation = _process_state['simulation'].evaluate_combination(_process_state['data'], key, metric)
+	return key, evaluation, str(os.getpid()), time.perf_counter() - start
 
 
 class Simulation(Logger):
@@ -21,13 +56,20 @@ class Simulation(Logger):
 	output_path: Path
 	phoenix_path: Path
 	thread_count: int
+	executor: str
+	snapshot_path: Path | None
+	scheduler: Scheduler
+	admission: AdmissionController
 	commit_picker: CommitBase
 	dimension_calculator: DimensionBase
 	analyzer: AnalyzeBase
 	metrics: list[str]
 	mechanism:  dict[str, dict]
 
-	def __init__(self, configuration_file: str, output: str, thread_count: int):
+	def __init__(
+			self, configuration_file: str, output: str, thread_count: int, executor: str = "thread",
+			column_cache_budget: int = 0, snapshot: str | None = None, column_dtype: str | None = None,
+			memory_budget: int = 0, dampened_cache: bool = False):
 		super().__init__(method_name="SIMULATION")
 		self.configuration_path = Path() / configuration_file
 
@@ -46,6 +88,28 @@ class Simulation(Logger):
 
 		self.thread_count = thread_count
 
+		if executor not in EXECUTORS:
+			self.log_error("__init__", f"Code 107: unknown executor {executor}, use one of {EXECUTORS}.")
+			exit(107)
+		self.executor = executor
+
+		self.snapshot_path = None if snapshot is None else Path() / snapshot
+
+		if column_cache_budget > 0:
+			Measurement.column_cache = ColumnCache(column_cache_budget)
+
+		if column_dtype is not None:
+			if column_dtype not in COLUMN_DTYPES:
+				self.log_error("__init__", f"Code 108: unknown column dtype {column_dtype}, use one of {COLUMN_DTYPES}.")
+				exit(108)
+			Measurement.column_dtype = np.dtype(column_dtype)
+
+		if dampened_cache:
+			Comparer.dampened_store = DampenedStore(self.phoenix_path / DAMPENED_DIRECTORY)
+
+		# created before any worker is forked, so that the threads and the worker processes share it
+		self.admission = AdmissionController(memory_budget)
+
 	def validate_configuration(self, configuration_file: Path) -> dict | None:
 		template_file = self.phoenix_path / "simulation/configurations/template.yml"
 		template_yml = self.read_yml(template_file)
@@ -124,6 +188,9 @@ class Simulation(Logger):
 				"kwargs": {} if "kwargs" not in item else item["kwargs"]
 			}
 
+		# optional comparer kwargs of the ground truth analyzer, e.g. to draw its replicates adaptively
+		mechanism['ground_truth'] = configuration.get('ground_truth', {}).get('kwargs', {})
+
 		mechanism['evaluations'] = {}
 		for evaluation_method in configuration['evaluations']:
 			mechanism['evaluations'][evaluation_method] = get_class_from_string(f"simulation.{evaluation_method}")
@@ -142,71 +209,172 @@ class Simulation(Logger):
 
 		configuration = self.load(self.configuration_path)
 		self.mechanism = self.load_mechanism(configuration)
-		data = Data(self.mechanism['datetime'], self.mechanism['filters'])
+		data = Data(self.mechanism['datetime'], self.mechanism['filters'], self.snapshot_path)
+		self.scheduler = Scheduler(self.configuration_path.stem)
 
-		def process_combination(_keys: list, _metric: str, _evaluation_path: Path) -> None:
+		for metric in self.metrics:
+			evaluation_path = output / metric
+			os.makedirs(evaluation_path, exist_ok=True)
+			keys = self.scheduler.order(data.measurements, self.commit_picker, metric)
+			self.admission.reset()
 
-			for _key in _keys:
-				dimension_calculator = self.mechanism['methods']['dimension']['class'](
-					*self.mechanism['methods']['dimension']['args'],
-					**self.mechanism['methods']['dimension']['kwargs']
-				)
+			if self.executor == "process":
+				self.run_processes(data, keys, metric, evaluation_path)
+			else:
+				self.run_threads(data, keys, metric, evaluation_path)
+
+			self.scheduler.report(metric)
+			self.admission.report(metric)
+			if Measurement.column_cache is not None and self.executor == "thread":
+				self.log_info(f"{metric}: column cache {Measurement.column_cache.statistics()}")
+			if Comparer.dampened_store is not None and self.executor == "thread":
+				self.log_info(f"{metric}: dampened store {Comparer.dampened_store.statistics()}")
+			self.scheduler.save()
+			self.collect_evaluation(keys, evaluation_path)
 
-				analyzer = self.mechanism['methods']['analyze']['class'](
-					*self.mechanism['methods']['analyze']['args'],
-					**self.mechanism['methods']['analyze']['kwargs']
-				)
+	def run_threads(self, data: Data, keys: list[str], metric: str, evaluation_path: Path) -> None:
+		"""
+		the threads take the combinations from a shared queue in the given order (longest first)
+		"""
+		work = queue.Queue()
+		for key in keys:
+			work.put(key)
+
+		def process_combination(_metric: str, _evaluation_path: Path) -> None:
+			while True:
+				try:
+					_key = work.get_nowait()
+				except queue.Empty:
+					return
+
+				_start = time.perf_counter()
+				self.write_evaluation(_evaluation_path, _key, self.evaluate_combination(data, _key, _metric))
+				self.scheduler.record(_metric, _key, threading.current_thread().name, time.perf_counter() - _start)
+
+		threads = []
+		for index in range(min(self.thread_count, len(keys))):
+			thread = threading.Thread(
+				target=process_combination, args=([metric, evaluation_path]), name=f"thread-{index}")
+			threads.append(thread)
+			thread.start()
+
+		for thread in threads:
+			thread.join()
+
+	def run_processes(self, data: Data, keys: list[str], metric: str, evaluation_path: Path) -> None:
+		"""
+		evaluates the combinations in forked worker processes, the workers inherit the loaded data and
+		mechanism, only the keys and the evaluation dictionaries travel between the processes
+		the pool hands out the submitted combinations in order (longest first) to the idle workers
+		every worker reseeds the bootstrap RNG when it starts
+		"""
+		_process_state['simulation'] = self
+		_process_state['data'] = data
+
+		context = multiprocessing.get_context("fork")
+		with ProcessPoolExecutor(
+				max_workers=self.thread_count, mp_context=context, initializer=_init_process) as executor:
+			futures = [(key, executor.submit(_evaluate_in_process, key, metric)) for key in keys]
+			for key, future in futures:
+				# a failing combination loses only its own evaluation, like a failing thread
+				try:
+					key, evaluation, worker, duration = future.result()
+				except Exception as e:
+					self.log_error("run_processes", f"{key} failed for metric {metric}: {e!r}")
+					continue
+				self.write_evaluation(evaluation_path, key, evaluation)
+				self.scheduler.record(metric, key, worker, duration)
 
-				evaluators = {_method: _class() for _method, _class in self.mechanism['evaluations'].items()}
-				evaluation = {}
-				results = []
+		_process_state.clear()
 
-				ground_truth_analyzer = simulation.methods.analyze.constant.Constant()
-				ground_truth_max_runs = simulation.methods.dimension.Max()
+	def evaluate_combination(self, data: Data, key: str, metric: str) -> dict:
+		dimension_calculator = self.mechanism['methods']['dimension']['class'](
+			*self.mechanism['methods']['dimension']['args'],
+			**self.mechanism['methods']['dimension']['kwargs']
+		)
 
-				_measurements = data.measurements[_key]
-				_commit_pairs = self.commit_picker.pick_measurements(_key, _measurements)
-				self.log_info(f"{_key}  start with {len(_commit_pairs)} for metric: {_metric}")
+		analyzer = self.mechanism['methods']['analyze']['class'](
+			*self.mechanism['methods']['analyze']['args'],
+			**self.mechanism['methods']['analyze']['kwargs']
+		)
 
-				for pair in _commit_pairs:
-					old, new = pair
-					run_sizes = dimension_calculator.calculate_dimension(old, new)
+		evaluators = {_method: _class() for _method, _class in self.mechanism['evaluations'].items()}
+		evaluation = {}
+		results = []
 
-					results.append({
-						"old_id": old.id,
-						"new_id": new.id,
-						"result": analyzer.analyze(_key, old, new, _metric, run_sizes),
-						"ground_truth": ground_truth_analyzer.analyze(
-							_key, old, new, _metric, ground_truth_max_runs.calculate_dimension(old, new)),
-					})
+		ground_truth_analyzer = simulation.methods.analyze.constant.Constant(**self.mechanism['ground_truth'])
+		ground_truth_max_runs = simulation.methods.dimension.Max()
 
-				for evaluator_key, evaluator_object in evaluators.items():
-					if isinstance(evaluator_object, EvaluationBase):
-						evaluation[evaluator_key] = evaluator_object.evaluate(_key, results)
+		measurements = data.measurements[key]
+		commit_pairs = self.commit_picker.pick_measurements(key, measurements)
+		self.log_info(f"{key}  start with {len(commit_pairs)} for metric: {metric}")
 
-				filename = _evaluation_path / f"{_key}.json"
-				with open(filename, "w") as json_file:
-					json.dump(evaluation, json_file, indent=4)
+		# both analyzers share the comparison store of this process
+		analyzer.store.preload(key, metric)
 
-		for metric in self.metrics:
-			evaluation_path = output / metric
-			os.makedirs(evaluation_path, exist_ok=True)
-			keys = [k for k in data.measurements.keys()]
-			length = len(keys)
-			chunk = length // self.thread_count + 1
-			keys_per_threads = [keys[i * chunk: min(length, (i + 1) * chunk)] for i in range(self.thread_count)]
-			threads = []
-			for keys_per_thread in keys_per_threads:
-				if len(keys_per_thread) == 0:
-					continue
-				thread = threading.Thread(target=process_combination, args=([keys_per_thread, metric, evaluation_path]))
-				threads.append(thread)
-				thread.start()
+		# the pairs are compared in chunks, each waits until its estimated memory fits in the budget
+		for chunk, required in self.admission_chunks(commit_pairs, metric, [analyzer, ground_truth_analyzer]):
+			with self.admission.admit(key, required):
+				if analyzer.supports_batch:
+					analyzed = analyzer.analyze_batch(key, [
+						(old, new, dimension_calculator.calculate_dimension(old, new)) for old, new in chunk], metric)
+				else:
+					analyzed = [
+						analyzer.analyze(key, old, new, metric, dimension_calculator.calculate_dimension(old, new))
+						for old, new in chunk]
+
+				ground_truths = ground_truth_analyzer.analyze_batch(key, [
+					(old, new, ground_truth_max_runs.calculate_dimension(old, new)) for old, new in chunk], metric)
+
+			for (old, new), result, ground_truth in zip(chunk, analyzed, ground_truths):
+				results.append({
+					"old_id": old.id,
+					"new_id": new.id,
+					"result": result,
+					"ground_truth": ground_truth,
+				})
+
+		analyzer.store.release(key, metric)
+
+		# the screened results took the analytic p-value of the comparer instead of the bootstrap
+		screened = sum(result[part].get("screened", False) for result in results for part in ["result", "ground_truth"])
+		if screened > 0:
+			self.log_info(f"{key}  {screened} of {2 * len(results)} results screened for metric: {metric}")
+
+		for evaluator_key, evaluator_object in evaluators.items():
+			if isinstance(evaluator_object, EvaluationBase):
+				evaluation[evaluator_key] = evaluator_object.evaluate(key, results)
+
+		return evaluation
+
+	def admission_chunks(
+			self, commit_pairs: list[tuple[Measurement, Measurement]], metric: str, analyzers: list[AnalyzeBase]):
+		"""
+		splits the pairs into chunks of BATCH_PAIRS (the windows of Comparer.compare_batch), a chunk estimated above
+		the memory budget into single pairs, without a budget the chunks are not estimated
+		:return: the chunks in the order of the pairs with the estimated peak bytes of analyzing them
+		"""
+		def estimate(pairs: list[tuple[Measurement, Measurement]]) -> int:
+			return max(analyzer.estimate_bytes(pairs, metric) for analyzer in analyzers)
+
+		for begin in range(0, len(commit_pairs), BATCH_PAIRS):
+			chunk = commit_pairs[begin:begin + BATCH_PAIRS]
+			if self.admission.budget <= 0:
+				yield chunk, 0
+				continue
 
-			for thread in threads:
-				thread.join()
+			required = estimate(chunk)
+			if self.admission.budget < required and len(chunk) > 1:
+				for pair in chunk:
+					yield [pair], estimate([pair])
+			else:
+				yield chunk, required
 
-			self.collect_evaluation(keys, evaluation_path)
+	@staticmethod
+	def write_evaluation(evaluation_path: Path, key: str, evaluation: dict) -> None:
+		filename = evaluation_path / f"{key}.json"
+		with open(filename, "w") as json_file:
+			json.dump(evaluation, json_file, indent=4)
 
 	def collect_evaluation(self, keys: list[str], evaluation_path: Path) -> None:
 
@@ -0,0 +1,39 @@
+import argparse
+import os
+from pathlib import Path
+from simulation.data import Data
+from simulation.fetcher import Fetcher
+from simulation.logger import Logger
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Downloads the metadata of all measurements into one snapshot file")
+
+	parser.add_argument(
+		"-o", "--output", type=str, help="The path to the snapshot file",
+		default=None)
+	parser.add_argument("-t", "--threads", type=int, help="number of concurrent requests", default=8)
+	parser.add_argument("-r", "--retries", type=int, help="number of retries of a failed request", default=3)
+
+	args = parser.parse_args()
+	logger = Logger(method_name="SNAPSHOT")
+
+	for variable in ["PHOENIX_HOME", "GRAALVM_WEB", "GRAALVM_PORT"]:
+		if os.getenv(variable) is None:
+			logger.log_error("__main__", f"Code 208: {variable} is not set.")
+			exit(208)
+
+	if args.output is None:
+		output = Path() / os.getenv("PHOENIX_HOME") / "_cache/data/snapshot.json.gz"
+	else:
+		output = Path() / args.output
+	os.makedirs(output.parent, exist_ok=True)
+
+	fetcher = Fetcher(os.getenv("GRAALVM_WEB"), os.getenv("GRAALVM_PORT"), args.threads, args.retries)
+	try:
+		counts = Data.write_snapshot(fetcher, output)
+	except ConnectionError as e:
+		logger.log_error("__main__", f"Code 209: {e}")
+		exit(209)
+
+	logger.log_info(f"stored {counts} in {output}")